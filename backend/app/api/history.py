@@ -1,21 +1,21 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timezone
-import pandas as pd
+from typing import AsyncIterator, List, Optional, Tuple
+import numpy as np
 import pytz
-from functools import lru_cache
 
 from .. import mt5_connector
-from ..mt5_connector import TIMEFRAME_MAP
-
-import logging  # Adicione esta linha no topo, após os outros imports
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('backend.log'),  # Grava em arquivo
-        logging.StreamHandler()  # Também no console
-    ]
-)
+from ..bar_store import bar_store
+from ..encoding import COLUMNAR_MEDIA_TYPE, encode_columnar, encode_json, rates_to_records
+from ..http_cache import CACHE_REVALIDATE, cached_response, is_not_modified, make_etag, not_modified_response
+from ..resample import TIMEFRAME_REGEX, bucket_start, parse_timeframe, resample_rates
+from ..metrics import http_serialize_seconds, timed
+from ..mt5_executor import MT5ExecutorError
+
+import logging
+# O logging (fila, arquivo com rotação, JSON) é configurado em `log_config`, no início da aplicação
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -23,29 +23,32 @@ router = APIRouter()
 # Timezone de São Paulo para usar como padrão
 SAO_PAULO_TZ = pytz.timezone("America/Sao_Paulo")
 
-_TIMEFRAME_MAP = None
+# Tempo de serialização das respostas (rótulo = rota, como no middleware de métricas)
+_serialize_seconds = http_serialize_seconds.labels("/api/history/{symbol}")
+
+# Candles M1 por janela no modo streaming (os demais timeframes são derivados do M1)
+STREAM_WINDOW_BARS = 10000
 
-def get_timeframe_map():
+def validate_timeframe(timeframe: str) -> Tuple[int, int]:
     """
-    Retorna o mapeamento de timeframes. Inicializa na primeira chamada
-    para garantir que a conexão com o MT5 já exista.
+    Valida o timeframe e retorna sua duração e a âncora da sessão.
+
+    Qualquer timeframe é derivado dos candles M1 armazenados (ver `resample`),
+    então não há uma lista fixa de timeframes suportados.
     
+    Args:
+        timeframe (str): Timeframe no formato `<unidade><n>[@HH:MM]` (ex: 'M5', 'H2@09:00')
+        
     Returns:
-        dict: Mapeamento de strings para constantes MT5
+        tuple: (duração do período em segundos, deslocamento da âncora em segundos)
         
     Raises:
-        HTTPException: Se o MT5 não estiver disponível
-    """
-    global _TIMEFRAME_MAP
-    if _TIMEFRAME_MAP is None:
-        mt5 = mt5_connector.get_mt5_instance()
-        if not mt5:
-             raise HTTPException(status_code=503, detail="Serviço MT5 indisponível para mapear timeframes.")
-        _TIMEFRAME_MAP = {
-            "M1": mt5.TIMEFRAME_M1, "M5": mt5.TIMEFRAME_M5, "M15": mt5.TIMEFRAME_M15,
-            "M30": mt5.TIMEFRAME_M30, "H1": mt5.TIMEFRAME_H1,
-        }
-    return _TIMEFRAME_MAP
+        HTTPException: Se o timeframe for inválido
+    """
+    try:
+        return parse_timeframe(timeframe)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 def parse_and_localize_time(time_str: str) -> datetime:
     """
@@ -76,59 +79,217 @@ def parse_and_localize_time(time_str: str) -> datetime:
     except (ValueError, TypeError):
         raise HTTPException(status_code=400, detail=f"Formato de data/hora inválido: '{time_str}'. Use ISO-8601.")
 
-# @lru_cache(maxsize=128) 
-# desabilitei a cache porque quando atualizo o gráfico no cliente o fetch_rates_from_mt5 tem os mesmos parâmetros mas os dados podem ter mudado porque o pedido feito já tinha um range maior (está sendo pedido até as 18h).
-def fetch_rates_from_mt5(symbol: str, timeframe_mt5: int, start_utc: datetime, end_utc: datetime):
+def fetch_rates_array(symbol: str, timeframe: str, start_utc: datetime, end_utc: datetime) -> np.ndarray:
     """
-    Função cacheável que busca dados históricos do MT5.
+    Busca dados históricos através do armazenamento local de candles.
+
+    Os candles M1 fechados ficam persistidos em `bar_store`; o MT5 só é consultado
+    para o trecho posterior ao último candle fechado armazenado (e para trechos
+    anteriores ao início já coberto). Os demais timeframes são derivados do M1.
     
     Args:
         symbol (str): Símbolo do ativo (ex: 'WDOV25')
-        timeframe_mt5 (int): Constante de timeframe do MT5
+        timeframe (str): Timeframe (ex: 'M5', 'H2', 'D1@09:00')
         start_utc (datetime): Data/hora início em UTC
         end_utc (datetime): Data/hora fim em UTC
         
     Returns:
-        list: Lista de dicionários com dados OHLC compatíveis com Lightweight Charts
+        np.ndarray: Array estruturado do MT5 com os candles do período
         
     Raises:
-        HTTPException: Se o MT5 não estiver conectado
-        
-    Note:
-        O campo 'time' retornado é Unix timestamp (epoch seconds) em UTC,
-        conforme esperado pelos sistemas de charting financeiro.
+        HTTPException: Se o MT5 não estiver conectado ou o timeframe for inválido
     """
-    print(f"Buscando dados no MT5 para {symbol} de {start_utc} a {end_utc}...")
     mt5 = mt5_connector.get_mt5_instance()
     if not mt5_connector.is_connected():
         raise HTTPException(status_code=503, detail="Serviço MT5 indisponível.")
 
     # MT5 espera datetimes em UTC
-    logger.info(f"Buscando dados no MT5 para {symbol} de {start_utc} a {end_utc}...")
+    logger.debug("Buscando dados para %s de %s a %s...", symbol, start_utc, end_utc)
 
-    rates = mt5.copy_rates_range(symbol, timeframe_mt5, start_utc, end_utc)
+    period, offset = validate_timeframe(timeframe)
+    rates = bar_store.get_rates(mt5, symbol, "M1", _aligned_m1_start(start_utc, period, offset), end_utc)
+    if period != 60:
+        rates = resample_rates(rates, period, offset)
+    return rates
+
+def fetch_window_rates(symbol: str, timeframe: str, start_utc: datetime, end_utc: datetime) -> np.ndarray:
+    """
+    Busca uma janela do modo streaming, como `fetch_rates_array`, mas sem estender
+    nem gravar a série do `bar_store` (ver `BarStore.read_range`).
+
+    Raises:
+        HTTPException: Se o MT5 não estiver conectado ou a leitura falhar
+    """
+    mt5 = mt5_connector.get_mt5_instance()
+    if not mt5_connector.is_connected():
+        raise HTTPException(status_code=503, detail="Serviço MT5 indisponível.")
+
+    period, offset = validate_timeframe(timeframe)
+    rates = bar_store.read_range(mt5, symbol, "M1", _aligned_m1_start(start_utc, period, offset), end_utc)
+    if rates is None:
+        raise HTTPException(status_code=502, detail="Falha ao buscar candles no MT5.")
+    if period != 60:
+        rates = resample_rates(rates, period, offset)
+    return rates
+
+def fetch_cached_rates(symbol: str, timeframe: str, start_utc: datetime, end_utc: datetime) -> Optional[np.ndarray]:
+    """
+    Retorna os candles do intervalo se ele já estiver fechado no armazenamento local.
+
+    Não acessa o MT5 (pode rodar fora da thread dele, mesmo desconectado); o
+    resultado é o mesmo de `fetch_rates_array` para o intervalo.
+
+    Returns:
+        np.ndarray ou None: Candles do período, ou None se for preciso consultar o MT5
+    """
+    period, offset = validate_timeframe(timeframe)
+    rates = bar_store.get_cached(symbol, "M1", _aligned_m1_start(start_utc, period, offset), end_utc)
+    if rates is not None and period != 60:
+        rates = resample_rates(rates, period, offset)
+    return rates
+
+def _aligned_m1_start(start_utc: datetime, period: int, offset: int) -> datetime:
+    """Recua o início para o começo do período, para que o primeiro candle agregado fique completo."""
+    return datetime.fromtimestamp(bucket_start(int(start_utc.timestamp()), period, offset), tz=timezone.utc)
+
+def fetch_rates_from_mt5(symbol: str, timeframe: str, start_utc: datetime, end_utc: datetime):
+    """
+    Busca dados históricos e os converte para o formato do Lightweight Charts.
+    
+    Args:
+        symbol (str): Símbolo do ativo (ex: 'WDOV25')
+        timeframe (str): Timeframe (ex: 'M5', 'H2', 'D1@09:00')
+        start_utc (datetime): Data/hora início em UTC
+        end_utc (datetime): Data/hora fim em UTC
+        
+    Returns:
+        list: Lista de dicionários com dados OHLC compatíveis com Lightweight Charts
+        
+    Note:
+        O campo 'time' retornado é Unix timestamp (epoch seconds) em UTC,
+        conforme esperado pelos sistemas de charting financeiro.
+    """
+    rates = fetch_rates_array(symbol, timeframe, start_utc, end_utc)
 
-    if rates is None or len(rates) == 0:
-        logger.warning(f"Nenhum dado retornado do MT5. Erro: {mt5.last_error()}")
+    if len(rates) == 0:
+        logger.warning(f"Nenhum dado disponível para {symbol} no período.")
         return []
 
-    # Converte para DataFrame do Pandas para facilitar a manipulação
-    df = pd.DataFrame(rates)
-    # Converte a coluna 'time' para o formato de timestamp Unix (segundos), que é o que a LW-Charts espera
-    df['time'] = df['time'].astype(int)
-    # Renomeia colunas se necessário (o MT5 já retorna 'open', 'high', 'low', 'close')
-    # Seleciona apenas as colunas necessárias para a resposta
-    df = df[['time', 'open', 'high', 'low', 'close']]
+    # Converte direto das colunas do array, sem passar por um DataFrame
+    return rates_to_records(rates)
 
-    # Converte o DataFrame para uma lista de dicionários e retorna
-    return df.to_dict(orient='records')
+def fetch_history_range(symbol: str, timeframe: str, start_utc: datetime,
+                        end_utc: datetime) -> Tuple[np.ndarray, bool]:
+    """
+    Busca os candles do intervalo e informa se ele já está totalmente fechado.
+
+    O intervalo está fechado quando o armazenamento já tem um candle M1 fechado
+    posterior ao seu fim: como a série armazenada é contígua, nenhum candle do
+    intervalo pode mais mudar.
+
+    Returns:
+        tuple: (candles, intervalo fechado)
+    """
+    rates = fetch_rates_array(symbol, timeframe, start_utc, end_utc)
+    last_closed = bar_store.last_closed_time(symbol, "M1")
+    return rates, last_closed is not None and last_closed > int(end_utc.timestamp())
+
+def history_etag(symbol: str, timeframe: str, start_utc: datetime, end_utc: datetime,
+                 media_type: str, rates: np.ndarray) -> str:
+    """
+    ETag da resposta de histórico, derivado do intervalo e do último candle.
+
+    O último candle (incluindo o que ainda está em formação) identifica a versão
+    dos dados: enquanto ele não muda, o conteúdo do intervalo também não muda.
+    """
+    last_bar = rates[-1:].tobytes() if len(rates) > 0 else b""
+    return make_etag("history", symbol, timeframe, int(start_utc.timestamp()),
+                     int(end_utc.timestamp()), media_type, len(rates), last_bar)
+
+def history_windows(start_utc: datetime, end_utc: datetime, period: int, offset: int) -> List[Tuple[datetime, datetime]]:
+    """
+    Divide o intervalo em janelas de até `STREAM_WINDOW_BARS` candles M1.
+
+    As fronteiras caem no início de um período, então nenhum candle agregado
+    fica dividido entre duas janelas (um período maior que a janela vira uma
+    janela própria).
+    """
+    start_ts = int(start_utc.timestamp())
+    end_ts = int(end_utc.timestamp())
+    span = max(1, STREAM_WINDOW_BARS * 60 // period) * period
+    windows = []
+    window_start = bucket_start(start_ts, period, offset)
+    while window_start <= end_ts:
+        window_end = min(window_start + span - 1, end_ts)
+        windows.append((datetime.fromtimestamp(max(window_start, start_ts), tz=timezone.utc),
+                        datetime.fromtimestamp(window_end, tz=timezone.utc)))
+        window_start += span
+    return windows
+
+def _encode_json_items(rates: np.ndarray) -> bytes:
+    """Objetos OHLC separados por vírgula, sem os colchetes da lista."""
+    return encode_json(rates)[1:-1]
+
+async def _stream_history(first: np.ndarray, windows: List[Tuple[datetime, datetime]],
+                          symbol: str, timeframe: str, media_type: str) -> AsyncIterator[bytes]:
+    """
+    Gera o corpo da resposta janela a janela.
+
+    JSON: uma única lista, emitida aos pedaços. Colunar: um bloco completo
+    (cabeçalho + colunas) por janela, concatenados.
+    """
+    columnar = media_type == COLUMNAR_MEDIA_TYPE
+    encode = encode_columnar if columnar else _encode_json_items
+    rates, first = first, None
+    wrote = False
+    if not columnar:
+        yield b"["
+    for index, (window_start, window_end) in enumerate(windows):
+        if index > 0:
+            try:
+                rates = await mt5_connector.run_mt5(fetch_window_rates, symbol, timeframe, window_start, window_end)
+            except Exception:
+                # O status 200 já foi enviado: o corpo termina incompleto e o cliente acusa o erro
+                logger.exception("Erro ao buscar a janela %s a %s de %s; resposta interrompida.",
+                                 window_start, window_end, symbol)
+                return
+        if columnar or len(rates) > 0:
+            chunk = await run_in_threadpool(timed, _serialize_seconds, encode, rates)
+            if wrote and not columnar:
+                yield b","
+            yield chunk
+            wrote = True
+        # Libera a janela antes de buscar a próxima
+        rates = None
+    if not columnar:
+        yield b"]"
+
+async def streaming_history_response(symbol: str, timeframe: str, start_utc: datetime, end_utc: datetime,
+                                     media_type: str) -> StreamingResponse:
+    """
+    Resposta de histórico paginada em janelas de tamanho fixo.
+
+    Cada janela é buscada (na thread do MT5), codificada e enviada antes da
+    próxima. As janelas não estendem nem regravam a série do `bar_store`
+    (ver `fetch_window_rates`), então a memória usada não cresce com o
+    tamanho do intervalo.
+    A primeira janela é buscada antes de iniciar a resposta, para que erros
+    do MT5 ainda virem o status HTTP correspondente.
+    """
+    period, offset = validate_timeframe(timeframe)
+    windows = history_windows(start_utc, end_utc, period, offset)
+    first = await mt5_connector.run_mt5(fetch_window_rates, symbol, timeframe, *windows[0])
+    return StreamingResponse(_stream_history(first, windows, symbol, timeframe, media_type),
+                             media_type=media_type, headers={"Cache-Control": CACHE_REVALIDATE})
 
 @router.get("/history/{symbol}")
 async def get_history(
+    request: Request,
     symbol: str,
-    timeframe: str = Query(..., regex="^(M1|M5|M15|M30|H1)$"),
+    timeframe: str = Query(..., pattern=TIMEFRAME_REGEX, description="Timeframe (ex: M1, M5, H2, D1@09:00)"),
     start: str = Query(..., description="Data de início no formato ISO-8601"),
-    end: str = Query(..., description="Data de fim no formato ISO-8601")
+    end: str = Query(..., description="Data de fim no formato ISO-8601"),
+    stream: bool = Query(False, description="Envia a resposta aos pedaços, janela a janela (intervalos grandes)")
 ):
     """
     Fornece dados históricos de candlesticks para um ativo.
@@ -137,40 +298,67 @@ async def get_history(
     - Aceita horários em ISO-8601 (com ou sem timezone)
     - Normaliza internamente para UTC
     - Retorna timestamps Unix (epoch seconds) compatíveis com charting libs
+
+    Negociação de conteúdo: com `Accept: application/x-ohlc-columnar` a resposta
+    é o formato colunar binário (ver `encoding`); caso contrário, JSON.
+
+    Cache HTTP: a resposta tem ETag forte (último candle do intervalo) e responde
+    304 a `If-None-Match`. Intervalos totalmente fechados são marcados como
+    imutáveis; os demais são revalidados a cada uso. Respostas grandes são
+    comprimidas (brotli ou gzip).
+
+    Modo streaming (`stream=true`): o intervalo é percorrido em janelas de
+    `STREAM_WINDOW_BARS` candles M1, cada uma enviada assim que codificada, com
+    memória constante para qualquer tamanho de intervalo. O corpo é o mesmo
+    JSON (ou, no formato colunar, um bloco por janela, concatenados), mas sem
+    ETag nem compressão, já que o conteúdo só é conhecido ao final.
     
     Args:
+        request (Request): Requisição HTTP (usada para ler o cabeçalho Accept)
         symbol (str): Símbolo do ativo
-        timeframe (str): Período (M1, M5, M15, M30, H1)
+        timeframe (str): Período (M<n>, H<n> ou D<n>, com âncora opcional @HH:MM)
         start (str): Data/hora início
         end (str): Data/hora fim
+        stream (bool): Ativa o modo streaming
         
     Returns:
-        list: Array de objetos OHLC com timestamps Unix
+        list: Array de objetos OHLC com timestamps Unix (ou o formato colunar binário)
         
     Example:
         GET /api/history/WDOV25?timeframe=M5&start=2025-09-20T09:00:00&end=2025-09-20T18:00:00
     """
-    timeframe_map = get_timeframe_map()
-    if timeframe not in timeframe_map:
-        raise HTTPException(status_code=400, detail=f"Timeframe inválido: '{timeframe}'. Use M1, M5, M15, M30 ou H1.")
-
-    timeframe_mt5 = timeframe_map[timeframe]
+    validate_timeframe(timeframe)
     start_utc = parse_and_localize_time(start)
     end_utc = parse_and_localize_time(end)
 
     if start_utc >= end_utc:
         raise HTTPException(status_code=400, detail="A data de início deve ser anterior à data de fim.")
 
+    media_type = COLUMNAR_MEDIA_TYPE if COLUMNAR_MEDIA_TYPE in request.headers.get("accept", "") else "application/json"
+
     try:
-        # A chamada à função cacheada é síncrona, mas como o I/O do MT5 é rápido
-        # e a função é cacheada, o impacto no event loop é minimizado.
-        # Para operações muito longas, usaríamos `run_in_executor`.
-        data = fetch_rates_from_mt5(symbol, timeframe_mt5, start_utc, end_utc)
-        if not data:
-             # Retorna lista vazia com status 200 se não houver dados no período,
-             # mas o MT5 não deu erro.
-            return []
-        return data
+        if stream:
+            return await streaming_history_response(symbol, timeframe, start_utc, end_utc, media_type)
+
+        # A busca roda na thread dedicada do MT5 para não bloquear o event loop.
+        rates, closed = await mt5_connector.run_mt5(fetch_history_range, symbol, timeframe, start_utc, end_utc)
+        if len(rates) == 0:
+            # Retorna lista vazia com status 200 se não houver dados no período,
+            # mas o MT5 não deu erro.
+            logger.warning(f"Nenhum dado disponível para {symbol} no período.")
+
+        etag = history_etag(symbol, timeframe, start_utc, end_utc, media_type, rates)
+        if is_not_modified(request, etag):
+            # O cliente já tem esta versão: nada de serializar ou transferir
+            return not_modified_response(etag, closed)
+
+        # Serialização e compressão rodam fora do event loop
+        encode = encode_columnar if media_type == COLUMNAR_MEDIA_TYPE else encode_json
+        body = await run_in_threadpool(timed, _serialize_seconds, encode, rates)
+        return await run_in_threadpool(cached_response, request, body, media_type, etag, closed)
+    except (HTTPException, MT5ExecutorError):
+        # Erros já mapeados para respostas HTTP
+        raise
     except Exception as e:
         # Captura outras exceções inesperadas
         raise HTTPException(status_code=500, detail=f"Erro interno ao buscar dados: {e}")
@@ -0,0 +1,168 @@
+"""
+Histórico de vários símbolos/timeframes em uma única requisição.
+
+    POST /api/history/batch
+    {"items": [{"symbol": "WDO$N", "timeframe": "M5", "start": "...", "end": "..."}, ...]}
+
+A resposta é NDJSON (`application/x-ndjson`): uma linha por item, enviada
+assim que o item fica pronto, na ordem em que ficam prontos:
+
+    {"index": 0, "symbol": "WDO$N", "timeframe": "M5", "cached": true, "closed": true, "data": [...]}
+    {"index": 1, "symbol": "WIN$N", "timeframe": "M1", "error": "Serviço MT5 indisponível.", "status": 503}
+
+Itens com o intervalo já fechado no armazenamento local saem direto dele, sem
+passar pelo MT5. Os demais são buscados um de cada vez, na ordem do pedido,
+pela thread do MT5 — o lote ocupa uma única posição da fila por vez, sem
+disputar com as requisições interativas.
+"""
+
+import asyncio
+import json
+import logging
+from typing import List
+
+import numpy as np
+from fastapi import APIRouter, Body, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from .. import mt5_connector
+from ..encoding import rates_to_records
+from ..metrics import http_serialize_seconds, timed
+from ..mt5_executor import MT5ExecutorError, MT5TimeoutError
+from .history import fetch_cached_rates, fetch_history_range, parse_and_localize_time, validate_timeframe
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Limite de itens por lote
+MAX_BATCH_ITEMS = 50
+
+_serialize_seconds = http_serialize_seconds.labels("/api/history/batch")
+
+
+class HistoryBatchItem(BaseModel):
+    """Um intervalo de candles pedido no lote (mesmos parâmetros de `/api/history/{symbol}`)."""
+    symbol: str = Field(..., description="Símbolo do ativo, ex: WDO$N")
+    timeframe: str = Field(..., description="Timeframe (ex: M1, M5, H2, D1@09:00)")
+    start: str = Field(..., description="Data de início no formato ISO-8601")
+    end: str = Field(..., description="Data de fim no formato ISO-8601")
+
+
+class HistoryBatchRequest(BaseModel):
+    """Corpo da requisição do histórico em lote."""
+    items: List[HistoryBatchItem]
+
+
+def _encode_line(index: int, item: HistoryBatchItem, rates: np.ndarray, cached: bool, closed: bool) -> bytes:
+    line = {
+        "index": index, "symbol": item.symbol, "timeframe": item.timeframe,
+        "cached": cached, "closed": closed, "data": rates_to_records(rates),
+    }
+    return json.dumps(line, separators=(",", ":")).encode() + b"\n"
+
+
+def _error_line(index: int, item: HistoryBatchItem, status: int, detail: str) -> bytes:
+    line = {"index": index, "symbol": item.symbol, "timeframe": item.timeframe, "error": detail, "status": status}
+    return json.dumps(line, separators=(",", ":")).encode() + b"\n"
+
+
+def _exception_line(index: int, item: HistoryBatchItem, exc: Exception) -> bytes:
+    """Linha de erro de um item, com o status que a requisição individual teria."""
+    if isinstance(exc, HTTPException):
+        return _error_line(index, item, exc.status_code, exc.detail)
+    if isinstance(exc, MT5TimeoutError):
+        return _error_line(index, item, 504, "Tempo limite excedido ao consultar o MT5.")
+    if isinstance(exc, MT5ExecutorError):
+        return _error_line(index, item, 503, "Fila de chamadas ao MT5 cheia. Tente novamente.")
+    logger.exception("Erro ao buscar o item %d do lote (%s %s).", index, item.symbol, item.timeframe)
+    return _error_line(index, item, 500, f"Erro interno ao buscar dados: {exc}")
+
+
+async def _serve_cached(index: int, item: HistoryBatchItem, start_utc, end_utc, out: asyncio.Queue) -> bool:
+    """
+    Envia o item a partir do armazenamento local, se o intervalo já estiver fechado.
+
+    Returns:
+        bool: True se o item foi atendido (com dados ou erro)
+    """
+    try:
+        rates = await run_in_threadpool(fetch_cached_rates, item.symbol, item.timeframe, start_utc, end_utc)
+        if rates is None:
+            return False
+        line = await run_in_threadpool(timed, _serialize_seconds, _encode_line, index, item, rates, True, True)
+    except Exception as e:
+        line = _exception_line(index, item, e)
+    await out.put(line)
+    return True
+
+
+async def _fetch_in_order(entries: list, lookups: list, out: asyncio.Queue):
+    """
+    Busca na thread do MT5, um de cada vez e na ordem do pedido, os itens que o
+    armazenamento local não atendeu.
+    """
+    for (index, item, start_utc, end_utc), lookup in zip(entries, lookups):
+        if await lookup:
+            continue
+        try:
+            rates, closed = await mt5_connector.run_mt5(
+                fetch_history_range, item.symbol, item.timeframe, start_utc, end_utc)
+            line = await run_in_threadpool(timed, _serialize_seconds, _encode_line, index, item, rates, False, closed)
+        except Exception as e:
+            line = _exception_line(index, item, e)
+        await out.put(line)
+
+
+@router.post("/history/batch")
+async def get_history_batch(request: HistoryBatchRequest = Body(...)):
+    """
+    Fornece o histórico de vários (símbolo, timeframe, intervalo) em uma única resposta NDJSON.
+
+    Cada linha traz `index` (posição do item no pedido) e os candles no mesmo
+    formato de `/api/history/{symbol}`, ou `error`/`status` se o item falhou;
+    um item com erro não interrompe os demais. Parâmetros inválidos em
+    qualquer item rejeitam o lote inteiro com 400.
+
+    Example:
+        POST /api/history/batch
+        {"items": [{"symbol": "WDO$N", "timeframe": "M5", "start": "2025-10-16T09:00:00", "end": "2025-10-16T18:30:00"},
+                   {"symbol": "WIN$N", "timeframe": "M5", "start": "2025-10-16T09:00:00", "end": "2025-10-16T18:30:00"}]}
+    """
+    items = request.items
+    if not items:
+        raise HTTPException(status_code=400, detail="O lote deve ter ao menos um item.")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"O lote aceita no máximo {MAX_BATCH_ITEMS} itens.")
+
+    # Valida tudo antes de começar a transmitir: depois do status 200 não há como rejeitar o lote
+    parsed = []
+    for index, item in enumerate(items):
+        try:
+            validate_timeframe(item.timeframe)
+            start_utc = parse_and_localize_time(item.start)
+            end_utc = parse_and_localize_time(item.end)
+        except HTTPException as e:
+            raise HTTPException(status_code=400, detail=f"Item {index}: {e.detail}")
+        if start_utc >= end_utc:
+            raise HTTPException(status_code=400, detail=f"Item {index}: a data de início deve ser anterior à data de fim.")
+        parsed.append((index, item, start_utc, end_utc))
+
+    async def stream():
+        out: asyncio.Queue = asyncio.Queue()
+        # Consultas ao armazenamento local em paralelo; o MT5 só recebe os que faltarem
+        lookups = [asyncio.create_task(_serve_cached(*entry, out)) for entry in parsed]
+        worker = asyncio.create_task(_fetch_in_order(parsed, lookups, out))
+        try:
+            for _ in parsed:
+                yield await out.get()
+        finally:
+            # Cliente desconectado: não há por que continuar buscando
+            for task in (*lookups, worker):
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
@@ -1,5 +1,4 @@
 import json
-import asyncio
 from typing import List
 import sys
 import os
@@ -62,9 +61,8 @@ async def receive_and_broadcast_markers(data: MarkerData = Body(...)):
         }
         message_str = json.dumps(message_payload)
 
-        # Transmite a mensagem para todos os canais relevantes.
-        broadcast_tasks = [manager.broadcast(message_str, channel) for channel in relevant_channels]
-        await asyncio.gather(*broadcast_tasks)
+        # Transmite a mensagem para todos os canais relevantes (codificada uma única vez).
+        await manager.broadcast_many(message_str, relevant_channels, key="markers")
 
         return {"status": "ok", "message": f"Marcações para {data.symbol} transmitidas para {len(relevant_channels)} canais."}
 
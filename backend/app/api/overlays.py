@@ -0,0 +1,96 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from datetime import datetime
+from typing import Optional, Sequence
+import json
+import logging
+
+from .. import mt5_connector
+from ..http_cache import cached_response, is_not_modified, make_etag, not_modified_response
+from ..metrics import http_serialize_seconds, timed
+from ..overlays import SignalSource, compute_overlays, resolve_sources, sources_version
+from ..resample import TIMEFRAME_REGEX
+from ..signal_store import signal_store, signal_window
+from .history import fetch_history_range, validate_timeframe, parse_and_localize_time
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+_serialize_seconds = http_serialize_seconds.labels("/api/overlays/{symbol}")
+
+async def overlay_response(request: Request, symbol: str, timeframe: str, start_utc: datetime, end_utc: datetime,
+                           signals_from: int, signals_to: int, sources: Sequence[SignalSource],
+                           serialize_seconds, single: Optional[str] = None):
+    """
+    Monta a resposta das linhas de sinais (com ETag e cache) para o intervalo de candles informado.
+
+    Os candles são buscados uma única vez e todas as linhas são calculadas
+    juntas sobre eles.
+
+    Args:
+        signals_from, signals_to (int): Intervalo (epoch s) dos sinais considerados
+        sources (list): Fontes de sinais a calcular
+        serialize_seconds: Série do histograma de tempo de serialização do endpoint
+        single (str, opcional): Nome da fonte cuja lista de pontos é o corpo inteiro
+            (formato dos endpoints do Fluxo Compra); sem ele, o corpo é `{nome: pontos}`
+    """
+    # Relê apenas os arquivos de sinais novos ou alterados desde a última consulta
+    await run_in_threadpool(signal_store.refresh)
+
+    rates, _closed = await mt5_connector.run_mt5(fetch_history_range, symbol, timeframe, start_utc, end_utc)
+
+    # A versão dos arquivos de sinais entra no ETag junto com o último candle
+    etag = make_etag("overlays", single, symbol, timeframe, [source.name for source in sources],
+                     int(start_utc.timestamp()), int(end_utc.timestamp()), signals_from, signals_to,
+                     len(rates), rates[-1:].tobytes(), sources_version(symbol, sources))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, immutable=False)
+
+    # Cálculo vetorizado, mas proporcional ao intervalo: roda fora do event loop
+    overlays = await run_in_threadpool(compute_overlays, symbol, rates, sources, signals_from, signals_to)
+    for name, points in overlays.items():
+        if not points:
+            logger.debug("Nenhum sinal de %s para %s no período.", name, symbol)
+    payload = overlays[single] if single is not None else overlays
+    body = (await run_in_threadpool(timed, serialize_seconds, json.dumps, payload, separators=(",", ":"))).encode()
+    return await run_in_threadpool(cached_response, request, body, "application/json", etag)
+
+@router.get("/overlays/{symbol}")
+async def get_overlays(
+    request: Request,
+    symbol: str,
+    timeframe: str = Query(..., pattern=TIMEFRAME_REGEX, description="Timeframe (ex: M1, M5, H2, D1@09:00)"),
+    start: str = Query(..., description="Data de início no formato ISO-8601"),
+    end: str = Query(..., description="Data de fim no formato ISO-8601"),
+    names: Optional[str] = Query(None, description="Linhas separadas por vírgula (ex: fluxo_compra,fluxo_venda); padrão: todas")
+):
+    """
+    Fornece várias linhas de sinais (Fluxo Compra, Fluxo Venda...) em uma única requisição.
+
+    Os parâmetros seguem `/api/history/{symbol}`. Cada linha tem um ponto
+    `{time, value, active}` por candle; linhas sem sinais no intervalo vêm vazias.
+    Os sinais considerados são os dos dias locais inteiros do intervalo.
+
+    Example:
+        GET /api/overlays/WDO$N?timeframe=M5&start=2025-10-16T09:00:00&end=2025-10-16T18:30:00
+
+        {"fluxo_compra": [...], "fluxo_venda": [...]}
+    """
+    validate_timeframe(timeframe)
+    start_utc = parse_and_localize_time(start)
+    end_utc = parse_and_localize_time(end)
+
+    if start_utc >= end_utc:
+        raise HTTPException(status_code=400, detail="A data de início deve ser anterior à data de fim.")
+
+    requested = [name.strip() for name in names.split(",") if name.strip()] if names else []
+    try:
+        sources = resolve_sources(requested)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Linha de sinais desconhecida: {e.args[0]}")
+
+    # Sinais dos dias inteiros (como no endpoint diário e no fluxo em tempo real)
+    signals_from, signals_to = signal_window(start_utc, end_utc)
+    return await overlay_response(request, symbol, timeframe, start_utc, end_utc,
+                                  signals_from, signals_to, sources, _serialize_seconds)
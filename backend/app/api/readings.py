@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+
+from ..readings import readings_store
+
+router = APIRouter()
+
+@router.get("/readings")
+async def get_latest_readings():
+    """
+    Última leitura de cada série recebida do frontend PyQt (ver `app/readings.py`).
+
+    Example:
+        GET /api/readings
+
+        {"PrecoCompra": {"ts": 1760630400123, "value": 5432.5}, ...}
+    """
+    return readings_store.latest()
+
+@router.get("/readings/{name}")
+async def get_readings(
+    name: str,
+    since: Optional[int] = Query(None, description="Apenas leituras posteriores a este horário (epoch ms)"),
+    limit: Optional[int] = Query(None, ge=1, description="Apenas as N leituras mais recentes"),
+):
+    """
+    Leituras de uma série, em ordem de chegada.
+
+    Example:
+        GET /api/readings/PrecoCompra?since=1760630400000&limit=100
+
+        [{"ts": 1760630400123, "value": 5432.5}, ...]
+    """
+    readings = readings_store.get(name, since, limit)
+    if readings is None:
+        raise HTTPException(status_code=404, detail=f"Nenhuma leitura recebida para '{name}'.")
+    return [{"ts": ts, "value": value} for ts, value in readings]
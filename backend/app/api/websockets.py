@@ -1,123 +1,280 @@
 import asyncio
 import json
+import logging
 from collections import defaultdict
-from typing import Dict, List
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Union
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Query
 
-from .. import mt5_connector
-from ..mt5_connector import TIMEFRAME_MAP
-from .history import fetch_rates_from_mt5, parse_and_localize_time
-import pandas as pd
+from .. import metrics, mt5_connector
+from ..broadcast import ClientSession, encode_message
+from ..encoding import rates_to_records
+from ..market_pump import SymbolPump
+from ..tick_pump import TickPump
+from .history import fetch_rates_array
+from ..resample import TIMEFRAME_REGEX, parse_timeframe
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Prefixo dos canais de ticks (ex: "ticks:WDOV25"); não começa com o símbolo,
+# então as marcações, enviadas aos canais de candles, não chegam a esses clientes
+TICKS_CHANNEL_PREFIX = "ticks:"
+
+async def load_rates(symbol: str, timeframe: str, start_utc: datetime, end_utc: datetime):
+    """Busca candles na thread do MT5 (usado pela bomba para a linha do Fluxo Compra)."""
+    return await mt5_connector.run_mt5(fetch_rates_array, symbol, timeframe, start_utc, end_utc)
+
 class ConnectionManager:
     def __init__(self):
         # Dicionário para manter conexões ativas por canal (ex: "WDOV25-M5")
         self.active_connections: Dict[str, List[WebSocket]] = defaultdict(list)
-        # Dicionário para rastrear as tarefas de polling em background
-        self.polling_tasks: Dict[str, asyncio.Task] = {}
+        # Uma bomba de dados por símbolo, compartilhada por todos os timeframes
+        self.pumps: Dict[str, SymbolPump] = {}
+        # Dicionário para rastrear as tarefas das bombas em background (por símbolo)
+        self.pump_tasks: Dict[str, asyncio.Task] = {}
+        # Uma bomba de ticks por símbolo (canais "ticks:<símbolo>")
+        self.tick_pumps: Dict[str, TickPump] = {}
+        self.tick_pump_tasks: Dict[str, asyncio.Task] = {}
+        # Fila de saída e tarefa de escrita de cada cliente
+        self.sessions: Dict[WebSocket, ClientSession] = {}
 
-    async def connect(self, websocket: WebSocket, channel: str):
+    async def connect(self, websocket: WebSocket, channel: str, since: Optional[int] = None):
         await websocket.accept()
+        symbol, timeframe = channel.rsplit('-', 1)
+
+        session = ClientSession(websocket)
+        session.start()
+        self.sessions[websocket] = session
+
+        # Reconexão: envia os candles perdidos desde o último conhecido pelo cliente
+        # antes de entrar no canal, para que a atualização ao vivo venha depois.
+        if since is not None:
+            await self.send_gap_fill(websocket, symbol, timeframe, since)
+
         self.active_connections[channel].append(websocket)
-        print(f"Nova conexão no canal {channel}. Total de conexões: {len(self.active_connections[channel])}")
+        logger.info("Nova conexão no canal %s. Total de conexões: %d", channel, len(self.active_connections[channel]))
+
+        # Inscreve o timeframe na bomba do símbolo, criando-a se for a primeira
+        if symbol not in self.pumps:
+            logger.info("Iniciando bomba de dados para o símbolo %s...", symbol)
+            self.pumps[symbol] = SymbolPump(symbol, self.broadcast, load_rates=load_rates)
+            self.pump_tasks[symbol] = asyncio.create_task(self.pumps[symbol].run())
+        self.pumps[symbol].add_timeframe(timeframe)
 
-        # Inicia a tarefa de polling se for a primeira conexão no canal
-        if channel not in self.polling_tasks:
-            print(f"Iniciando tarefa de polling para o canal {channel}...")
-            self.polling_tasks[channel] = asyncio.create_task(self.poll_mt5_data(channel))
+        # A bomba só transmite mudanças: o novo cliente recebe o candle atual já conhecido
+        snapshot = self.pumps[symbol].snapshot_bar(timeframe)
+        if snapshot is not None:
+            session.offer(encode_message(json.dumps({"type": "candle", "data": snapshot}), key="candle"))
+
+    async def connect_ticks(self, websocket: WebSocket, symbol: str):
+        """
+        Conecta o cliente ao canal de ticks do símbolo, iniciando a bomba se necessário.
+        """
+        await websocket.accept()
+        session = ClientSession(websocket)
+        session.start()
+        self.sessions[websocket] = session
+
+        channel = f"{TICKS_CHANNEL_PREFIX}{symbol}"
+        self.active_connections[channel].append(websocket)
+        logger.info("Nova conexão no canal %s. Total de conexões: %d", channel, len(self.active_connections[channel]))
+
+        if symbol not in self.tick_pumps:
+            logger.info("Iniciando bomba de ticks para o símbolo %s...", symbol)
+            self.tick_pumps[symbol] = TickPump(symbol, self.broadcast, channel)
+            self.tick_pump_tasks[symbol] = asyncio.create_task(self.tick_pumps[symbol].run())
+
+    async def send_gap_fill(self, websocket: WebSocket, symbol: str, timeframe: str, since: int):
+        """
+        Envia ao cliente os candles com horário >= `since` (mensagem `gap_fill`).
+
+        Args:
+            websocket (WebSocket): Conexão do cliente
+            symbol (str): Símbolo do ativo
+            timeframe (str): Timeframe do canal
+            since (int): Horário (epoch s) do último candle conhecido pelo cliente
+        """
+        start_utc = datetime.fromtimestamp(since, tz=timezone.utc)
+        # O fim fica folgado no futuro: o horário do servidor do MT5 pode estar adiantado
+        end_utc = datetime.now(timezone.utc) + timedelta(days=1)
+        try:
+            rates = await mt5_connector.run_mt5(fetch_rates_array, symbol, timeframe, start_utc, end_utc)
+        except Exception as e:
+            logger.warning("Erro ao preencher lacuna do canal %s-%s: %s", symbol, timeframe, e)
+            return
+        rates = rates[rates['time'] >= since]
+        session = self.sessions.get(websocket)
+        if session is not None:
+            session.offer(encode_message(json.dumps({"type": "gap_fill", "data": rates_to_records(rates)})))
 
     def disconnect(self, websocket: WebSocket, channel: str):
+        session = self.sessions.pop(websocket, None)
+        if session is not None:
+            session.stop()
+
+        if websocket not in self.active_connections.get(channel, []):
+            # Cliente saiu antes de entrar no canal (ex: durante o preenchimento de lacuna)
+            return
         self.active_connections[channel].remove(websocket)
-        print(f"Conexão fechada no canal {channel}. Total de conexões: {len(self.active_connections[channel])}")
-
-        # Para a tarefa de polling se não houver mais ninguém no canal
-        if not self.active_connections[channel]:
-            print(f"Última conexão fechada. Parando tarefa de polling para o canal {channel}...")
-            if channel in self.polling_tasks:
-                self.polling_tasks[channel].cancel()
-                del self.polling_tasks[channel]
-
-    async def broadcast(self, message: str, channel: str):
-        # Cria uma cópia da lista para evitar problemas de concorrência se a lista for modificada
-        connections = self.active_connections[channel][:]
-        for connection in connections:
-            try:
-                await connection.send_text(message)
-            except WebSocketDisconnect:
-                # A desconexão será tratada no endpoint principal
-                pass
-            except Exception as e:
-                print(f"Erro ao enviar mensagem para o cliente no canal {channel}: {e}")
-
-    async def poll_mt5_data(self, channel: str):
-        symbol, timeframe_str = channel.split('-')
-        timeframe_mt5 = TIMEFRAME_MAP[timeframe_str]
-        last_candle_time = 0
+        logger.info("Conexão fechada no canal %s. Total de conexões: %d", channel, len(self.active_connections[channel]))
 
-        while True:
-            try:
-                mt5 = mt5_connector.get_mt5_instance()
-                if not mt5_connector.is_connected():
-                    await asyncio.sleep(5)
-                    continue
-
-                # Pega a vela mais recente
-                rates = mt5.copy_rates_from_pos(symbol, timeframe_mt5, 0, 1)
-
-                if rates is not None and len(rates) > 0:
-                    candle = rates[0]
-                    current_candle_time = int(candle['time'])
-
-                    if current_candle_time >= last_candle_time:
-                        last_candle_time = current_candle_time
-
-                        candle_data = {
-                            "time": current_candle_time,
-                            "open": candle['open'],
-                            "high": candle['high'],
-                            "low": candle['low'],
-                            "close": candle['close'],
-                        }
-
-                        message = json.dumps({"type": "candle", "data": candle_data})
-                        await self.broadcast(message, channel)
-
-                # Espera um tempo antes da próxima verificação.
-                # Um valor curto (1s) garante atualizações rápidas do candle atual.
-                await asyncio.sleep(1)
-
-            except asyncio.CancelledError:
-                print(f"Tarefa de polling para {channel} foi cancelada.")
-                break
-            except Exception as e:
-                print(f"Erro na tarefa de polling para {channel}: {e}")
-                await asyncio.sleep(10) # Espera um pouco mais em caso de erro
+        if self.active_connections[channel]:
+            return
+
+        del self.active_connections[channel]
+
+        if channel.startswith(TICKS_CHANNEL_PREFIX):
+            # Último cliente do canal de ticks: para a bomba de ticks do símbolo
+            symbol = channel[len(TICKS_CHANNEL_PREFIX):]
+            logger.info("Última conexão de ticks do símbolo %s fechada. Parando bomba de ticks...", symbol)
+            self.tick_pumps.pop(symbol, None)
+            task = self.tick_pump_tasks.pop(symbol, None)
+            if task is not None:
+                task.cancel()
+            return
+
+        # Último cliente do canal: remove o timeframe da bomba do símbolo
+        symbol, timeframe = channel.rsplit('-', 1)
+        pump = self.pumps.get(symbol)
+        if pump is None:
+            return
+        pump.remove_timeframe(timeframe)
+
+        # Para a bomba se nenhum timeframe do símbolo tiver mais inscritos
+        if not pump.timeframes:
+            logger.info("Última conexão do símbolo %s fechada. Parando bomba de dados...", symbol)
+            self.pump_tasks.pop(symbol).cancel()
+            del self.pumps[symbol]
+
+    async def broadcast(self, message: Union[str, bytes], channel: str, key: Optional[str] = None,
+                        seq: Optional[int] = None):
+        """
+        Transmite a mensagem para todos os clientes do canal.
+
+        A mensagem é codificada uma única vez e apenas enfileirada para cada
+        cliente; o envio fica a cargo da tarefa de escrita de cada um, então
+        um cliente lento não atrasa os demais nem a bomba de dados.
+
+        Args:
+            message: Mensagem JSON (str) ou já codificada (bytes)
+            channel (str): Canal de destino (ex: "WDOV25-M5")
+            key (str, opcional): Chave de coalescência para clientes atrasados (ex: "candle")
+            seq (int, opcional): Número da mensagem, se amostrada para medição de latência
+        """
+        await self.broadcast_many(message, [channel], key, seq)
+
+    async def broadcast_many(self, message: Union[str, bytes], channels: Iterable[str],
+                             key: Optional[str] = None, seq: Optional[int] = None):
+        """
+        Transmite a mesma mensagem para vários canais, codificando-a uma única vez.
+        """
+        outbound = encode_message(message, key, seq)
+        for channel in channels:
+            for connection in self.active_connections.get(channel, []):
+                session = self.sessions.get(connection)
+                if session is not None:
+                    session.offer(outbound)
+
+    def handle_client_message(self, websocket: WebSocket, text: str):
+        """
+        Trata mensagens enviadas pelo cliente (hoje, apenas `ack` de latência).
+        """
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(message, dict) or message.get("type") != "ack":
+            return
+        session = self.sessions.get(websocket)
+        if session is not None:
+            session.handle_ack(message)
+
+    def connection_counts(self) -> Dict[tuple, int]:
+        """Conexões ativas por canal (métrica `ws_connections`)."""
+        return {(channel,): len(connections) for channel, connections in self.active_connections.items()}
+
+    def pump_task_counts(self) -> Dict[tuple, int]:
+        """Tarefas de leitura em execução por tipo de bomba (métrica `ws_pump_tasks`)."""
+        return {
+            ("candles",): sum(not task.done() for task in self.pump_tasks.values()),
+            ("ticks",): sum(not task.done() for task in self.tick_pump_tasks.values()),
+        }
+
+    def pump_timeframe_counts(self) -> Dict[tuple, int]:
+        """Timeframes inscritos na bomba de cada símbolo (métrica `ws_pump_timeframes`)."""
+        return {(symbol,): len(pump.timeframes) for symbol, pump in self.pumps.items()}
+
+    def queue_depths(self, aggregate: Callable[[List[int]], int] = sum) -> Dict[tuple, int]:
+        """
+        Profundidade das filas de saída dos clientes, agregada por canal.
+
+        Args:
+            aggregate: Função aplicada à lista de profundidades do canal (ex: `sum`, `max`)
+        """
+        depths = {}
+        for channel, connections in self.active_connections.items():
+            queued = [self.sessions[c].queue_depth for c in connections if c in self.sessions]
+            depths[(channel,)] = aggregate(queued) if queued else 0
+        return depths
 
 # Instância global do gerenciador
 manager = ConnectionManager()
 
+# Métricas calculadas a partir do estado do gerenciador na leitura de `/metrics`
+metrics.callback("ws_connections", "Conexões WebSocket ativas por canal.",
+                 manager.connection_counts, ("channel",))
+metrics.callback("ws_pump_tasks", "Tarefas de leitura do MT5 em execução por tipo de bomba.",
+                 manager.pump_task_counts, ("kind",))
+metrics.callback("ws_pump_timeframes", "Timeframes inscritos na bomba de cada símbolo.",
+                 manager.pump_timeframe_counts, ("symbol",))
+metrics.callback("ws_queue_depth", "Mensagens nas filas de saída dos clientes, somadas por canal.",
+                 manager.queue_depths, ("channel",))
+metrics.callback("ws_queue_depth_max", "Maior fila de saída de um cliente, por canal.",
+                 lambda: manager.queue_depths(max), ("channel",))
+
 @router.websocket("/ws/candles")
 async def websocket_endpoint(
     websocket: WebSocket,
     symbol: str = Query(...),
-    timeframe: str = Query(..., regex="^(M1|M5|M15|M30|H1)$")
+    timeframe: str = Query(..., pattern=TIMEFRAME_REGEX),
+    since: Optional[int] = Query(None, description="Horário (epoch s) do último candle conhecido, para preencher a lacuna na reconexão")
 ):
-    if timeframe not in TIMEFRAME_MAP:
+    try:
+        parse_timeframe(timeframe)
+    except ValueError:
         # Idealmente, o cliente não deveria nem conseguir conectar com timeframe inválido,
         # mas é uma boa prática verificar.
         await websocket.close(code=4000, reason="Timeframe inválido")
         return
 
     channel = f"{symbol}-{timeframe}"
-    await manager.connect(websocket, channel)
 
     try:
+        await manager.connect(websocket, channel, since)
+        while True:
+            # Mantém a conexão viva, esperando por mensagens do cliente (confirmações
+            # de latência) ou até que o cliente se desconecte.
+            manager.handle_client_message(websocket, await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(websocket, channel)
+
+@router.websocket("/ws/ticks")
+async def websocket_ticks_endpoint(websocket: WebSocket, symbol: str = Query(...)):
+    """
+    Transmite os ticks do símbolo em lotes colunares (mensagem `ticks`).
+    """
+    channel = f"{TICKS_CHANNEL_PREFIX}{symbol}"
+
+    try:
+        await manager.connect_ticks(websocket, symbol)
         while True:
-            # Mantém a conexão viva, esperando por mensagens do cliente (se houver)
-            # ou até que o cliente se desconecte.
-            await websocket.receive_text()
+            manager.handle_client_message(websocket, await websocket.receive_text())
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket, channel)
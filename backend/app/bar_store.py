@@ -0,0 +1,275 @@
+"""
+Armazenamento local e persistente de candles do MT5.
+
+Mantém, por símbolo e timeframe, todos os candles já fechados em disco e
+consulta o MT5 apenas para o trecho posterior ao último candle fechado
+armazenado. Assim, recarregar uma semana de M1 custa uma chamada pequena
+ao MT5 em vez de trazer dezenas de milhares de linhas novamente.
+
+O módulo `mt5` é recebido como parâmetro em cada consulta, o que permite
+exercitar o armazenamento com um módulo `MetaTrader5` falso.
+"""
+
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Diretório padrão dos arquivos de candles (backend/data/bars), configurável via BARS_DIR
+BARS_DIR = os.getenv("BARS_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "bars"))
+
+# dtype dos candles retornados por `copy_rates_*` do MT5
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+
+
+@dataclass
+class _SeriesState:
+    """
+    Estado em memória de uma série (símbolo + timeframe).
+
+    Args:
+        closed: Candles fechados, ordenados por `time` (array estruturado do MT5)
+        covered_from: Início (epoch s) do intervalo já sincronizado com o MT5
+        tail: Último candle recebido, que pode ainda estar em formação
+    """
+    closed: Optional[np.ndarray] = None
+    covered_from: Optional[int] = None
+    tail: Optional[np.ndarray] = None
+
+
+class BarStore:
+    """
+    Armazenamento de candles por símbolo e timeframe com sincronização incremental.
+
+    Invariantes de cada série:
+    - `closed` é contíguo e cobre de `covered_from` até o último candle fechado.
+    - O último candle retornado pelo MT5 nunca é persistido, pois pode estar em
+      formação; ele é mantido apenas em memória como `tail`.
+    """
+
+    def __init__(self, base_dir: str = BARS_DIR):
+        self.base_dir = base_dir
+        self._series: Dict[Tuple[str, str], _SeriesState] = {}
+        self._lock = threading.Lock()
+
+    def get_rates(self, mt5, symbol: str, timeframe: str,
+                  start_utc: datetime, end_utc: datetime) -> np.ndarray:
+        """
+        Retorna os candles do intervalo, sincronizando com o MT5 apenas o necessário.
+
+        Args:
+            mt5: Módulo MetaTrader5 (ou um substituto com a mesma interface)
+            symbol (str): Símbolo do ativo (ex: 'WDOV25')
+            timeframe (str): Nome do timeframe (ex: 'M1'); resolve `mt5.TIMEFRAME_<nome>`
+            start_utc (datetime): Início do intervalo em UTC
+            end_utc (datetime): Fim do intervalo em UTC
+
+        Returns:
+            np.ndarray: Array estruturado do MT5 com os candles de `start_utc` a `end_utc`
+        """
+        timeframe_mt5 = getattr(mt5, f"TIMEFRAME_{timeframe}")
+        start_ts = int(start_utc.timestamp())
+        end_ts = int(end_utc.timestamp())
+
+        with self._lock:
+            state = self._load(symbol, timeframe)
+            changed = self._sync(mt5, state, symbol, timeframe_mt5, start_ts, end_ts)
+            if changed:
+                self._save(symbol, timeframe, state)
+            return self._slice(state, start_ts, end_ts)
+
+    def get_cached(self, symbol: str, timeframe: str,
+                   start_utc: datetime, end_utc: datetime) -> Optional[np.ndarray]:
+        """
+        Retorna os candles do intervalo sem consultar o MT5, se já estiverem armazenados.
+
+        Só atende intervalos inteiramente dentro do trecho coberto e anteriores
+        ao último candle fechado: nesse caso nenhum candle do intervalo pode
+        mais mudar e a resposta é a mesma que `get_rates` daria.
+
+        Returns:
+            np.ndarray ou None: Candles do intervalo, ou None se for preciso sincronizar com o MT5
+        """
+        start_ts = int(start_utc.timestamp())
+        end_ts = int(end_utc.timestamp())
+
+        with self._lock:
+            state = self._load(symbol, timeframe)
+            if state.closed is None or len(state.closed) == 0 or state.covered_from is None:
+                return None
+            times = state.closed['time']
+            if start_ts < state.covered_from or end_ts >= int(times[-1]):
+                return None
+            # O intervalo termina antes do último fechado: o candle em formação não entra
+            lo = np.searchsorted(times, start_ts, side='left')
+            hi = np.searchsorted(times, end_ts, side='right')
+            return state.closed[lo:hi]
+
+    def read_range(self, mt5, symbol: str, timeframe: str,
+                   start_utc: datetime, end_utc: datetime) -> Optional[np.ndarray]:
+        """
+        Retorna os candles do intervalo sem estender nem gravar a série armazenada.
+
+        Para leituras em janelas de intervalos grandes: o que já está fechado no
+        armazenamento vem dele (`get_cached`); o resto vem direto do MT5 e é
+        descartado após o uso, então a memória não cresce com o intervalo.
+
+        Returns:
+            np.ndarray ou None: Candles do intervalo, ou None em caso de erro do MT5
+        """
+        rates = self.get_cached(symbol, timeframe, start_utc, end_utc)
+        if rates is not None:
+            return rates
+        timeframe_mt5 = getattr(mt5, f"TIMEFRAME_{timeframe}")
+        return self._fetch(mt5, symbol, timeframe_mt5, int(start_utc.timestamp()), int(end_utc.timestamp()))
+
+    def last_closed_time(self, symbol: str, timeframe: str) -> Optional[int]:
+        """
+        Retorna o horário (epoch s) do último candle fechado armazenado, se houver.
+        """
+        with self._lock:
+            state = self._load(symbol, timeframe)
+            if state.closed is None or len(state.closed) == 0:
+                return None
+            return int(state.closed['time'][-1])
+
+    # --- Sincronização ---
+
+    def _sync(self, mt5, state: _SeriesState, symbol: str, timeframe_mt5: int,
+              start_ts: int, end_ts: int) -> bool:
+        """
+        Busca no MT5 apenas os trechos ainda não cobertos pela série.
+
+        Returns:
+            bool: True se o conjunto de candles fechados mudou
+        """
+        changed = False
+
+        if state.closed is None or len(state.closed) == 0:
+            rates = self._fetch(mt5, symbol, timeframe_mt5, start_ts, end_ts)
+            if rates is None:
+                return False
+            state.covered_from = start_ts
+            state.closed, state.tail = rates[:-1], rates[-1:]
+            return len(rates) > 0
+
+        # Trecho anterior ao início coberto: o intervalo é estendido para trás
+        # até encontrar a cobertura existente, mantendo a série contígua.
+        if start_ts < state.covered_from:
+            head = self._fetch(mt5, symbol, timeframe_mt5, start_ts, state.covered_from)
+            if head is not None:
+                first_time = state.closed['time'][0]
+                head = head[head['time'] < first_time]
+                if len(head) > 0:
+                    state.closed = np.concatenate([head, state.closed])
+                    changed = True
+                state.covered_from = start_ts
+
+        # Trecho posterior ao último candle fechado, incluindo o candle em formação.
+        last_closed = int(state.closed['time'][-1])
+        if end_ts > last_closed:
+            tail = self._fetch(mt5, symbol, timeframe_mt5, last_closed + 1, end_ts)
+            if tail is not None and len(tail) > 0:
+                if len(tail) > 1:
+                    state.closed = np.concatenate([state.closed, tail[:-1]])
+                    changed = True
+                state.tail = tail[-1:]
+
+        return changed
+
+    def _fetch(self, mt5, symbol: str, timeframe_mt5: int,
+               start_ts: int, end_ts: int) -> Optional[np.ndarray]:
+        """
+        Executa `copy_rates_range` no MT5 para o intervalo em epoch seconds.
+
+        Returns:
+            np.ndarray ou None: Candles retornados, ou None em caso de erro do MT5
+        """
+        start_dt = datetime.fromtimestamp(start_ts, tz=timezone.utc)
+        end_dt = datetime.fromtimestamp(end_ts, tz=timezone.utc)
+        logger.info(f"Sincronizando {symbol} com o MT5 de {start_dt} a {end_dt}...")
+
+        rates = mt5.copy_rates_range(symbol, timeframe_mt5, start_dt, end_dt)
+        if rates is None:
+            logger.warning(f"Falha ao buscar candles no MT5. Erro: {mt5.last_error()}")
+            return None
+        return rates
+
+    @staticmethod
+    def _slice(state: _SeriesState, start_ts: int, end_ts: int) -> np.ndarray:
+        """
+        Recorta os candles da série (fechados + candle em formação) no intervalo.
+
+        Recorta antes de juntar o candle em formação, para não copiar a série inteira a cada consulta.
+        """
+        parts = []
+        if state.closed is not None and len(state.closed) > 0:
+            times = state.closed['time']
+            lo = np.searchsorted(times, start_ts, side='left')
+            hi = np.searchsorted(times, end_ts, side='right')
+            if hi > lo:
+                parts.append(state.closed[lo:hi])
+        if state.tail is not None and len(state.tail) > 0 and start_ts <= state.tail['time'][0] <= end_ts:
+            parts.append(state.tail)
+        if not parts:
+            return np.empty(0, dtype=RATES_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    # --- Persistência ---
+
+    def _path(self, symbol: str, timeframe: str) -> str:
+        safe_symbol = re.sub(r"[^A-Za-z0-9$_.-]", "_", symbol)
+        return os.path.join(self.base_dir, f"{safe_symbol}_{timeframe}.npz")
+
+    def _load(self, symbol: str, timeframe: str) -> _SeriesState:
+        """
+        Retorna o estado da série, carregando-o do disco no primeiro acesso.
+        """
+        key = (symbol, timeframe)
+        state = self._series.get(key)
+        if state is not None:
+            return state
+
+        state = _SeriesState()
+        path = self._path(symbol, timeframe)
+        if os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    state.closed = data['rates']
+                    state.covered_from = int(data['covered_from'])
+                logger.info(f"Carregados {len(state.closed)} candles de {path}")
+            except Exception as e:
+                logger.error(f"Erro ao ler o armazenamento {path}, descartando: {e}")
+                state = _SeriesState()
+        self._series[key] = state
+        return state
+
+    def _save(self, symbol: str, timeframe: str, state: _SeriesState):
+        """
+        Grava os candles fechados de forma atômica (arquivo temporário + rename).
+        """
+        if state.closed is None or len(state.closed) == 0:
+            return
+        os.makedirs(self.base_dir, exist_ok=True)
+        path = self._path(symbol, timeframe)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, rates=state.closed, covered_from=np.int64(state.covered_from))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Erro ao gravar o armazenamento {path}: {e}")
+
+
+# Instância global do armazenamento de candles
+bar_store = BarStore()
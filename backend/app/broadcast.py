@@ -0,0 +1,182 @@
+"""
+Motor de broadcast para os clientes WebSocket.
+
+Cada mensagem é codificada uma única vez (bytes UTF-8 do JSON) e colocada
+na fila de saída de cada cliente. Cada cliente tem sua própria fila limitada
+e sua própria tarefa de escrita, então um cliente lento não atrasa os demais.
+
+Quando a fila de um cliente enche, a política configurada decide o que fazer:
+- `coalesce`: a mensagem substitui a pendente com a mesma chave (ex: o candle
+  em formação); sem mensagem equivalente, descarta a mais antiga;
+- `drop_oldest`: descarta a mensagem mais antiga da fila;
+- `disconnect`: desconecta o cliente lento.
+
+As mensagens são enviadas como frames binários; o cliente web decodifica o
+UTF-8 e faz o `JSON.parse`.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+from fastapi import WebSocket
+
+from . import latency
+from .metrics import ws_messages_coalesced_total, ws_messages_dropped_total, ws_slow_disconnects_total
+
+logger = logging.getLogger(__name__)
+
+POLICY_COALESCE = "coalesce"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_DISCONNECT = "disconnect"
+POLICIES = (POLICY_COALESCE, POLICY_DROP_OLDEST, POLICY_DISCONNECT)
+
+# Configuração via variáveis de ambiente
+CLIENT_QUEUE_SIZE = int(os.getenv("WS_CLIENT_QUEUE_SIZE", 64))
+SLOW_CLIENT_POLICY = os.getenv("WS_SLOW_CLIENT_POLICY", POLICY_COALESCE)
+
+# Quantos horários de envio de mensagens amostradas cada sessão guarda à espera do `ack`
+_MAX_PENDING_ACKS = 128
+
+
+@dataclass
+class OutboundMessage:
+    """
+    Mensagem já codificada, pronta para ser enviada a vários clientes.
+
+    Args:
+        payload: Bytes da mensagem (codificados uma única vez)
+        key: Chave de coalescência; mensagens com a mesma chave podem ser substituídas
+        seq: Número da mensagem, se amostrada para medição de latência
+        created_at: Momento da codificação (`time.perf_counter`), para medir a espera na fila
+    """
+    payload: bytes
+    key: Optional[str] = None
+    seq: Optional[int] = None
+    created_at: float = field(default_factory=time.perf_counter)
+
+
+def encode_message(message: Union[str, bytes], key: Optional[str] = None,
+                   seq: Optional[int] = None) -> OutboundMessage:
+    """Codifica a mensagem uma única vez para todos os destinatários."""
+    payload = message.encode() if isinstance(message, str) else message
+    return OutboundMessage(payload, key, seq)
+
+
+class ClientSession:
+    """
+    Fila de saída limitada e tarefa de escrita de um cliente WebSocket.
+
+    Args:
+        websocket: Conexão do cliente (já aceita)
+        max_queue: Tamanho máximo da fila de saída
+        policy: Política para cliente lento (`coalesce`, `drop_oldest` ou `disconnect`)
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue: int = CLIENT_QUEUE_SIZE,
+                 policy: str = SLOW_CLIENT_POLICY):
+        if policy not in POLICIES:
+            raise ValueError(f"Política inválida para cliente lento: '{policy}'. Use {', '.join(POLICIES)}.")
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.policy = policy
+        self.closed = False
+
+        self._queue: deque = deque()
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+        # Contadores de mensagens descartadas/substituídas por lentidão
+        self.dropped = 0
+        self.coalesced = 0
+        # Fim do envio (epoch ms) das mensagens amostradas, por `seq`, até o `ack` do cliente
+        self.sent_ms: OrderedDict = OrderedDict()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        """Inicia a tarefa de escrita do cliente."""
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def stop(self):
+        """Encerra a tarefa de escrita e descarta o que estiver na fila."""
+        self.closed = True
+        self._queue.clear()
+        if self._writer is not None:
+            self._writer.cancel()
+
+    def offer(self, message: OutboundMessage):
+        """
+        Enfileira a mensagem sem bloquear, aplicando a política quando necessário.
+        """
+        if self.closed:
+            return
+
+        if message.key is not None and self.policy == POLICY_COALESCE:
+            # Cliente atrasado: a versão mais nova substitui a pendente com a mesma chave.
+            # Ela vai para o fim da fila para não passar à frente de mensagens
+            # enfileiradas depois (ex: `bar_closed` do candle anterior).
+            for index, queued in enumerate(self._queue):
+                if queued.key == message.key:
+                    del self._queue[index]
+                    self._queue.append(message)
+                    self.coalesced += 1
+                    ws_messages_coalesced_total.inc()
+                    self._ready.set()
+                    return
+
+        if len(self._queue) >= self.max_queue:
+            if self.policy == POLICY_DISCONNECT:
+                logger.warning("Cliente lento desconectado: fila de saída cheia.")
+                ws_slow_disconnects_total.inc()
+                self.stop()
+                asyncio.create_task(self._close())
+                return
+            self._queue.popleft()
+            self.dropped += 1
+            ws_messages_dropped_total.inc()
+
+        self._queue.append(message)
+        self._ready.set()
+
+    async def _write_loop(self):
+        try:
+            while True:
+                while not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                message = self._queue.popleft()
+                started = time.perf_counter()
+                await self.websocket.send_bytes(message.payload)
+                finished = time.perf_counter()
+                latency.observe(latency.STAGE_QUEUE, started - message.created_at)
+                latency.observe(latency.STAGE_SEND, finished - started)
+                if message.seq is not None:
+                    self._remember_sent(message.seq)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            # Erros de envio (ex: cliente desconectado) são tratados no endpoint principal
+            logger.debug(f"Escrita para o cliente encerrada: {e}")
+            self.closed = True
+
+    def _remember_sent(self, seq: int):
+        self.sent_ms[seq] = latency.now_ms()
+        if len(self.sent_ms) > _MAX_PENDING_ACKS:
+            self.sent_ms.popitem(last=False)
+
+    def handle_ack(self, ack: dict):
+        """Registra as latências informadas pelo cliente para uma mensagem amostrada."""
+        latency.record_ack(ack, self.sent_ms.pop(ack.get("seq"), None))
+
+    async def _close(self):
+        try:
+            await self.websocket.close(code=1013, reason="Cliente lento")
+        except Exception:
+            pass
@@ -0,0 +1,80 @@
+"""
+Codificação das respostas de candles.
+
+Além do JSON (lista de objetos OHLC do Lightweight Charts), os candles
+podem ser enviados em formato colunar binário, montado diretamente do
+array estruturado do MT5 sem criar objetos Python por linha.
+
+Formato colunar (little-endian):
+
+    Cabeçalho (16 bytes)
+        magic     4 bytes   b"OHLC"
+        version   uint16    1
+        columns   uint16    5
+        count     uint32    número de candles
+        reserved  uint32    0
+    Colunas (count elementos cada, nesta ordem)
+        time      int64     epoch seconds
+        open      float64
+        high      float64
+        low       float64
+        close     float64
+
+No modo streaming de `/api/history` (`stream=true`) o corpo é uma sequência
+de blocos nesse formato, um por janela, concatenados.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+COLUMNAR_MEDIA_TYPE = "application/x-ohlc-columnar"
+
+_MAGIC = b"OHLC"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHII")
+_PRICE_COLUMNS = ("open", "high", "low", "close")
+
+
+def rates_to_records(rates: np.ndarray) -> list:
+    """
+    Converte candles para a lista de objetos OHLC do Lightweight Charts.
+
+    Args:
+        rates (np.ndarray): Array estruturado do MT5
+
+    Returns:
+        list: Dicionários com time, open, high, low e close
+    """
+    columns = [rates['time'].astype(np.int64).tolist()]
+    columns += [rates[name].tolist() for name in _PRICE_COLUMNS]
+    return [
+        {"time": t, "open": o, "high": h, "low": l, "close": c}
+        for t, o, h, l, c in zip(*columns)
+    ]
+
+
+def encode_json(rates: np.ndarray) -> bytes:
+    """
+    Codifica candles como JSON compacto (lista de objetos OHLC).
+    """
+    return json.dumps(rates_to_records(rates), separators=(",", ":")).encode()
+
+
+def encode_columnar(rates: np.ndarray) -> bytes:
+    """
+    Codifica candles no formato colunar binário descrito no módulo.
+
+    Args:
+        rates (np.ndarray): Array estruturado do MT5
+
+    Returns:
+        bytes: Cabeçalho seguido das colunas time, open, high, low e close
+    """
+    parts = [
+        _HEADER.pack(_MAGIC, _VERSION, 1 + len(_PRICE_COLUMNS), len(rates), 0),
+        np.ascontiguousarray(rates['time'], dtype='<i8').tobytes(),
+    ]
+    parts += [np.ascontiguousarray(rates[name], dtype='<f8').tobytes() for name in _PRICE_COLUMNS]
+    return b"".join(parts)
@@ -0,0 +1,139 @@
+"""
+Atualização ao vivo da linha do Fluxo Compra nos canais de candles.
+
+Para cada canal (símbolo + timeframe) com arquivos de sinais, a bomba de
+dados mantém um `FluxoCompraTracker` com os candles do pregão atual. A cada
+ciclo ele incorpora o candle em formação e os sinais novos (lidos por
+acréscimo em `signal_store`), recalcula a linha do dia com o mesmo cálculo
+do endpoint HTTP (`signal_overlay`, fonte `FLUXO_COMPRA`) e publica apenas os pontos que
+mudaram desde o último envio:
+
+    {"type": "fluxo_compra", "data": [{"time": ..., "value": ..., "active": true}, ...]}
+
+Normalmente isso é só o ponto do candle atual; quando um sinal chega para um
+candle anterior, a mensagem traz a partir do primeiro ponto alterado.
+"""
+
+from typing import Awaitable, Callable, List, Optional
+
+import numpy as np
+
+from .overlays import FLUXO_COMPRA, source_signals, sources_version
+from .signal_overlay import compute_signal_overlay
+from .signal_store import local_day, session_bounds
+
+# Corrotina que busca os candles do timeframe: (símbolo, timeframe, início UTC, fim UTC)
+RatesLoader = Callable[..., Awaitable[np.ndarray]]
+
+
+class FluxoCompraTracker:
+    """
+    Linha do Fluxo Compra de um canal, recalculada a partir do candle ao vivo.
+
+    Args:
+        symbol: Símbolo do ativo (ex: 'WDO$N')
+        timeframe: Timeframe do canal (ex: 'M5')
+        load_rates: Corrotina que busca os candles do pregão (carga inicial e troca de dia)
+    """
+
+    def __init__(self, symbol: str, timeframe: str, load_rates: RatesLoader):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.load_rates = load_rates
+        self._day = None
+        self._session = (0, 0)
+        self._signal_range = (0, 0)
+        self._times = np.empty(0, dtype=np.int64)
+        self._closes = np.empty(0, dtype=np.float64)
+        self._signals_version: Optional[str] = None
+        self._signal_times = np.empty(0, dtype=np.int64)
+        self._signal_is_on = np.empty(0, dtype=bool)
+        # Linha já enviada (valores e estados), para transmitir apenas mudanças
+        self._sent_values = np.empty(0, dtype=np.float64)
+        self._sent_active = np.empty(0, dtype=bool)
+
+    async def _load_day(self, bar_time: int):
+        """Carrega os candles do pregão do dia de `bar_time`."""
+        day = local_day(bar_time)
+        session_start, session_end, signals_from, signals_to = session_bounds(day)
+        rates = await self.load_rates(self.symbol, self.timeframe, session_start, session_end)
+        self._day = day
+        self._session = (int(session_start.timestamp()), int(session_end.timestamp()))
+        self._signal_range = (signals_from, signals_to)
+        self._times = rates['time'].astype(np.int64)
+        self._closes = rates['close'].astype(np.float64)
+        # O cliente recebeu a linha do dia pelo HTTP: a carga em si não é transmitida
+        self._signals_version = None
+        self._refresh_signals()
+        self._sent_values, self._sent_active = self._compute()
+
+    def _refresh_signals(self) -> bool:
+        """Atualiza os sinais do dia se os arquivos mudaram. Retorna True se mudaram."""
+        version = sources_version(self.symbol, [FLUXO_COMPRA])[0]
+        if version == self._signals_version:
+            return False
+        self._signals_version = version
+        signals = source_signals(FLUXO_COMPRA, self.symbol, *self._signal_range)
+        self._signal_times, self._signal_is_on = signals.times, signals.is_on
+        return True
+
+    def _apply_bar(self, bar: dict) -> bool:
+        """Incorpora o candle em formação. Retorna True se a série mudou."""
+        if len(self._times) > 0 and bar["time"] < self._times[-1]:
+            return False
+        if len(self._times) > 0 and bar["time"] == self._times[-1]:
+            if self._closes[-1] == bar["close"]:
+                return False
+            self._closes[-1] = bar["close"]
+        else:
+            self._times = np.r_[self._times, bar["time"]]
+            self._closes = np.r_[self._closes, bar["close"]]
+        return True
+
+    def _compute(self):
+        return compute_signal_overlay(self._times, self._closes, self._signal_times, self._signal_is_on)
+
+    async def update(self, bar: Optional[dict]) -> Optional[dict]:
+        """
+        Incorpora o candle atual e os sinais novos e monta a mensagem com os pontos alterados.
+
+        Args:
+            bar (dict, opcional): Candle atual do canal (time/open/high/low/close)
+
+        Returns:
+            dict ou None: Mensagem `fluxo_compra`, ou None se nada mudou
+        """
+        if bar is None or sources_version(self.symbol, [FLUXO_COMPRA])[0] is None:
+            return None
+        if self._day is None or local_day(bar["time"]) != self._day:
+            await self._load_day(bar["time"])
+
+        session_start, session_end = self._session
+        in_session = session_start <= bar["time"] <= session_end
+        bar_changed = self._apply_bar(bar) if in_session else False
+        signals_changed = self._refresh_signals()
+        if not (bar_changed or signals_changed) or len(self._times) == 0:
+            return None
+
+        values, active = self._compute()
+        first = self._first_change(values, active)
+        self._sent_values, self._sent_active = values, active
+        if first is None:
+            return None
+        return {"type": "fluxo_compra", "data": self._points(first, values, active)}
+
+    def _first_change(self, values: np.ndarray, active: np.ndarray) -> Optional[int]:
+        """Índice do primeiro ponto diferente do último envio (None se não houver)."""
+        sent = len(self._sent_values)
+        common = min(sent, len(values))
+        differs = (values[:common] != self._sent_values[:common]) | (active[:common] != self._sent_active[:common])
+        changed = np.flatnonzero(differs)
+        if len(changed) > 0:
+            return int(changed[0])
+        return common if len(values) > common else None
+
+    def _points(self, first: int, values: np.ndarray, active: np.ndarray) -> List[dict]:
+        return [
+            {'time': t, 'value': v, 'active': a}
+            for t, v, a in zip(self._times[first:].tolist(), values[first:].tolist(), active[first:].tolist())
+        ]
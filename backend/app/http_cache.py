@@ -0,0 +1,160 @@
+"""
+Respostas HTTP comprimidas e cacheáveis.
+
+Monta as respostas dos endpoints de histórico com:
+- ETag forte, derivado do conteúdo que define a resposta (ex: último candle);
+- `304 Not Modified` quando o cliente já tem a mesma versão (If-None-Match);
+- `Cache-Control` imutável para intervalos totalmente fechados e
+  revalidação (`no-cache`) para intervalos que ainda podem mudar;
+- compressão brotli (se o pacote `brotli` estiver instalado) ou gzip.
+
+A codificação faz parte do ETag (sufixo `-br`/`-gz`), já que cada
+codificação é uma representação diferente; na comparação o sufixo é ignorado.
+"""
+
+import gzip
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # Dependência opcional: sem ela, apenas gzip
+    brotli = None
+
+# Respostas menores que isso não compensam a compressão
+MIN_COMPRESS_SIZE = 1024
+
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDATE = "no-cache"
+
+_SUFFIXES = {"br": "-br", "gzip": "-gz"}
+
+
+def make_etag(*parts) -> str:
+    """
+    Gera um ETag forte a partir das partes que determinam o conteúdo.
+
+    Args:
+        *parts: Valores (str, bytes ou qualquer objeto com `str`) que definem a resposta
+
+    Returns:
+        str: ETag entre aspas (ex: '"3f2a..."')
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\x00")
+    return f'"{digest.hexdigest()}"'
+
+
+def _strip_etag(etag: str) -> str:
+    """Remove aspas, prefixo fraco e sufixo de codificação para comparação."""
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    etag = etag.strip('"')
+    for suffix in _SUFFIXES.values():
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)]
+    return etag
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Verifica se o If-None-Match da requisição corresponde ao ETag.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = _strip_etag(etag)
+    return any(_strip_etag(candidate) == wanted for candidate in header.split(","))
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Lê o Accept-Encoding como {codificação: q} (ex: "gzip;q=0.5, br" -> {"gzip": 0.5, "br": 1.0}).
+
+    Um q inválido descarta a codificação, como se não tivesse sido listada.
+    """
+    accepted = {}
+    for item in header.lower().split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = None
+        if q is not None:
+            accepted[coding] = q
+    return accepted
+
+
+def _choose_encoding(request: Request) -> Optional[str]:
+    """
+    Codificação da resposta: a de maior q entre as disponíveis (brotli no empate); q=0 recusa.
+
+    `*` vale para as codificações não listadas.
+    """
+    accepted = _parse_accept_encoding(request.headers.get("accept-encoding", ""))
+    available = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for coding in available:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def not_modified_response(etag: str, immutable: bool) -> Response:
+    """Resposta 304 com os mesmos cabeçalhos de cache da resposta completa."""
+    return Response(status_code=304, headers={
+        "ETag": etag,
+        "Cache-Control": CACHE_IMMUTABLE if immutable else CACHE_REVALIDATE,
+        "Vary": "Accept, Accept-Encoding",
+    })
+
+
+def cached_response(request: Request, body: bytes, media_type: str, etag: str,
+                    immutable: bool = False) -> Response:
+    """
+    Monta a resposta com ETag, Cache-Control e compressão.
+
+    Args:
+        request (Request): Requisição original (If-None-Match, Accept-Encoding)
+        body (bytes): Corpo já codificado
+        media_type (str): Content-Type da resposta
+        etag (str): ETag forte gerado por `make_etag`
+        immutable (bool): True se o conteúdo nunca mais vai mudar (intervalo fechado)
+
+    Returns:
+        Response: 304 se o cliente já tiver esta versão; caso contrário, a resposta completa
+    """
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, immutable)
+
+    headers = {
+        "Cache-Control": CACHE_IMMUTABLE if immutable else CACHE_REVALIDATE,
+        "Vary": "Accept, Accept-Encoding",
+    }
+
+    encoding = _choose_encoding(request) if len(body) >= MIN_COMPRESS_SIZE else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=4)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=5)
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        etag = etag[:-1] + _SUFFIXES[encoding] + '"'
+    headers["ETag"] = etag
+
+    return Response(content=body, media_type=media_type, headers=headers)
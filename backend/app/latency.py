@@ -0,0 +1,123 @@
+"""
+Medição da latência do fluxo em tempo real, do MT5 até o gráfico.
+
+A cada `STREAM_SAMPLE_EVERY` mensagens de um canal, a bomba numera a
+mensagem (`seq`) e inclui os horários de origem e da bomba:
+
+    {"type": "candle", "data": {...}, "seq": 120, "ts": {"src": 1760616000123.4, "pump": 1760616000124.1}}
+
+- `src`: origem do dado: o início da leitura do MT5 (antes da fila do
+  executor), no relógio local. Os horários dos ticks e candles são do
+  servidor da corretora (ou do histórico, em replay) e não são comparáveis
+  com os das demais etapas;
+- `pump`: mensagem montada pela bomba.
+
+A duração de cada leitura do MT5 (fila do executor + chamada) é publicada
+à parte, na etapa `source_read`.
+
+A serialização e o envio são medidos no servidor (o payload é codificado
+uma única vez e compartilhado entre os clientes, então não pode carregar o
+horário de envio de cada um); o horário de fim do envio das mensagens
+amostradas fica guardado na sessão do cliente. O cliente web responde
+pelo mesmo socket com:
+
+    {"type": "ack", "seq": 120, "ts": {...}, "recv": ..., "render": ...}
+
+com os horários em que recebeu a mensagem e em que terminou de atualizar o
+gráfico. Os horários são epoch em milissegundos; as etapas que comparam
+relógios do servidor e do navegador supõem a mesma máquina (ou relógios
+sincronizados). Todas as etapas vão para o histograma `stream_stage_seconds`.
+"""
+
+import json
+import os
+import time
+from typing import Optional
+
+from .metrics import stream_stage_seconds
+
+SAMPLE_EVERY = int(os.getenv("STREAM_SAMPLE_EVERY", 10))
+
+# Etapas publicadas (rótulo `stage`)
+STAGE_SOURCE_READ = "source_read"
+STAGE_SOURCE_TO_PUMP = "source_to_pump"
+STAGE_SERIALIZE = "serialize"
+STAGE_QUEUE = "queue"
+STAGE_SEND = "send"
+STAGE_NETWORK = "network"
+STAGE_CLIENT_RENDER = "client_render"
+STAGE_END_TO_END = "end_to_end"
+
+_observers = {
+    stage: stream_stage_seconds.labels(stage)
+    for stage in (STAGE_SOURCE_READ, STAGE_SOURCE_TO_PUMP, STAGE_SERIALIZE, STAGE_QUEUE, STAGE_SEND,
+                  STAGE_NETWORK, STAGE_CLIENT_RENDER, STAGE_END_TO_END)
+}
+
+
+def now_ms() -> float:
+    """Horário atual em epoch milissegundos."""
+    return time.time() * 1000
+
+
+def observe(stage: str, seconds: float):
+    """Registra a duração de uma etapa (valores negativos, por diferença de relógio, são ignorados)."""
+    if seconds >= 0:
+        _observers[stage].observe(seconds)
+
+
+class LatencySampler:
+    """
+    Numera e carimba uma a cada `every` mensagens de um canal.
+
+    Args:
+        every: Intervalo de amostragem (0 desativa)
+    """
+
+    def __init__(self, every: int = SAMPLE_EVERY):
+        self.every = every
+        self._count = 0
+
+    def stamp(self, message: dict, source_ms: float) -> Optional[int]:
+        """
+        Inclui `seq` e `ts` na mensagem se ela for amostrada.
+
+        Returns:
+            int ou None: Número da mensagem amostrada
+        """
+        self._count += 1
+        if self.every <= 0 or self._count % self.every:
+            return None
+        pump_ms = now_ms()
+        message["seq"] = self._count
+        message["ts"] = {"src": round(source_ms, 3), "pump": round(pump_ms, 3)}
+        observe(STAGE_SOURCE_TO_PUMP, (pump_ms - source_ms) / 1000)
+        return self._count
+
+
+def serialize(message: dict) -> str:
+    """Serializa a mensagem em JSON compacto, medindo o tempo gasto."""
+    started = time.perf_counter()
+    text = json.dumps(message, separators=(",", ":"))
+    observe(STAGE_SERIALIZE, time.perf_counter() - started)
+    return text
+
+
+def record_ack(ack: dict, sent_ms: Optional[float]):
+    """
+    Registra as etapas medidas no cliente a partir de uma confirmação (`ack`).
+
+    Args:
+        ack (dict): Mensagem `ack` recebida do cliente
+        sent_ms (float, opcional): Fim do envio da mensagem para este cliente
+    """
+    try:
+        recv = float(ack["recv"])
+        render = float(ack["render"])
+        source = float(ack["ts"]["src"])
+    except (KeyError, TypeError, ValueError):
+        return
+    if sent_ms is not None:
+        observe(STAGE_NETWORK, (recv - sent_ms) / 1000)
+    observe(STAGE_CLIENT_RENDER, (render - recv) / 1000)
+    observe(STAGE_END_TO_END, (render - source) / 1000)
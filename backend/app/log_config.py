@@ -0,0 +1,177 @@
+"""
+Configuração de logging assíncrono do backend.
+
+Os módulos apenas enfileiram os registros (`QueueHandler`); uma thread em
+segundo plano (`QueueListener`) grava no arquivo com rotação e no console.
+Assim, escrita em disco e no terminal nunca acontece no event loop nem na
+thread do MT5.
+
+Os registros do arquivo são JSON (um objeto por linha):
+
+    {"ts": "2025-10-16T12:00:00.123Z", "level": "INFO", "logger": "app.bar_store", "msg": "...", ...}
+
+Configuração via variáveis de ambiente:
+- `LOG_LEVEL` (padrão INFO);
+- `LOG_FILE` (padrão backend.log; vazio desativa o arquivo);
+- `LOG_MAX_BYTES` e `LOG_BACKUP_COUNT`: tamanho de cada arquivo e quantos antigos manter;
+- `LOG_QUEUE_SIZE`: limite da fila; com a fila cheia, novos registros são descartados
+  (e contados) em vez de bloquear quem registra;
+- `LOG_CONSOLE_FORMAT`: `text` (padrão) ou `json`.
+
+Caminhos quentes (bombas de dados, envio aos clientes) devem usar
+`RateLimitedLog` para que uma sequência de erros repetidos não inunde a fila.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from .metrics import counter
+
+log_records_dropped_total = counter(
+    "log_records_dropped_total", "Registros de log descartados por fila cheia.")
+log_records_suppressed_total = counter(
+    "log_records_suppressed_total", "Registros de log suprimidos pela limitação de taxa.")
+
+# Atributos padrão de `LogRecord`; os demais (passados em `extra`) vão para o JSON
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como um objeto JSON em uma única linha."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds")
+                  .replace("+00:00", "Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """`QueueHandler` que descarta (e conta) registros quando a fila está cheia."""
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped_total.inc()
+
+
+def configure_logging():
+    """
+    Instala o logging assíncrono no logger raiz (chamadas repetidas são ignoradas).
+
+    Os handlers de arquivo e console rodam na thread do `QueueListener`,
+    encerrada por `shutdown_logging` (também registrada no `atexit`).
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+
+        handlers = []
+        log_file = os.getenv("LOG_FILE", "backend.log")
+        if log_file:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+                backupCount=int(os.getenv("LOG_BACKUP_COUNT", 5)),
+                encoding="utf-8",
+            )
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+
+        console = logging.StreamHandler()
+        if os.getenv("LOG_CONSOLE_FORMAT", "text").lower() == "json":
+            console.setFormatter(JsonFormatter())
+        else:
+            console.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        handlers.append(console)
+
+        log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", 10000)))
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_DroppingQueueHandler(log_queue))
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Grava os registros pendentes e encerra a thread de escrita."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+class RateLimitedLog:
+    """
+    Limita a frequência de registros repetidos (ex: o mesmo erro a cada ciclo de uma bomba).
+
+    Cada chave registra no máximo uma vez por `interval` segundos; o registro
+    seguinte informa quantos foram suprimidos nesse meio tempo.
+
+    Args:
+        logger: Logger de destino
+        interval: Intervalo mínimo, em segundos, entre registros da mesma chave
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float = 10.0):
+        self.logger = logger
+        self.interval = interval
+        # Chave -> (último registro emitido, registros suprimidos desde então)
+        self._state: Dict[str, Tuple[float, int]] = {}
+
+    def log(self, level: int, key: str, msg: str, *args, **kwargs) -> bool:
+        """
+        Registra a mensagem se a chave não foi registrada no último intervalo.
+
+        Returns:
+            bool: True se o registro foi emitido
+        """
+        if not self.logger.isEnabledFor(level):
+            return False
+        now = time.monotonic()
+        last, suppressed = self._state.get(key, (None, 0))
+        if last is not None and now - last < self.interval:
+            self._state[key] = (last, suppressed + 1)
+            log_records_suppressed_total.inc()
+            return False
+        self._state[key] = (now, 0)
+        if suppressed:
+            msg = f"{msg} ({suppressed} registro(s) semelhante(s) suprimido(s))"
+        self.logger.log(level, msg, *args, **kwargs)
+        return True
+
+    def warning(self, key: str, msg: str, *args, **kwargs) -> bool:
+        return self.log(logging.WARNING, key, msg, *args, **kwargs)
+
+    def error(self, key: str, msg: str, *args, **kwargs) -> bool:
+        return self.log(logging.ERROR, key, msg, *args, **kwargs)
@@ -1,10 +1,19 @@
+import logging
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from contextlib import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from . import mt5_connector
-from .api import history, markers, websockets, fluxo_compra
+from .log_config import configure_logging, shutdown_logging
+from .metrics import MetricsMiddleware, registry
+from .mt5_executor import MT5QueueFullError, MT5TimeoutError
+from .readings import readings_server
+from .api import history, history_batch, markers, websockets, fluxo_compra, overlays, readings
+
+# Logging em fila, gravado por uma thread em segundo plano (ver `log_config`)
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # Constrói o caminho para o diretório frontend_web
 static_file_path = os.path.join(os.path.dirname(__file__), "..", "..", "frontend_web")
@@ -13,20 +22,38 @@ static_file_path = os.path.join(os.path.dirname(__file__), "..", "..", "frontend
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("Iniciando a aplicação...")
+    logger.info("Iniciando a aplicação...")
     await mt5_connector.initialize_mt5()
+    # Leituras das regiões capturadas pelo frontend PyQt (socket local)
+    await readings_server.start()
     yield
     # Shutdown
-    print("Encerrando a aplicação...")
-    mt5_connector.shutdown_mt5()
+    logger.info("Encerrando a aplicação...")
+    await readings_server.stop()
+    await mt5_connector.shutdown_mt5()
+    shutdown_logging()
 
 app = FastAPI(lifespan=lifespan)
 
+# Duração, status e bytes enviados de cada requisição HTTP (publicados em /metrics)
+app.add_middleware(MetricsMiddleware)
+
 # Inclui os roteadores da API
 app.include_router(history.router, prefix="/api", tags=["History"])
+app.include_router(history_batch.router, prefix="/api", tags=["History"])
 app.include_router(markers.router, prefix="/api", tags=["Markers"])
 app.include_router(websockets.router, tags=["WebSockets"])
 app.include_router(fluxo_compra.router, prefix="/api", tags=["FluxoCompra"])
+app.include_router(overlays.router, prefix="/api", tags=["Overlays"])
+app.include_router(readings.router, prefix="/api", tags=["Readings"])
+
+@app.exception_handler(MT5QueueFullError)
+async def mt5_queue_full_handler(request: Request, exc: MT5QueueFullError):
+    return JSONResponse(status_code=503, content={"detail": "Fila de chamadas ao MT5 cheia. Tente novamente."})
+
+@app.exception_handler(MT5TimeoutError)
+async def mt5_timeout_handler(request: Request, exc: MT5TimeoutError):
+    return JSONResponse(status_code=504, content={"detail": "Tempo limite excedido ao consultar o MT5."})
 
 @app.get("/health")
 def read_root():
@@ -34,7 +61,16 @@ def read_root():
 
 @app.get("/mt5-status")
 def get_mt5_status():
-    return {"connected": mt5_connector.is_connected()}
+    return {
+        "connected": mt5_connector.is_connected(),
+        "provider": mt5_connector.provider_name(),
+        "executor": mt5_connector.executor.stats(),
+    }
+
+@app.get("/metrics")
+def get_metrics():
+    # Formato de texto do Prometheus
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 # Endpoint para servir o index.html
 @app.get("/")
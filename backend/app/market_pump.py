@@ -0,0 +1,241 @@
+"""
+Bomba de dados em tempo real compartilhada por símbolo.
+
+Cada símbolo tem uma única tarefa que lê os candles M1 do MT5 uma vez por
+ciclo e monta localmente todos os timeframes inscritos (M5, H2, D1@09:00...)
+com o mesmo reamostrador usado pelo histórico.
+Assim, o volume de chamadas ao MT5 cresce com o número de símbolos e não
+com o número de canais `symbol-timeframe`.
+
+Apenas mudanças são transmitidas: para cada canal a bomba guarda o último
+candle enviado e só publica `candle` quando o OHLC muda. Quando um período
+termina, publica `bar_closed` com os valores finais do candle anterior.
+
+Com um carregador de candles (`load_rates`), a bomba também publica as
+mudanças da linha do Fluxo Compra de cada canal (ver `fluxo_stream`).
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from . import latency, mt5_connector
+from .fluxo_stream import FluxoCompraTracker, RatesLoader
+from .log_config import RateLimitedLog
+from .resample import parse_timeframe, resample_rates
+from .signal_store import signal_store
+
+logger = logging.getLogger(__name__)
+# Erros repetidos a cada ciclo (ex: MT5 fora do ar) são registrados no máximo a cada 30 s
+_errors = RateLimitedLog(logger, interval=30.0)
+
+# Intervalo máximo entre leituras para que 2 candles M1 bastem para não perder dados
+_MAX_INCREMENTAL_GAP = 60.0
+
+
+class SymbolPump:
+    """
+    Lê os candles M1 de um símbolo e distribui os timeframes inscritos.
+
+    Args:
+        symbol: Símbolo do ativo (ex: 'WDOV25')
+        publish: Corrotina chamada com (mensagem, canal, chave de coalescência, seq) para cada timeframe
+        interval: Intervalo entre leituras do MT5, em segundos
+        load_rates: Corrotina que busca candles de um timeframe, para a linha do Fluxo Compra
+            (opcional; sem ela, a linha não é transmitida)
+    """
+
+    def __init__(self, symbol: str, publish: Callable[[str, str, Optional[str], Optional[int]], Awaitable[None]],
+                 interval: float = 1.0, load_rates: Optional[RatesLoader] = None):
+        self.symbol = symbol
+        self.publish = publish
+        self.interval = interval
+        self.load_rates = load_rates
+        # Timeframe -> (duração do período, deslocamento da âncora)
+        self.timeframes: Dict[str, Tuple[int, int]] = {}
+        # Janela de candles M1 que cobre o período atual e o anterior do maior timeframe
+        self._window: Optional[np.ndarray] = None
+        # Último candle enviado por timeframe (para transmitir apenas mudanças)
+        self._last_sent: Dict[str, dict] = {}
+        # Amostragem de latência por timeframe (canal)
+        self._samplers: Dict[str, latency.LatencySampler] = defaultdict(latency.LatencySampler)
+        # Linha do Fluxo Compra por timeframe
+        self._fluxo: Dict[str, FluxoCompraTracker] = {}
+        self._last_read = 0.0
+        self._needs_seed = True
+
+    def add_timeframe(self, timeframe: str):
+        period, offset = parse_timeframe(timeframe)
+        if period > self._longest_period():
+            # O novo timeframe precisa de mais histórico M1 do que a janela atual
+            self._needs_seed = True
+        self.timeframes[timeframe] = (period, offset)
+        if self.load_rates is not None and timeframe not in self._fluxo:
+            self._fluxo[timeframe] = FluxoCompraTracker(self.symbol, timeframe, self.load_rates)
+
+    def remove_timeframe(self, timeframe: str):
+        self.timeframes.pop(timeframe, None)
+        self._last_sent.pop(timeframe, None)
+        self._samplers.pop(timeframe, None)
+        self._fluxo.pop(timeframe, None)
+
+    def _longest_period(self) -> int:
+        return max((period for period, _ in self.timeframes.values()), default=60)
+
+    def _bars_to_read(self) -> int:
+        """
+        Quantidade de candles M1 a ler neste ciclo.
+
+        Normalmente apenas os 2 últimos (o candle em formação e o anterior, para
+        capturar seu fechamento); a janela inteira só é relida na primeira leitura,
+        quando um timeframe maior é inscrito ou após uma pausa longa.
+        """
+        if self._needs_seed or time.monotonic() - self._last_read > _MAX_INCREMENTAL_GAP:
+            return 2 * self._longest_period() // 60 + 1
+        return 2
+
+    def _update_window(self, rates: np.ndarray):
+        """Incorpora os candles lidos à janela M1 e descarta o que não é mais necessário."""
+        if self._window is None or len(self._window) == 0:
+            window = rates
+        else:
+            kept = self._window[self._window['time'] < rates['time'][0]]
+            window = np.concatenate([kept, rates])
+        # Mantém dois períodos do maior timeframe: o candle anterior precisa estar
+        # completo na janela para publicar seus valores finais em `bar_closed`
+        oldest_needed = int(window['time'][-1]) - 2 * self._longest_period()
+        self._window = window[window['time'] >= oldest_needed]
+
+    @staticmethod
+    def _bar_to_dict(bar) -> dict:
+        return {
+            "time": int(bar['time']),
+            "open": float(bar['open']),
+            "high": float(bar['high']),
+            "low": float(bar['low']),
+            "close": float(bar['close']),
+        }
+
+    def _resampled(self, timeframe: str) -> Optional[np.ndarray]:
+        if self._window is None or len(self._window) == 0 or timeframe not in self.timeframes:
+            return None
+        period, offset = self.timeframes[timeframe]
+        return resample_rates(self._window, period, offset)
+
+    def latest_bar(self, timeframe: str) -> Optional[dict]:
+        """
+        Monta o candle mais recente do timeframe a partir da janela M1.
+
+        Returns:
+            dict ou None: Candle OHLC do período que contém o último M1
+        """
+        bars = self._resampled(timeframe)
+        if bars is None:
+            return None
+        return self._bar_to_dict(bars[-1])
+
+    def snapshot_bar(self, timeframe: str) -> Optional[dict]:
+        """
+        Candle atual do timeframe para um cliente que acabou de entrar no canal.
+
+        Enquanto a janela M1 aguarda a releitura completa (ex: timeframe maior
+        recém-inscrito), ela cobre só os últimos minutos e o candle montado
+        seria parcial: retorna None e esquece o último envio do timeframe, para
+        que a próxima leitura publique o candle correto no canal.
+
+        Returns:
+            dict ou None: Candle OHLC atual, ou None se a janela ainda não o cobre
+        """
+        if self._needs_seed:
+            self._last_sent.pop(timeframe, None)
+            return None
+        return self.latest_bar(timeframe)
+
+    def _changes(self, timeframe: str) -> List[dict]:
+        """
+        Calcula as mensagens a transmitir para o timeframe neste ciclo.
+
+        Returns:
+            list: Zero ou mais mensagens (`bar_closed` e/ou `candle`)
+        """
+        bars = self._resampled(timeframe)
+        if bars is None:
+            return []
+        current = self._bar_to_dict(bars[-1])
+        previous = self._last_sent.get(timeframe)
+        if current == previous:
+            return []
+
+        messages = []
+        if previous is not None and current["time"] > previous["time"]:
+            # O período anterior terminou: envia seus valores finais
+            closed = bars[bars['time'] == previous["time"]]
+            final = self._bar_to_dict(closed[0]) if len(closed) > 0 else previous
+            messages.append({"type": "bar_closed", "data": final})
+        messages.append({"type": "candle", "data": current})
+        self._last_sent[timeframe] = current
+        return messages
+
+    async def _publish_fluxo(self):
+        """Lê os sinais novos e publica as mudanças da linha do Fluxo Compra de cada timeframe."""
+        # Leitura incremental dos arquivos de sinais (apenas os bytes acrescentados)
+        await run_in_threadpool(signal_store.refresh)
+        for timeframe, tracker in list(self._fluxo.items()):
+            try:
+                message = await tracker.update(self.latest_bar(timeframe))
+            except Exception as e:
+                _errors.error(f"{self.symbol}-{timeframe}:fluxo",
+                              "Erro ao atualizar o Fluxo Compra de %s-%s: %s", self.symbol, timeframe, e)
+                continue
+            if message is not None:
+                # Pontos anteriores podem mudar com um novo sinal: nunca coalescido
+                await self.publish(latency.serialize(message), f"{self.symbol}-{timeframe}", None, None)
+
+    async def run(self):
+        """Laço principal: uma leitura do MT5 por ciclo para todos os timeframes."""
+        while True:
+            try:
+                mt5 = mt5_connector.get_mt5_instance()
+                if not mt5_connector.is_connected():
+                    await asyncio.sleep(5)
+                    continue
+
+                # Candles não trazem o horário da atualização: a origem é o início da leitura
+                source_ms = latency.now_ms()
+                read_started = time.perf_counter()
+                rates = await mt5_connector.run_mt5(
+                    mt5.copy_rates_from_pos, self.symbol, mt5.TIMEFRAME_M1, 0, self._bars_to_read()
+                )
+                latency.observe(latency.STAGE_SOURCE_READ, time.perf_counter() - read_started)
+
+                if rates is not None and len(rates) > 0:
+                    self._needs_seed = False
+                    self._last_read = time.monotonic()
+                    self._update_window(rates)
+
+                    # Cópia das chaves: inscrições podem mudar durante os envios
+                    for timeframe in list(self.timeframes):
+                        for message in self._changes(timeframe):
+                            # Só o candle em formação pode ser substituído por uma versão mais nova
+                            key = "candle" if message["type"] == "candle" else None
+                            seq = self._samplers[timeframe].stamp(message, source_ms)
+                            await self.publish(latency.serialize(message), f"{self.symbol}-{timeframe}", key, seq)
+
+                if self._fluxo:
+                    await self._publish_fluxo()
+
+                # Espera um tempo antes da próxima verificação.
+                # Um valor curto (1s) garante atualizações rápidas do candle atual.
+                await asyncio.sleep(self.interval)
+
+            except asyncio.CancelledError:
+                logger.info("Bomba de dados para %s foi cancelada.", self.symbol)
+                break
+            except Exception as e:
+                _errors.error(f"{self.symbol}:{type(e).__name__}", "Erro na bomba de dados para %s: %s", self.symbol, e)
+                await asyncio.sleep(10) # Espera um pouco mais em caso de erro
@@ -0,0 +1,335 @@
+"""
+Métricas no formato de texto do Prometheus, sem dependências externas.
+
+Contadores, medidores e histogramas com rótulos opcionais, registrados em
+um registro global e publicados em `/metrics`. Cada atualização é apenas
+uma soma protegida por lock, barata o bastante para os caminhos quentes
+(bombas de dados, envio aos clientes, chamadas ao MT5).
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+# Limites (em segundos) dos histogramas de latência: de 0,1 ms a 10 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Limites de quantidade de linhas (candles/ticks) por consulta
+ROWS_BUCKETS = (0, 1, 2, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000)
+# Limites de tamanho de resposta, em bytes: de 256 B a 64 MiB
+BYTES_BUCKETS = tuple(256 * 4 ** i for i in range(10))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base das métricas: uma série por combinação de valores de rótulos."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._new_child()
+            self._children[()] = self._default
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Retorna a série com os valores de rótulos informados (criando-a se necessário)."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def remove(self, *values: str):
+        """Remove a série (ex: canal sem clientes), para não publicar valores antigos."""
+        with self._lock:
+            self._children.pop(tuple(str(v) for v in values), None)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"]
+
+
+class _Value:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float):
+        self._value = value
+
+    def get(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    """Contador monotônico (ex: chamadas, bytes enviados)."""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """Valor que sobe e desce (ex: conexões ativas, profundidade de fila)."""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Sequence[float]):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram(_Metric):
+    """Distribuição de valores em faixas cumulativas (ex: latências em segundos)."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def _render_child(self, key, child) -> List[str]:
+        counts, total = child.snapshot()
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """
+    Métrica calculada apenas na leitura de `/metrics` (ex: conexões por canal).
+
+    Args:
+        fn: Retorna o valor (sem rótulos) ou um dicionário {valores dos rótulos: valor}
+        type_name: Tipo publicado (`gauge` ou `counter`)
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 fn: Callable[[], Union[float, Dict[Tuple[str, ...], float]]], type_name: str = "gauge"):
+        self.fn = fn
+        self.type_name = type_name
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return None
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas publicadas em `/metrics`."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Registro global e atalhos para criar métricas já registradas
+registry = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return registry.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return registry.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def callback(name: str, documentation: str, fn, labelnames: Sequence[str] = (),
+             type_name: str = "gauge") -> CallbackMetric:
+    return registry.register(CallbackMetric(name, documentation, labelnames, fn, type_name))
+
+
+def timed(observer, fn, *args, **kwargs):
+    """Executa `fn` e registra a duração (em segundos) em `observer` (série de um histograma)."""
+    started = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        observer.observe(time.perf_counter() - started)
+
+
+# --- Latência do fluxo em tempo real (MT5 -> bomba -> serialização -> envio -> navegador) ---
+
+stream_stage_seconds = histogram(
+    "stream_stage_seconds",
+    "Latência de cada etapa do fluxo em tempo real, em segundos.",
+    ("stage",),
+)
+
+# --- Chamadas ao provedor de dados (MT5) ---
+
+mt5_calls_total = counter("mt5_calls_total", "Chamadas ao provedor de dados por função.", ("function",))
+mt5_call_errors_total = counter(
+    "mt5_call_errors_total", "Chamadas ao provedor de dados que falharam (exceção ou retorno None).", ("function",))
+mt5_call_seconds = histogram("mt5_call_seconds", "Duração das chamadas ao provedor de dados, em segundos.", ("function",))
+mt5_rows_returned = histogram(
+    "mt5_rows_returned", "Linhas (candles ou ticks) retornadas por chamada.", ("function",), ROWS_BUCKETS)
+
+# --- WebSockets ---
+
+ws_messages_dropped_total = counter(
+    "ws_messages_dropped_total", "Mensagens descartadas por fila de cliente cheia.")
+ws_messages_coalesced_total = counter(
+    "ws_messages_coalesced_total", "Mensagens substituídas por uma versão mais nova na fila de um cliente.")
+ws_slow_disconnects_total = counter(
+    "ws_slow_disconnects_total", "Clientes desconectados por lentidão.")
+
+# --- Leituras das regiões capturadas (socket local de leituras) ---
+
+readings_received_total = counter("readings_received_total", "Leituras recebidas por série.", ("name",))
+readings_invalid_total = counter("readings_invalid_total", "Linhas de leitura descartadas por formato inválido.")
+readings_delay_seconds = histogram(
+    "readings_delay_seconds", "Atraso entre a captura da tela e o recebimento da leitura, em segundos.")
+
+# --- HTTP ---
+
+http_requests_total = counter("http_requests_total", "Requisições HTTP por rota e status.", ("endpoint", "status"))
+http_request_seconds = histogram("http_request_seconds", "Duração das requisições HTTP, em segundos.", ("endpoint",))
+http_response_bytes = histogram(
+    "http_response_bytes", "Tamanho do corpo das respostas HTTP (após compressão).", ("endpoint",), BYTES_BUCKETS)
+http_serialize_seconds = histogram(
+    "http_serialize_seconds", "Tempo de serialização do corpo das respostas, em segundos.", ("endpoint",))
+
+
+def endpoint_label(scope: dict) -> str:
+    """Rótulo da rota (modelo do caminho, ex: /api/history/{symbol}) para as métricas HTTP."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede duração, status e bytes enviados de cada requisição HTTP.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        state = {"status": 500, "bytes": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            endpoint = endpoint_label(scope)
+            http_requests_total.labels(endpoint, state["status"]).inc()
+            http_request_seconds.labels(endpoint).observe(time.perf_counter() - started)
+            http_response_bytes.labels(endpoint).observe(state["bytes"])
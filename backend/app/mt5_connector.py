@@ -1,45 +1,78 @@
-import MetaTrader5 as mt5
 import asyncio
+import logging
 import os
+from typing import Optional
+
 from dotenv import load_dotenv
 
+from . import metrics
+from .log_config import RateLimitedLog
+from .mt5_executor import MT5Executor
+from .providers import InstrumentedProvider, MarketDataProvider, create_provider
+
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+_rate_limited = RateLimitedLog(logger)
+
 # --- Variáveis Globais ---
 _is_connected = False
+# Provedor de dados (MT5, reprodução ou sintético), criado na primeira conexão.
+# O pacote MetaTrader5 só é importado quando o provedor MT5 é inicializado.
+_provider: Optional[MarketDataProvider] = None
+
+# Todas as chamadas ao MT5 passam por esta única thread (a biblioteca não é thread-safe)
+executor = MT5Executor(
+    max_queue=int(os.getenv("MT5_MAX_QUEUE", 32)),
+    call_timeout=float(os.getenv("MT5_CALL_TIMEOUT", 10.0)),
+)
+
+metrics.callback("mt5_executor_queue_depth", "Chamadas ao MT5 pendentes (em execução + na fila).",
+                 lambda: executor.stats()["queue_depth"])
+metrics.callback("mt5_executor_rejected_total", "Chamadas ao MT5 rejeitadas por fila cheia.",
+                 lambda: executor.stats()["rejected"], type_name="counter")
+metrics.callback("mt5_executor_timeouts_total", "Chamadas ao MT5 que excederam o tempo limite.",
+                 lambda: executor.stats()["timeouts"], type_name="counter")
 
 # --- Funções de Conexão ---
 
 async def initialize_mt5():
     """
-    Inicializa a conexão com o terminal MetaTrader 5 em execução.
-    Tenta reconectar em caso de falha.
+    Inicializa a conexão com o provedor de dados configurado (por padrão, o
+    terminal MetaTrader 5 em execução). Tenta reconectar em caso de falha.
     """
-    global _is_connected
+    global _is_connected, _provider
+
+    if _provider is None:
+        # As chamadas ao provedor são medidas e publicadas em `/metrics`
+        _provider = InstrumentedProvider(create_provider())
 
     while not _is_connected:
-        print("Tentando conectar ao terminal MetaTrader 5...")
-        # Conecta-se a um terminal MT5 que já deve estar aberto e logado.
-        initialized = mt5.initialize()
+        if _provider.name == "mt5":
+            logger.info("Tentando conectar ao terminal MetaTrader 5...")
+        else:
+            logger.info("Inicializando o provedor de dados '%s'...", _provider.name)
+        initialized = await executor.run(_provider.initialize)
 
         if initialized:
-            print("Conexão com MetaTrader 5 estabelecida com sucesso.")
+            logger.info("Conexão com o provedor de dados '%s' estabelecida com sucesso.", _provider.name)
             _is_connected = True
         else:
-            print(f"Falha ao conectar ao MT5. Código de erro: {mt5.last_error()}")
-            print("Tentando novamente em 10 segundos...")
+            logger.warning("Falha ao conectar ao provedor de dados. Código de erro: %s. "
+                           "Tentando novamente em 10 segundos...", await executor.run(_provider.last_error))
             await asyncio.sleep(10)
 
-def shutdown_mt5():
+async def shutdown_mt5():
     """
-    Encerra a conexão com o MetaTrader 5.
+    Encerra a conexão com o provedor de dados e a thread de chamadas ao MT5.
     """
     global _is_connected
     if _is_connected:
-        mt5.shutdown()
+        await executor.run(_provider.shutdown)
         _is_connected = False
-        print("Conexão com MetaTrader 5 encerrada.")
+        logger.info("Conexão com o provedor de dados encerrada.")
+    executor.shutdown()
 
 def is_connected():
     """
@@ -47,23 +80,36 @@ def is_connected():
     """
     return _is_connected
 
-# Mapeamento de timeframes amigáveis para constantes do MT5
-# Definido aqui para evitar importações circulares.
-TIMEFRAME_MAP = {
-    "M1": mt5.TIMEFRAME_M1,
-    "M5": mt5.TIMEFRAME_M5,
-    "M15": mt5.TIMEFRAME_M15,
-    "M30": mt5.TIMEFRAME_M30,
-    "H1": mt5.TIMEFRAME_H1,
-}
+async def run_mt5(fn, *args, **kwargs):
+    """
+    Executa uma função síncrona que acessa o MT5 na thread dedicada.
+
+    Args:
+        fn: Função que usa a API do MetaTrader5
+        *args, **kwargs: Argumentos repassados para `fn`
+
+    Returns:
+        Any: O valor retornado por `fn`
+
+    Raises:
+        MT5QueueFullError: Se a fila do executor estiver cheia
+        MT5TimeoutError: Se a chamada exceder o tempo limite
+    """
+    return await executor.run(fn, *args, **kwargs)
+
+def provider_name() -> Optional[str]:
+    """
+    Retorna o nome do provedor de dados em uso (mt5, replay ou synthetic).
+    """
+    return _provider.name if _provider is not None else None
 
 def get_mt5_instance():
     """
-    Retorna a instância do MT5 se conectado.
+    Retorna o provedor de dados (com a API do MT5) se conectado.
     """
     if not _is_connected:
         # Em uma aplicação real, poderíamos tentar reconectar aqui ou lançar uma exceção.
-        # Por enquanto, vamos apenas logar um aviso.
-        print("Aviso: Tentativa de uso do MT5 sem conexão ativa.")
+        # Por enquanto, vamos apenas logar um aviso (limitado: as bombas chamam a cada ciclo).
+        _rate_limited.warning("disconnected", "Tentativa de uso do MT5 sem conexão ativa.")
         return None
-    return mt5
+    return _provider
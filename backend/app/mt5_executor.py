@@ -0,0 +1,164 @@
+"""
+Executor dedicado para as chamadas à biblioteca MetaTrader5.
+
+A biblioteca MetaTrader5 é síncrona e não é thread-safe, portanto todas as
+chamadas passam por uma única thread de trabalho. O event loop apenas
+aguarda o resultado, sem bloquear websockets, `/health` e demais endpoints.
+
+A fila é limitada: quando cheia, novas chamadas são rejeitadas imediatamente
+em vez de acumular trabalho atrasado. Cada chamada tem um tempo limite.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MT5ExecutorError(Exception):
+    """Erro base do executor do MT5."""
+
+
+class MT5QueueFullError(MT5ExecutorError):
+    """A fila do executor do MT5 atingiu o limite configurado."""
+
+
+class MT5TimeoutError(MT5ExecutorError):
+    """A chamada ao MT5 excedeu o tempo limite."""
+
+
+class MT5Executor:
+    """
+    Executor de thread única com fila limitada e tempo limite por chamada.
+
+    Args:
+        max_queue: Número máximo de chamadas pendentes (em execução + na fila)
+        call_timeout: Tempo limite padrão, em segundos, de cada chamada
+
+    Note:
+        O tempo limite libera o chamador, mas não interrompe a chamada em
+        andamento na thread do MT5: ela continua ocupando a fila até terminar.
+    """
+
+    def __init__(self, max_queue: int = 32, call_timeout: float = 10.0):
+        self.max_queue = max_queue
+        self.call_timeout = call_timeout
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5")
+        self._lock = threading.Lock()
+
+        # Métricas
+        self._queue_depth = 0
+        self._max_queue_depth = 0
+        self._calls = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._errors = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+        self._last_run = 0.0
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Executa `fn(*args, **kwargs)` na thread do MT5 e aguarda o resultado.
+
+        Args:
+            fn: Função síncrona que acessa o MT5
+            timeout: Tempo limite em segundos (usa `call_timeout` se omitido)
+
+        Returns:
+            Any: O valor retornado por `fn`
+
+        Raises:
+            MT5QueueFullError: Se a fila estiver cheia
+            MT5TimeoutError: Se a chamada exceder o tempo limite
+        """
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future),
+                                          timeout or self.call_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            name = getattr(fn, '__name__', repr(fn))
+            logger.warning(f"Chamada ao MT5 '{name}' excedeu o tempo limite.")
+            raise MT5TimeoutError(f"Chamada ao MT5 '{name}' excedeu o tempo limite.")
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        """
+        Enfileira `fn` na thread do MT5 sem aguardar o resultado.
+
+        Returns:
+            concurrent.futures.Future: Future da chamada
+
+        Raises:
+            MT5QueueFullError: Se a fila estiver cheia
+        """
+        with self._lock:
+            if self._queue_depth >= self.max_queue:
+                self._rejected += 1
+                raise MT5QueueFullError("Fila de chamadas ao MT5 cheia.")
+            self._queue_depth += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue_depth)
+
+        submitted_at = time.perf_counter()
+        call = functools.partial(self._timed_call, fn, submitted_at, *args, **kwargs)
+        try:
+            future = self._pool.submit(call)
+        except RuntimeError:
+            with self._lock:
+                self._queue_depth -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _timed_call(self, fn: Callable, submitted_at: float, *args, **kwargs) -> Any:
+        """Executa a chamada na thread do MT5 registrando espera e duração."""
+        started_at = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            finished_at = time.perf_counter()
+            with self._lock:
+                self._calls += 1
+                self._total_wait += started_at - submitted_at
+                self._last_run = finished_at - started_at
+                self._total_run += self._last_run
+
+    def _on_done(self, _future):
+        with self._lock:
+            self._queue_depth -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna as métricas do executor.
+
+        Returns:
+            dict: Profundidade da fila, contadores e tempos médios em milissegundos
+        """
+        with self._lock:
+            calls = self._calls or 1
+            return {
+                "queue_depth": self._queue_depth,
+                "max_queue_depth": self._max_queue_depth,
+                "queue_limit": self.max_queue,
+                "calls": self._calls,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "errors": self._errors,
+                "avg_wait_ms": round(self._total_wait / calls * 1000, 3),
+                "avg_run_ms": round(self._total_run / calls * 1000, 3),
+                "last_run_ms": round(self._last_run * 1000, 3),
+            }
+
+    def shutdown(self):
+        """Encerra a thread do MT5 após concluir as chamadas pendentes."""
+        self._pool.shutdown(wait=True)
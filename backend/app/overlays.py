@@ -0,0 +1,122 @@
+"""
+Registro das fontes de sinais desenhadas como linhas sobre o gráfico.
+
+Cada fonte declara o arquivo de onde vêm os sinais (tag em
+`{SÍMBOLO}_{TAG}_{AAAA-MM-DD}.csv`), os tokens da coluna SINAL que ligam e
+desligam a linha e a regra de preço dos segmentos (ver
+`signal_overlay.PRICE_RULES`). Todas as linhas pedidas são calculadas de uma
+vez sobre o mesmo array de candles (`compute_signal_overlays`).
+
+Para acrescentar um indicador basta registrar uma nova fonte:
+
+    register_source(SignalSource("fluxo_venda", "FV", "LIGA_VENDA", "DESLIGA_VENDA"))
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .signal_overlay import PRICE_RULES, OverlaySignals, compute_signal_overlays
+from .signal_store import signal_store
+
+
+@dataclass(frozen=True)
+class SignalSource:
+    """
+    Fonte de sinais liga/desliga.
+
+    Args:
+        name: Nome da linha na API (ex: 'fluxo_compra')
+        file_tag: Tag dos arquivos de sinais (ex: 'FC' em WDO_FC_2025-10-16.csv)
+        on_token: Valor da coluna SINAL que liga a linha
+        off_token: Valor da coluna SINAL que desliga a linha
+        price_rule: Regra de preço dos segmentos (chave de `PRICE_RULES`)
+    """
+    name: str
+    file_tag: str
+    on_token: str
+    off_token: str
+    price_rule: str = "first_close"
+
+
+# Fontes registradas, por nome (na ordem de registro)
+SIGNAL_SOURCES: Dict[str, SignalSource] = {}
+
+
+def register_source(source: SignalSource) -> SignalSource:
+    """
+    Registra uma fonte de sinais.
+
+    Raises:
+        ValueError: Se a regra de preço for desconhecida
+    """
+    if source.price_rule not in PRICE_RULES:
+        raise ValueError(f"Regra de preço desconhecida: '{source.price_rule}'. Use {', '.join(PRICE_RULES)}.")
+    SIGNAL_SOURCES[source.name] = source
+    return source
+
+
+FLUXO_COMPRA = register_source(SignalSource("fluxo_compra", "FC", "LIGA_COMPRA", "DESLIGA_COMPRA"))
+FLUXO_VENDA = register_source(SignalSource("fluxo_venda", "FV", "LIGA_VENDA", "DESLIGA_VENDA"))
+
+
+def resolve_sources(names: Optional[Sequence[str]] = None) -> List[SignalSource]:
+    """
+    Retorna as fontes pedidas (todas, se `names` for vazio).
+
+    Raises:
+        KeyError: Se algum nome não estiver registrado
+    """
+    if not names:
+        return list(SIGNAL_SOURCES.values())
+    return [SIGNAL_SOURCES[name] for name in names]
+
+
+def source_signals(source: SignalSource, symbol: str, start_ts: int, end_ts: int) -> OverlaySignals:
+    """Sinais liga/desliga da fonte no intervalo [start_ts, end_ts)."""
+    times, types = signal_store.get_signals(symbol, start_ts, end_ts, tag=source.file_tag)
+    # Só os tokens de liga/desliga da fonte participam do pareamento
+    relevant = (types == source.on_token) | (types == source.off_token)
+    return OverlaySignals(times[relevant], types[relevant] == source.on_token, source.price_rule)
+
+
+def sources_version(symbol: str, sources: Sequence[SignalSource]) -> Tuple[Optional[str], ...]:
+    """Versão dos arquivos de sinais das fontes, para ETags."""
+    return tuple(signal_store.version(symbol, tag=source.file_tag) for source in sources)
+
+
+def compute_overlays(symbol: str, rates: np.ndarray, sources: Sequence[SignalSource],
+                     start_ts: int, end_ts: int) -> Dict[str, List[dict]]:
+    """
+    Calcula as linhas das fontes sobre os candles, em uma única passada.
+
+    Fontes sem nenhum sinal no intervalo retornam lista vazia (sem linha).
+
+    Args:
+        symbol (str): Símbolo do ativo
+        rates (np.ndarray): Candles (array estruturado do MT5)
+        sources (list): Fontes a calcular
+        start_ts, end_ts (int): Intervalo (epoch s) dos sinais considerados
+
+    Returns:
+        dict: Nome da fonte -> pontos `{'time', 'value', 'active'}`, um por candle
+    """
+    signals = [source_signals(source, symbol, start_ts, end_ts) for source in sources]
+    result: Dict[str, List[dict]] = {source.name: [] for source in sources}
+    with_signals = [index for index, s in enumerate(signals) if len(s.times) > 0]
+    if len(rates) == 0 or not with_signals:
+        return result
+
+    candle_times = rates['time'].astype(np.int64)
+    values, active = compute_signal_overlays(
+        candle_times, {'open': rates['open'], 'close': rates['close']},
+        [signals[index] for index in with_signals],
+    )
+    times = candle_times.tolist()
+    for row, index in enumerate(with_signals):
+        result[sources[index].name] = [
+            {'time': t, 'value': v, 'active': a}
+            for t, v, a in zip(times, values[row].tolist(), active[row].tolist())
+        ]
+    return result
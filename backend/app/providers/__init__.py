@@ -0,0 +1,49 @@
+"""
+Provedores de dados de mercado.
+
+O provedor é escolhido pela variável de ambiente `MARKET_DATA_PROVIDER`:
+- `mt5` (padrão): terminal MetaTrader 5;
+- `replay`: dados gravados (`REPLAY_TICKS`, `REPLAY_BARS`, `REPLAY_SPEED`);
+- `synthetic`: dados sintéticos determinísticos (`SYNTHETIC_SEED`).
+"""
+
+import os
+from typing import Optional
+
+from .base import RATES_DTYPE, TICKS_DTYPE, MarketDataProvider
+from .instrumented import InstrumentedProvider
+from .mt5_provider import MT5Provider
+from .replay import ReplayProvider
+from .synthetic import SyntheticProvider
+
+__all__ = [
+    "MarketDataProvider", "InstrumentedProvider", "MT5Provider", "ReplayProvider", "SyntheticProvider",
+    "RATES_DTYPE", "TICKS_DTYPE", "create_provider",
+]
+
+
+def create_provider(name: Optional[str] = None) -> MarketDataProvider:
+    """
+    Cria o provedor de dados configurado.
+
+    Args:
+        name (str, opcional): `mt5`, `replay` ou `synthetic`; padrão: `MARKET_DATA_PROVIDER`
+
+    Returns:
+        MarketDataProvider: Provedor ainda não inicializado
+
+    Raises:
+        ValueError: Se o nome do provedor ou sua configuração forem inválidos
+    """
+    name = (name or os.getenv("MARKET_DATA_PROVIDER", "mt5")).lower()
+    if name == "mt5":
+        return MT5Provider()
+    if name == "replay":
+        return ReplayProvider(
+            ticks_path=os.getenv("REPLAY_TICKS") or None,
+            bars_path=os.getenv("REPLAY_BARS") or None,
+            speed=float(os.getenv("REPLAY_SPEED", 1.0)),
+        )
+    if name == "synthetic":
+        return SyntheticProvider(seed=int(os.getenv("SYNTHETIC_SEED", 42)))
+    raise ValueError(f"Provedor de dados desconhecido: '{name}'. Use mt5, replay ou synthetic.")
@@ -0,0 +1,135 @@
+"""
+Interface comum dos provedores de dados de mercado.
+
+Os provedores seguem a mesma API do módulo `MetaTrader5` (nomes de funções,
+argumentos, constantes e arrays estruturados retornados), de modo que o
+restante do backend usa qualquer um deles sem distinção.
+"""
+
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from datetime import datetime
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+# dtype dos ticks retornados por `copy_ticks_*` do MT5
+TICKS_DTYPE = np.dtype([
+    ('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<u8'),
+    ('time_msc', '<i8'), ('flags', '<u4'), ('volume_real', '<f8'),
+])
+
+# dtype dos candles retornados por `copy_rates_*` do MT5
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+
+Tick = namedtuple("Tick", "time bid ask last volume time_msc flags volume_real")
+SymbolInfo = namedtuple("SymbolInfo", "name description digits point trade_tick_size currency_base")
+
+DateLike = Union[datetime, int]
+
+
+class MarketDataProvider(ABC):
+    """
+    Fonte de candles e ticks com a API do `MetaTrader5`.
+
+    Os provedores que não são o MT5 trabalham apenas com candles M1, que é o
+    único timeframe consultado pelo backend (os demais são reamostrados).
+    """
+
+    name = "base"
+
+    TIMEFRAME_M1 = 1
+
+    COPY_TICKS_ALL = -1
+    COPY_TICKS_INFO = 1
+    COPY_TICKS_TRADE = 2
+
+    @abstractmethod
+    def initialize(self) -> bool:
+        """Abre a conexão (ou carrega os dados). Retorna False em caso de falha."""
+
+    def shutdown(self) -> bool:
+        return True
+
+    def last_error(self) -> Tuple[int, str]:
+        return (1, "Success")
+
+    @abstractmethod
+    def copy_rates_range(self, symbol: str, timeframe: int,
+                         date_from: DateLike, date_to: DateLike) -> Optional[np.ndarray]:
+        """Candles com horário de abertura entre `date_from` e `date_to`."""
+
+    @abstractmethod
+    def copy_rates_from_pos(self, symbol: str, timeframe: int,
+                            start_pos: int, count: int) -> Optional[np.ndarray]:
+        """`count` candles a partir da posição `start_pos` (0 = candle atual)."""
+
+    @abstractmethod
+    def copy_ticks_from(self, symbol: str, date_from: DateLike, count: int,
+                        flags: int) -> Optional[np.ndarray]:
+        """Até `count` ticks a partir de `date_from`."""
+
+    @abstractmethod
+    def copy_ticks_range(self, symbol: str, date_from: DateLike, date_to: DateLike,
+                         flags: int) -> Optional[np.ndarray]:
+        """Ticks entre `date_from` e `date_to`."""
+
+    @abstractmethod
+    def symbol_info_tick(self, symbol: str) -> Optional[Tick]:
+        """Último tick do símbolo."""
+
+    @abstractmethod
+    def symbol_info(self, symbol: str) -> Optional[SymbolInfo]:
+        """Informações do símbolo (casas decimais, tamanho do tick...)."""
+
+
+# --- Funções auxiliares dos provedores sem MT5 ---
+
+def to_msc(value: DateLike) -> int:
+    """Converte datetime (ou epoch s, como aceito pelo MT5) para epoch ms."""
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return int(value) * 1000
+
+
+def check_m1(timeframe: int):
+    if timeframe != MarketDataProvider.TIMEFRAME_M1:
+        raise ValueError(f"Timeframe {timeframe} não suportado: apenas M1 (os demais são reamostrados).")
+
+
+def ticks_to_m1(ticks: np.ndarray) -> np.ndarray:
+    """
+    Monta candles M1 a partir dos ticks (preço `last`, ou `bid` quando não houver negócio).
+
+    Args:
+        ticks (np.ndarray): Ticks ordenados por `time_msc` (dtype `TICKS_DTYPE`)
+
+    Returns:
+        np.ndarray: Candles M1 (dtype `RATES_DTYPE`)
+    """
+    if len(ticks) == 0:
+        return np.empty(0, dtype=RATES_DTYPE)
+    price = np.where(ticks['last'] > 0, ticks['last'], ticks['bid'])
+    minutes = ticks['time_msc'] // 60000 * 60
+    starts = np.flatnonzero(np.r_[True, minutes[1:] != minutes[:-1]])
+    ends = np.r_[starts[1:], len(ticks)] - 1
+
+    bars = np.zeros(len(starts), dtype=RATES_DTYPE)
+    bars['time'] = minutes[starts]
+    bars['open'] = price[starts]
+    bars['high'] = np.maximum.reduceat(price, starts)
+    bars['low'] = np.minimum.reduceat(price, starts)
+    bars['close'] = price[ends]
+    bars['tick_volume'] = np.diff(np.r_[starts, len(ticks)])
+    bars['real_volume'] = np.add.reduceat(ticks['volume'], starts)
+    return bars
+
+
+def last_tick(ticks: np.ndarray) -> Optional[Tick]:
+    """Converte o último tick do array para o formato de `symbol_info_tick`."""
+    if len(ticks) == 0:
+        return None
+    return Tick(*(ticks[-1][name].item() for name in Tick._fields))
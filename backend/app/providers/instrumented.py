@@ -0,0 +1,68 @@
+"""
+Provedor que mede as chamadas feitas a outro provedor.
+
+Conta as chamadas, os erros e a duração de cada função da API e, nas
+funções `copy_*`, a quantidade de linhas retornadas. Nas funções de dados
+(`copy_*` e `symbol_*`), um retorno `None` também conta como erro, já que
+é assim que o MT5 sinaliza falha.
+As métricas são publicadas em `/metrics` (ver `metrics`).
+"""
+
+import time
+
+from ..metrics import mt5_call_errors_total, mt5_call_seconds, mt5_calls_total, mt5_rows_returned
+
+# Funções medidas; as demais (constantes, `name`...) são repassadas sem alteração
+INSTRUMENTED_FUNCTIONS = (
+    "initialize", "shutdown", "last_error",
+    "copy_rates_range", "copy_rates_from_pos", "copy_ticks_from", "copy_ticks_range",
+    "symbol_info_tick", "symbol_info",
+)
+
+
+class InstrumentedProvider:
+    """
+    Envolve um provedor de dados, medindo cada chamada à sua API.
+
+    Args:
+        provider: Provedor de dados (MT5, reprodução ou sintético)
+    """
+
+    def __init__(self, provider):
+        self._provider = provider
+        self._wrapped = {name: self._instrument(name) for name in INSTRUMENTED_FUNCTIONS}
+
+    def __getattr__(self, name):
+        # Só é chamado para atributos que não estão na instância (API e constantes)
+        if name.startswith("_"):
+            raise AttributeError(name)
+        wrapped = self._wrapped.get(name)
+        return wrapped if wrapped is not None else getattr(self._provider, name)
+
+    def _instrument(self, name: str):
+        fn = getattr(self._provider, name)
+        calls = mt5_calls_total.labels(name)
+        errors = mt5_call_errors_total.labels(name)
+        seconds = mt5_call_seconds.labels(name)
+        rows = mt5_rows_returned.labels(name) if name.startswith("copy_") else None
+        none_is_error = name.startswith(("copy_", "symbol_"))
+
+        def call(*args, **kwargs):
+            calls.inc()
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                seconds.observe(time.perf_counter() - started)
+            if result is None:
+                if none_is_error:
+                    errors.inc()
+            elif rows is not None:
+                rows.observe(len(result))
+            return result
+
+        call.__name__ = name
+        return call
@@ -0,0 +1,64 @@
+"""
+Provedor de dados do terminal MetaTrader 5.
+
+O pacote `MetaTrader5` só existe no Windows; ele é importado apenas quando
+este provedor é inicializado, para que o backend possa ser importado (e
+executado com outros provedores) em qualquer sistema.
+"""
+
+from .base import MarketDataProvider
+
+
+class MT5Provider(MarketDataProvider):
+    """
+    Repassa as chamadas para o módulo `MetaTrader5`.
+
+    Constantes do MT5 que não estão na interface (ex: `TIMEFRAME_H1`) também
+    são repassadas ao módulo.
+    """
+
+    name = "mt5"
+
+    def __init__(self):
+        self._mt5 = None
+
+    @property
+    def mt5(self):
+        if self._mt5 is None:
+            import MetaTrader5
+            self._mt5 = MetaTrader5
+        return self._mt5
+
+    def __getattr__(self, name):
+        # Só é chamado para atributos não definidos na classe (constantes do MT5)
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.mt5, name)
+
+    def initialize(self) -> bool:
+        # Conecta-se a um terminal MT5 que já deve estar aberto e logado.
+        return self.mt5.initialize()
+
+    def shutdown(self) -> bool:
+        return self.mt5.shutdown()
+
+    def last_error(self):
+        return self.mt5.last_error()
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        return self.mt5.copy_rates_range(symbol, timeframe, date_from, date_to)
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        return self.mt5.copy_rates_from_pos(symbol, timeframe, start_pos, count)
+
+    def copy_ticks_from(self, symbol, date_from, count, flags):
+        return self.mt5.copy_ticks_from(symbol, date_from, count, flags)
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags):
+        return self.mt5.copy_ticks_range(symbol, date_from, date_to, flags)
+
+    def symbol_info_tick(self, symbol):
+        return self.mt5.symbol_info_tick(symbol)
+
+    def symbol_info(self, symbol):
+        return self.mt5.symbol_info(symbol)
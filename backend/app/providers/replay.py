@@ -0,0 +1,144 @@
+"""
+Provedor que reproduz candles e ticks gravados em disco.
+
+O relógio da reprodução começa no primeiro dado gravado quando `initialize()`
+é chamado e avança `speed` vezes mais rápido que o tempo real (de 1x a
+1000x). Todas as consultas enxergam apenas os dados até esse relógio, então
+o backend se comporta como se estivesse conectado ao mercado naquele dia.
+
+Arquivos aceitos (gerados por `tools/record_market_data.py`):
+- ticks: `.npy` com o array de `copy_ticks_range` do MT5;
+- candles: `.npy` com o array M1 de `copy_rates_range` do MT5.
+
+Com apenas os ticks, os candles M1 são montados a partir deles. Com candles
+gravados, um candle só aparece depois de fechado (o OHLC final já é conhecido).
+Qualquer símbolo consultado recebe os dados gravados.
+"""
+
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from .base import (RATES_DTYPE, TICKS_DTYPE, MarketDataProvider, SymbolInfo, check_m1,
+                   last_tick, ticks_to_m1, to_msc)
+
+MIN_SPEED = 1.0
+MAX_SPEED = 1000.0
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Reproduz dados gravados com relógio acelerado.
+
+    Args:
+        ticks_path: Arquivo de ticks gravados (opcional se houver candles)
+        bars_path: Arquivo de candles M1 gravados (opcional se houver ticks)
+        speed: Velocidade da reprodução (1 = tempo real, até 1000)
+        clock: Relógio monotônico em segundos (substituível para reprodução determinística)
+    """
+
+    name = "replay"
+
+    def __init__(self, ticks_path: Optional[str] = None, bars_path: Optional[str] = None,
+                 speed: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        if ticks_path is None and bars_path is None:
+            raise ValueError("O provedor de reprodução precisa de um arquivo de ticks ou de candles.")
+        if not MIN_SPEED <= speed <= MAX_SPEED:
+            raise ValueError(f"Velocidade inválida: {speed}. Use de {MIN_SPEED:g} a {MAX_SPEED:g}.")
+        self.ticks_path = ticks_path
+        self.bars_path = bars_path
+        self.speed = speed
+        self.clock = clock
+
+        self._ticks = np.empty(0, dtype=TICKS_DTYPE)
+        self._bars: Optional[np.ndarray] = None
+        self._start_msc = 0
+        self._started_at = 0.0
+        self._last_error = (1, "Success")
+
+    def initialize(self) -> bool:
+        try:
+            if self.ticks_path:
+                self._ticks = np.load(self.ticks_path)
+            if self.bars_path:
+                self._bars = np.load(self.bars_path)
+        except OSError as e:
+            self._last_error = (-10003, f"Erro ao ler os dados gravados: {e}")
+            return False
+
+        starts = []
+        if len(self._ticks) > 0:
+            starts.append(int(self._ticks['time_msc'][0]))
+        if self._bars is not None and len(self._bars) > 0:
+            starts.append(int(self._bars['time'][0]) * 1000)
+        if not starts:
+            self._last_error = (-10003, "Os arquivos gravados estão vazios.")
+            return False
+
+        self._start_msc = min(starts)
+        self._started_at = self.clock()
+        self._last_error = (1, "Success")
+        return True
+
+    def last_error(self):
+        return self._last_error
+
+    def now_msc(self) -> int:
+        """Relógio da reprodução, em milissegundos."""
+        return self._start_msc + int((self.clock() - self._started_at) * 1000 * self.speed)
+
+    # --- Dados visíveis no relógio atual ---
+
+    def _visible_ticks(self) -> np.ndarray:
+        end = np.searchsorted(self._ticks['time_msc'], self.now_msc(), side='right')
+        return self._ticks[:end]
+
+    def _rates_between(self, start_ts: int, end_ts: int) -> np.ndarray:
+        """Candles M1 com abertura em [start_ts, end_ts], até o relógio atual."""
+        if self._bars is not None:
+            # Candles gravados: só os já fechados no relógio da reprodução
+            times = self._bars['time']
+            last_open = min(end_ts, self.now_msc() // 1000 - 60)
+            lo = np.searchsorted(times, start_ts, side='left')
+            hi = np.searchsorted(times, last_open, side='right')
+            return self._bars[lo:max(lo, hi)].copy()
+
+        ticks = self._visible_ticks()
+        times = ticks['time_msc']
+        lo = np.searchsorted(times, start_ts * 1000, side='left')
+        hi = np.searchsorted(times, end_ts // 60 * 60000 + 59999, side='right')
+        return ticks_to_m1(ticks[lo:hi])
+
+    # --- API do MetaTrader5 ---
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        check_m1(timeframe)
+        return self._rates_between(to_msc(date_from) // 1000, to_msc(date_to) // 1000)
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        check_m1(timeframe)
+        now_ts = self.now_msc() // 1000
+        first = (now_ts // 60 - start_pos - count + 1) * 60
+        rates = self._rates_between(first, now_ts)
+        if len(rates) == 0:
+            return np.empty(0, dtype=RATES_DTYPE)
+        return rates[max(len(rates) - start_pos - count, 0):len(rates) - start_pos]
+
+    def copy_ticks_from(self, symbol, date_from, count, flags):
+        ticks = self._visible_ticks()
+        start = np.searchsorted(ticks['time_msc'], to_msc(date_from), side='left')
+        return ticks[start:start + count].copy()
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags):
+        ticks = self._visible_ticks()
+        times = ticks['time_msc']
+        start = np.searchsorted(times, to_msc(date_from), side='left')
+        end = np.searchsorted(times, to_msc(date_to), side='right')
+        return ticks[start:end].copy()
+
+    def symbol_info_tick(self, symbol):
+        return last_tick(self._visible_ticks())
+
+    def symbol_info(self, symbol):
+        return SymbolInfo(symbol, f"{symbol} (reprodução)", 1, 0.5, 0.5, "USD")
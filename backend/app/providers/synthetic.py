@@ -0,0 +1,122 @@
+"""
+Provedor de dados sintéticos e determinísticos.
+
+Gera um tick a cada `tick_interval_ms` em qualquer instante (24 horas por
+dia), com preço definido apenas pelo horário e pela semente: ruído suave em
+várias escalas (dia, hora, minutos, segundos) somado a um ruído por tick.
+Como não há estado acumulado, qualquer intervalo é gerado diretamente e a
+mesma consulta sempre retorna os mesmos dados. O relógio é o horário real.
+"""
+
+import time
+from typing import Callable
+
+import numpy as np
+
+from .base import (TICKS_DTYPE, MarketDataProvider, SymbolInfo, check_m1,
+                   last_tick, ticks_to_m1, to_msc)
+
+# (período em ms, amplitude em pontos) de cada escala do ruído
+_SCALES = ((86_400_000, 60.0), (3_600_000, 20.0), (300_000, 6.0), (30_000, 2.0))
+
+def _hash_uniform(index: np.ndarray, salt: int) -> np.ndarray:
+    """Número pseudoaleatório em [-1, 1) para cada índice (hash splitmix64)."""
+    offset = np.uint64((salt * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF)
+    z = index.astype(np.uint64) + offset
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 52) - 1.0
+
+
+def _value_noise(t_ms: np.ndarray, period_ms: int, salt: int) -> np.ndarray:
+    """Ruído suave: interpola valores aleatórios sorteados a cada `period_ms`."""
+    cell = t_ms // period_ms
+    frac = (t_ms % period_ms) / period_ms
+    a = _hash_uniform(cell, salt)
+    b = _hash_uniform(cell + 1, salt)
+    return a + (b - a) * (frac * frac * (3 - 2 * frac))
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Gera ticks e candles M1 sintéticos em função do horário.
+
+    Args:
+        seed: Semente do ruído
+        base_price: Preço médio em torno do qual o preço oscila
+        tick_size: Tamanho mínimo de variação do preço
+        tick_interval_ms: Intervalo entre ticks, em milissegundos
+        clock: Relógio em epoch segundos (substituível para testes)
+    """
+
+    name = "synthetic"
+
+    def __init__(self, seed: int = 42, base_price: float = 5400.0, tick_size: float = 0.5,
+                 tick_interval_ms: int = 1000, clock: Callable[[], float] = time.time):
+        self.seed = seed
+        self.base_price = base_price
+        self.tick_size = tick_size
+        self.tick_interval_ms = tick_interval_ms
+        self.clock = clock
+
+    def initialize(self) -> bool:
+        return True
+
+    def _now_msc(self) -> int:
+        return int(self.clock() * 1000)
+
+    def _ticks_between(self, start_msc: int, end_msc: int) -> np.ndarray:
+        """Ticks com horário em [start_msc, end_msc], limitados ao relógio atual."""
+        step = self.tick_interval_ms
+        first = -(-start_msc // step)
+        last = min(end_msc, self._now_msc()) // step
+        if last < first:
+            return np.empty(0, dtype=TICKS_DTYPE)
+        index = np.arange(first, last + 1, dtype=np.int64)
+        t_ms = index * step
+
+        price = np.full(len(index), self.base_price)
+        for salt, (period, amplitude) in enumerate(_SCALES, start=self.seed * 8):
+            price += amplitude * _value_noise(t_ms, period, salt)
+        price += self.tick_size * _hash_uniform(index, self.seed * 8 + 7)
+        price = np.round(price / self.tick_size) * self.tick_size
+
+        trade = _hash_uniform(index, self.seed * 8 + 6) < 0.2
+        ticks = np.zeros(len(index), dtype=TICKS_DTYPE)
+        ticks['time_msc'] = t_ms
+        ticks['time'] = t_ms // 1000
+        ticks['bid'] = price
+        ticks['ask'] = price + self.tick_size
+        ticks['last'] = np.where(trade, price, 0.0)
+        ticks['volume'] = np.where(trade, 1 + (index % 10), 0)
+        ticks['volume_real'] = ticks['volume']
+        # Flags do MT5: BID|ASK (6) e, em negócios, LAST|VOLUME (8|16)
+        ticks['flags'] = np.where(trade, 6 | 8 | 16, 6)
+        return ticks
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        check_m1(timeframe)
+        end_msc = to_msc(date_to) // 60000 * 60000 + 59999
+        return ticks_to_m1(self._ticks_between(to_msc(date_from), end_msc))
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        check_m1(timeframe)
+        now_minute = self._now_msc() // 60000
+        first = (now_minute - start_pos - count + 1) * 60000
+        last = (now_minute - start_pos + 1) * 60000 - 1
+        return ticks_to_m1(self._ticks_between(first, last))
+
+    def copy_ticks_from(self, symbol, date_from, count, flags):
+        start = to_msc(date_from)
+        return self._ticks_between(start, start + count * self.tick_interval_ms)[:count]
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags):
+        return self._ticks_between(to_msc(date_from), to_msc(date_to))
+
+    def symbol_info_tick(self, symbol):
+        now = self._now_msc()
+        return last_tick(self._ticks_between(now - self.tick_interval_ms, now))
+
+    def symbol_info(self, symbol):
+        return SymbolInfo(symbol, f"{symbol} (sintético)", 1, self.tick_size, self.tick_size, "USD")
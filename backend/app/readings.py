@@ -0,0 +1,208 @@
+"""
+Servidor local de leituras das regiões capturadas pelo frontend PyQt.
+
+O frontend lê os números exibidos nas regiões PrecoCompra, PrecoVenda,
+FluxoCompra e FluxoVenda (ver `frontend_pyqt/price_ocr.py`) e os envia por
+TCP, como NDJSON, uma leitura por linha:
+
+    {"name": "PrecoCompra", "value": 5432.5, "ts": 1760630400123}
+
+`ts` é o horário da captura em milissegundos (epoch, UTC). O servidor escuta
+apenas em 127.0.0.1 e mantém em memória as últimas `READINGS_HISTORY`
+leituras de cada série, consultadas em `/api/readings`.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .log_config import RateLimitedLog
+from .metrics import readings_delay_seconds, readings_invalid_total, readings_received_total
+
+logger = logging.getLogger(__name__)
+# Um cliente com defeito pode mandar linhas inválidas a cada quadro
+_errors = RateLimitedLog(logger, interval=30.0)
+
+# Porta do servidor de leituras (a mesma do READINGS_PORT do frontend)
+READINGS_HOST = "127.0.0.1"
+READINGS_PORT = int(os.getenv("READINGS_PORT", 8765))
+# Leituras mantidas por série
+READINGS_HISTORY = int(os.getenv("READINGS_HISTORY", 10000))
+
+# Tamanho máximo de uma linha NDJSON
+_MAX_LINE_BYTES = 4096
+
+
+def parse_reading(line: bytes) -> Tuple[str, float, int]:
+    """
+    Converte uma linha NDJSON em leitura.
+
+    Returns:
+        tuple: (nome da série, valor, horário em epoch ms)
+
+    Raises:
+        ValueError: Se a linha não tiver o formato esperado
+    """
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        raise ValueError("a linha não é um objeto JSON")
+    name, value, ts = data.get("name"), data.get("value"), data.get("ts")
+    if not isinstance(name, str) or not name:
+        raise ValueError("campo 'name' ausente ou vazio")
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError("campo 'value' ausente ou não numérico")
+    if isinstance(ts, bool) or not isinstance(ts, int):
+        raise ValueError("campo 'ts' ausente ou não inteiro (epoch ms)")
+    return name, float(value), ts
+
+
+class ReadingsStore:
+    """
+    Últimas leituras de cada série, em ordem de chegada.
+
+    Args:
+        history: Leituras mantidas por série (as mais antigas são descartadas)
+    """
+
+    def __init__(self, history: int = READINGS_HISTORY):
+        self.history = history
+        self._series: Dict[str, Deque[Tuple[int, float]]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, value: float, ts: int):
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = deque(maxlen=self.history)
+            series.append((ts, value))
+
+    def latest(self) -> Dict[str, Dict[str, float]]:
+        """Última leitura de cada série: {nome: {"ts", "value"}}."""
+        with self._lock:
+            return {name: {"ts": series[-1][0], "value": series[-1][1]}
+                    for name, series in self._series.items() if series}
+
+    def get(self, name: str, since: Optional[int] = None, limit: Optional[int] = None) -> Optional[List[Tuple[int, float]]]:
+        """
+        Leituras de uma série.
+
+        Args:
+            name: Nome da série
+            since: Retorna apenas leituras com horário posterior (epoch ms)
+            limit: Retorna apenas as `limit` leituras mais recentes
+
+        Returns:
+            list ou None: Pares (ts, valor) em ordem de chegada, ou None se a série não existir
+        """
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return None
+            readings = list(series)
+        if since is not None:
+            readings = [reading for reading in readings if reading[0] > since]
+        if limit is not None:
+            readings = readings[-limit:] if limit > 0 else []
+        return readings
+
+
+class ReadingsServer:
+    """
+    Servidor TCP que recebe as leituras e as grava no `ReadingsStore`.
+
+    Args:
+        store: Destino das leituras
+        host, port: Endereço de escuta
+    """
+
+    def __init__(self, store: ReadingsStore, host: str = READINGS_HOST, port: int = READINGS_PORT):
+        self.store = store
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        """Começa a escutar; uma falha (ex: porta em uso) é registrada sem derrubar a aplicação."""
+        try:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=_MAX_LINE_BYTES)
+            logger.info(f"Servidor de leituras escutando em {self.host}:{self.port}")
+        except OSError as e:
+            logger.error(f"Não foi possível iniciar o servidor de leituras em {self.host}:{self.port}: {e}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        logger.info(f"Cliente de leituras conectado: {peer}")
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError:
+                    break  # Conexão encerrada
+                except asyncio.LimitOverrunError as e:
+                    readings_invalid_total.inc()
+                    _errors.warning("too_long", f"Linha de leitura acima de {_MAX_LINE_BYTES} bytes descartada")
+                    if not await self._discard_line(reader, e.consumed):
+                        break  # Conexão encerrada no meio da linha
+                    continue
+                self._ingest(line)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            logger.info(f"Cliente de leituras desconectado: {peer}")
+
+    @staticmethod
+    async def _discard_line(reader: asyncio.StreamReader, consumed: int) -> bool:
+        """
+        Descarta uma linha longa demais até a quebra de linha, inclusive.
+
+        O restante da linha não pode ser lido como uma nova linha (seria contado
+        de novo como inválido), então o descarte segue em pedaços de até
+        `_MAX_LINE_BYTES` até encontrar o '\\n'.
+
+        Args:
+            consumed: Bytes já examinados sem quebra de linha (`LimitOverrunError.consumed`)
+
+        Returns:
+            bool: False se a conexão terminou antes da quebra de linha
+        """
+        try:
+            while True:
+                await reader.readexactly(consumed)
+                try:
+                    await reader.readuntil(b"\n")
+                    return True
+                except asyncio.LimitOverrunError as e:
+                    consumed = e.consumed
+        except asyncio.IncompleteReadError:
+            return False
+
+    def _ingest(self, line: bytes):
+        if not line.strip():
+            return
+        try:
+            name, value, ts = parse_reading(line)
+        except ValueError as e:  # json.JSONDecodeError é um ValueError
+            readings_invalid_total.inc()
+            _errors.warning("invalid", f"Linha de leitura inválida descartada: {e}")
+            return
+        self.store.add(name, value, ts)
+        readings_received_total.labels(name).inc()
+        readings_delay_seconds.observe(max(0.0, time.time() - ts / 1000))
+
+
+# Instâncias globais (iniciadas no lifespan da aplicação)
+readings_store = ReadingsStore()
+readings_server = ReadingsServer(readings_store)
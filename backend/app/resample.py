@@ -0,0 +1,96 @@
+"""
+Reamostragem vetorizada de candles OHLC.
+
+Deriva qualquer timeframe a partir dos candles M1 armazenados, usando
+reduções por grupo do NumPy (`reduceat`). Os timeframes seguem o formato
+`<unidade><n>[@HH:MM]`:
+
+- `M<n>`: n minutos (ex: M1, M2, M3, M10)
+- `H<n>`: n horas (ex: H1, H2)
+- `D<n>`: n dias (ex: D1)
+- `@HH:MM` (opcional): âncora da sessão; os períodos passam a começar nesse
+  horário em vez da meia-noite (ex: `H2@09:00` gera 09:00, 11:00, 13:00...).
+"""
+
+import re
+from typing import Tuple
+
+import numpy as np
+
+# Expressão usada na validação dos parâmetros `timeframe` dos endpoints
+TIMEFRAME_REGEX = r"^[MHD][1-9][0-9]*(@[0-2][0-9]:[0-5][0-9])?$"
+
+_UNIT_SECONDS = {"M": 60, "H": 3600, "D": 86400}
+
+
+def parse_timeframe(timeframe: str) -> Tuple[int, int]:
+    """
+    Converte um timeframe em duração e deslocamento da âncora.
+
+    Args:
+        timeframe (str): Timeframe no formato `<unidade><n>[@HH:MM]` (ex: 'M5', 'H2@09:00')
+
+    Returns:
+        tuple: (duração do período em segundos, deslocamento da âncora em segundos)
+
+    Raises:
+        ValueError: Se o timeframe for inválido
+    """
+    if not re.match(TIMEFRAME_REGEX, timeframe):
+        raise ValueError(f"Timeframe inválido: '{timeframe}'. Use M<n>, H<n> ou D<n>, opcionalmente com @HH:MM.")
+
+    spec, _, anchor = timeframe.partition('@')
+    period = _UNIT_SECONDS[spec[0]] * int(spec[1:])
+
+    offset = 0
+    if anchor:
+        hours, minutes = (int(part) for part in anchor.split(':'))
+        if hours > 23:
+            raise ValueError(f"Âncora inválida: '{anchor}'.")
+        offset = (hours * 3600 + minutes * 60) % period
+    return period, offset
+
+
+def bucket_start(timestamp: int, period: int, offset: int = 0) -> int:
+    """
+    Retorna o início (epoch s) do período que contém `timestamp`.
+    """
+    return (timestamp - offset) // period * period + offset
+
+
+def resample_rates(rates: np.ndarray, period: int, offset: int = 0) -> np.ndarray:
+    """
+    Agrega candles ordenados por tempo em períodos de `period` segundos.
+
+    Args:
+        rates (np.ndarray): Candles de origem (array estruturado do MT5), ordenados por `time`
+        period (int): Duração do período de destino em segundos
+        offset (int): Deslocamento da âncora em segundos
+
+    Returns:
+        np.ndarray: Candles agregados, com o mesmo dtype da entrada
+    """
+    if len(rates) == 0:
+        return rates
+
+    times = rates['time']
+    buckets = (times - offset) // period * period + offset
+
+    # Índices onde cada grupo começa e termina (os dados já estão ordenados)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(rates)] - 1
+
+    out = np.empty(len(starts), dtype=rates.dtype)
+    out['time'] = buckets[starts]
+    out['open'] = rates['open'][starts]
+    out['high'] = np.maximum.reduceat(rates['high'], starts)
+    out['low'] = np.minimum.reduceat(rates['low'], starts)
+    out['close'] = rates['close'][ends]
+
+    names = rates.dtype.names
+    for field in ('tick_volume', 'real_volume'):
+        if field in names:
+            out[field] = np.add.reduceat(rates[field], starts)
+    if 'spread' in names:
+        out['spread'] = np.maximum.reduceat(rates['spread'], starts)
+    return out
@@ -0,0 +1,192 @@
+"""
+Cálculo vetorizado de linhas de sinal liga/desliga alinhadas aos candles.
+
+Usado pelo Fluxo Compra e demais fontes de sinais (ver `overlays`): um
+sinal "liga" abre um segmento que dura até o próximo sinal "desliga".
+Durante o segmento a linha fica no preço definido pela regra da fonte (por
+padrão, o fechamento do primeiro candle no início do segmento ou depois
+dele); fora dele, segue o fechamento de cada candle. O primeiro candle após o fim de um segmento
+mantém o preço do segmento, para que a linha termine na horizontal.
+
+Todas as etapas (pareamento dos sinais, busca do preço inicial e marcação
+de candles ativos) usam operações de array, sem laços em Python. Várias
+linhas (uma por fonte de sinais, com sua própria regra de preço) são
+calculadas juntas sobre o mesmo array de candles (`compute_signal_overlays`).
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from .log_config import RateLimitedLog
+
+logger = logging.getLogger(__name__)
+# O cálculo roda a cada ciclo das bombas ao vivo (ver `fluxo_stream`)
+_skipped = RateLimitedLog(logger, interval=60.0)
+
+
+def pair_segments(signal_times: np.ndarray, signal_is_on: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pareia sinais liga/desliga em segmentos [início, fim).
+
+    Sinais "liga" com o segmento já ativo e sinais "desliga" com o segmento
+    inativo são ignorados, como em uma máquina de estados que começa desligada.
+
+    Args:
+        signal_times (np.ndarray): Horários dos sinais (epoch s), em qualquer ordem
+        signal_is_on (np.ndarray): True para "liga" e False para "desliga"
+
+    Returns:
+        tuple: (inícios, fins) dos segmentos; o último fim falta se o último segmento
+        ainda estiver aberto (len(fins) == len(inícios) - 1)
+    """
+    order = np.argsort(signal_times, kind='stable')
+    times = signal_times[order]
+    is_on = signal_is_on[order]
+
+    # Só as mudanças de estado importam; o estado inicial é desligado
+    previous = np.r_[False, is_on[:-1]]
+    transitions = is_on != previous
+    times = times[transitions]
+
+    # As transições alternam liga, desliga, liga...
+    return times[0::2], times[1::2]
+
+
+# Regras de preço dos segmentos: (coluna do candle, deslocamento em relação ao
+# primeiro candle em ou após o início do segmento)
+PRICE_RULES: Dict[str, Tuple[str, int]] = {
+    "first_close": ("close", 0),  # fechamento do primeiro candle em ou após o início
+    "first_open": ("open", 0),    # abertura do primeiro candle em ou após o início
+    "prev_close": ("close", -1),  # fechamento do último candle antes do início
+}
+
+
+@dataclass
+class OverlaySignals:
+    """
+    Sinais de uma linha liga/desliga.
+
+    Args:
+        times: Horários dos sinais (epoch s), em qualquer ordem
+        is_on: True para "liga" e False para "desliga"
+        price_rule: Regra de preço dos segmentos (chave de `PRICE_RULES`)
+    """
+    times: np.ndarray
+    is_on: np.ndarray
+    price_rule: str = "first_close"
+
+
+def _segments(candle_times: np.ndarray, candle_prices: Mapping[str, np.ndarray],
+              overlay: OverlaySignals) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Segmentos de uma linha com o preço de cada um.
+
+    Returns:
+        tuple: (inícios, fins, preços), ordenados pelo início
+    """
+    starts, ends = pair_segments(overlay.times, overlay.is_on)
+    if len(ends) < len(starts):
+        # Último segmento ainda aberto: vai até o último candle (exclusivo)
+        ends = np.r_[ends, candle_times[-1]]
+
+    column, shift = PRICE_RULES[overlay.price_rule]
+    price_candle = np.searchsorted(candle_times, starts, side='left') + shift
+    valid = (price_candle >= 0) & (price_candle < len(candle_times))
+    if not valid.all():
+        # Candle do preço ainda não formado (sinal dentro do candle em formação):
+        # esperado na ponta ao vivo, o segmento aparece quando o candle chegar
+        pending = int((price_candle >= len(candle_times)).sum())
+        missing = int((~valid).sum()) - pending
+        if pending:
+            _skipped.log(logging.DEBUG, "pending", f"{pending} sinal(is) de início aguardando o candle do preço.")
+        if missing:
+            _skipped.warning("missing", f"{missing} sinal(is) de início ignorado(s) pois não há candle para o preço.")
+        starts, ends, price_candle = starts[valid], ends[valid], price_candle[valid]
+    return starts, ends, np.asarray(candle_prices[column], dtype=np.float64)[price_candle]
+
+
+def compute_signal_overlays(candle_times: np.ndarray, candle_prices: Mapping[str, np.ndarray],
+                            overlays: Sequence[OverlaySignals]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula várias linhas de sinal de uma vez, sobre o mesmo array de candles.
+
+    Os segmentos de todas as linhas são buscados em uma única `searchsorted`:
+    a chave (linha, horário) ordena os segmentos por linha e, dentro dela,
+    pelo início.
+
+    Args:
+        candle_times (np.ndarray): Horários dos candles (epoch s), ordenados
+        candle_prices (dict): Colunas de preço dos candles ('close' e as usadas pelas regras)
+        overlays (list): Sinais de cada linha
+
+    Returns:
+        tuple: (valores, ativos), arrays com uma linha por overlay e uma coluna por candle
+    """
+    n_lines, n_candles = len(overlays), len(candle_times)
+    closes = np.asarray(candle_prices['close'], dtype=np.float64)
+    values = np.tile(closes, (n_lines, 1))
+    active = np.zeros((n_lines, n_candles), dtype=bool)
+    if n_candles == 0 or n_lines == 0:
+        return values, active
+
+    parts = [
+        (line,) + _segments(candle_times, candle_prices, overlay)
+        for line, overlay in enumerate(overlays) if len(overlay.times) > 0
+    ]
+    parts = [part for part in parts if len(part[1]) > 0]
+    if not parts:
+        return values, active
+    owner = np.concatenate([np.full(len(part[1]), part[0]) for part in parts])
+    starts = np.concatenate([part[1] for part in parts])
+    ends = np.concatenate([part[2] for part in parts])
+    prices = np.concatenate([part[3] for part in parts])
+
+    # Chave (linha, horário): horários relativos a t0, cada linha em uma faixa de `span`
+    t0 = min(int(candle_times[0]), int(starts.min()))
+    span = max(int(candle_times[-1]), int(starts.max())) - t0 + 1
+    keys = owner * span + (starts - t0)
+    lines = np.arange(n_lines)[:, None]
+    queries = lines * span + (candle_times - t0)[None, :]
+
+    # Segmento candidato de cada candle: o último da mesma linha que começou até o seu horário
+    segment = np.searchsorted(keys, queries, side='right') - 1
+    has_segment = segment >= 0
+    segment = np.where(has_segment, segment, 0)
+    has_segment &= owner[segment] == lines
+    active = has_segment & (candle_times[None, :] < ends[segment])
+
+    segment_price = prices[segment]
+    values[active] = segment_price[active]
+
+    # O primeiro candle fora de um segmento mantém o preço do segmento anterior
+    held = np.zeros_like(active)
+    held[:, 1:] = active[:, :-1] & ~active[:, 1:]
+    previous_price = np.full_like(segment_price, np.nan)
+    previous_price[:, 1:] = segment_price[:, :-1]
+    values[held] = previous_price[held]
+    return values, active
+
+
+def compute_signal_overlay(candle_times: np.ndarray, candle_closes: np.ndarray,
+                           signal_times: np.ndarray, signal_is_on: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula o valor e o estado ativo da linha de sinal para cada candle.
+
+    Preço do segmento: fechamento do primeiro candle em ou após o início
+    (regra `first_close`; ver `compute_signal_overlays` para as demais).
+
+    Args:
+        candle_times (np.ndarray): Horários dos candles (epoch s), ordenados
+        candle_closes (np.ndarray): Fechamentos dos candles
+        signal_times (np.ndarray): Horários dos sinais (epoch s)
+        signal_is_on (np.ndarray): True para "liga" e False para "desliga"
+
+    Returns:
+        tuple: (valores, ativos) com um elemento por candle
+    """
+    values, active = compute_signal_overlays(
+        candle_times, {'close': candle_closes}, [OverlaySignals(signal_times, signal_is_on)])
+    return values[0], active[0]
@@ -0,0 +1,347 @@
+"""
+Armazenamento indexado dos arquivos de sinais (Fluxo Compra, Fluxo Venda...).
+
+Os arquivos `{SÍMBOLO}_{TAG}_{AAAA-MM-DD}.csv` do diretório de dados (ex:
+`WDO_FC_2025-10-16.csv`) são lidos uma única vez e mantidos em memória, por
+tag e símbolo, como arrays ordenados por horário (epoch s, UTC). Cada consulta revarre o diretório (apenas `stat` dos
+arquivos, via `os.scandir`) e relê somente os arquivos novos ou alterados
+(mtime + tamanho); arquivos removidos saem do índice.
+
+Os arquivos são escritos por acréscimo durante o pregão, então um arquivo
+que cresceu é lido apenas a partir do último byte já processado. Uma linha
+final ainda sem quebra de linha é considerada provisória: seus sinais
+entram no índice, mas ela é relida na próxima atualização. Um arquivo que
+diminuiu, foi substituído (outro inode) ou teve o trecho já lido alterado
+é relido por inteiro. A reescrita é conferida de forma barata: apenas a
+última linha completa já lida é relida e comparada por CRC32.
+
+Consultas de intervalo (um ou vários dias) usam busca binária
+(`np.searchsorted`) sobre os horários, sem reabrir nenhum CSV.
+"""
+
+import logging
+import os
+import re
+import threading
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+import pytz
+
+logger = logging.getLogger(__name__)
+
+# Diretório dos arquivos de sinais (backend/data), configurável via FC_DATA_DIR
+FC_DATA_DIR = os.getenv("FC_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data"))
+
+# Nome dos arquivos de sinais: WDO_FC_2025-10-16.csv (tag FC = Fluxo Compra)
+SIGNAL_FILENAME_REGEX = re.compile(r"^(?P<symbol>[^_]+)_(?P<tag>[A-Z]+)_(?P<date>\d{4}-\d{2}-\d{2})\.csv$")
+
+# Tag dos arquivos do Fluxo Compra
+FC_TAG = "FC"
+
+# Fuso horário das colunas DATA/HORA dos arquivos (horário da B3)
+FC_TIMEZONE = "America/Sao_Paulo"
+# Pregão coberto pela linha do Fluxo Compra (horário local)
+FC_SESSION_START = time(9, 0)
+FC_SESSION_END = time(18, 30)
+
+_UNIX_EPOCH = pd.Timestamp("1970-01-01", tz="UTC")
+_EMPTY_TIMES = np.empty(0, dtype=np.int64)
+_EMPTY_TYPES = np.empty(0, dtype=object)
+
+
+def base_symbol(symbol: str) -> str:
+    """Símbolo usado nos nomes dos arquivos (ex: 'WDO$N' -> 'WDO')."""
+    return symbol.split('$')[0]
+
+
+def session_bounds(day: date) -> Tuple[datetime, datetime, int, int]:
+    """
+    Intervalos de um dia de Fluxo Compra.
+
+    Args:
+        day (date): Dia local (São Paulo)
+
+    Returns:
+        tuple: (início e fim do pregão em UTC, início e fim do dia inteiro em epoch s),
+        usados para os candles e para os sinais, respectivamente
+    """
+    tz = pytz.timezone(FC_TIMEZONE)
+    session_start = tz.localize(datetime.combine(day, FC_SESSION_START)).astimezone(pytz.utc)
+    session_end = tz.localize(datetime.combine(day, FC_SESSION_END)).astimezone(pytz.utc)
+    day_start = tz.localize(datetime.combine(day, time(0, 0)))
+    day_end = tz.localize(datetime.combine(day + timedelta(days=1), time(0, 0)))
+    return session_start, session_end, int(day_start.timestamp()), int(day_end.timestamp())
+
+
+def local_day(timestamp: int) -> date:
+    """Dia local (São Paulo) de um horário em epoch s."""
+    return datetime.fromtimestamp(timestamp, tz=pytz.utc).astimezone(pytz.timezone(FC_TIMEZONE)).date()
+
+
+def signal_window(start_utc: datetime, end_utc: datetime) -> Tuple[int, int]:
+    """
+    Sinais considerados para um intervalo de candles: os dias locais inteiros que ele toca.
+
+    Segue `session_bounds`: um LIGA anterior ao início do gráfico, no mesmo
+    dia, ainda abre o segmento da linha.
+
+    Returns:
+        tuple: (início do primeiro dia, fim do último dia) em epoch s
+    """
+    first_day = local_day(int(start_utc.timestamp()))
+    # Fim exclusivo: um intervalo que termina à meia-noite não inclui o dia seguinte
+    last_day = local_day(max(int(start_utc.timestamp()), int(end_utc.timestamp()) - 1))
+    return session_bounds(first_day)[2], session_bounds(last_day)[3]
+
+
+def parse_signal_lines(lines: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converte linhas `DATA,HORA,SINAL` (sem o cabeçalho) em arrays.
+
+    Args:
+        lines (list): Linhas do CSV (ex: '2025.10.16,09:00:31,LIGA_COMPRA')
+
+    Returns:
+        tuple: (horários em epoch s UTC, tipos dos sinais), na ordem das linhas
+
+    Raises:
+        ValueError: Se alguma linha não tiver o formato esperado
+    """
+    fields = [line.split(',') for line in lines]
+    if any(len(row) != 3 for row in fields):
+        raise ValueError("linha com número de colunas diferente de 3 (DATA,HORA,SINAL)")
+    if not fields:
+        return _EMPTY_TIMES, _EMPTY_TYPES
+    data, hora, sinal = (np.array(column, dtype=object) for column in zip(*fields))
+    # Horário local de São Paulo, convertido para UTC epoch seconds
+    naive_datetime = pd.to_datetime(pd.Series(data + ' ' + hora), format='%Y.%m.%d %H:%M:%S')
+    utc_datetime = naive_datetime.dt.tz_localize(FC_TIMEZONE).dt.tz_convert('UTC')
+    times = ((utc_datetime - _UNIX_EPOCH) // pd.Timedelta(seconds=1)).to_numpy(np.int64)
+    return times, np.array([value.strip() for value in sinal], dtype=object)
+
+
+def _split_chunk(chunk: bytes) -> Tuple[List[str], str, int]:
+    """
+    Separa um trecho do arquivo em linhas completas e a linha final sem quebra.
+
+    Returns:
+        tuple: (linhas completas não vazias, linha final provisória, bytes consumidos)
+    """
+    end = chunk.rfind(b"\n") + 1
+    complete = chunk[:end].decode("utf-8-sig").splitlines()
+    lines = [line.strip() for line in complete]
+    # O cabeçalho só aparece no início do arquivo, mas é descartado onde estiver
+    lines = [line for line in lines if line and not line.startswith("DATA,")]
+    fragment = chunk[end:].decode("utf-8-sig", errors="replace").strip()
+    if fragment.startswith("DATA,"):
+        fragment = ""
+    return lines, fragment, end
+
+
+@dataclass
+class _FileEntry:
+    """
+    Sinais de um arquivo e a posição até onde ele já foi lido.
+
+    Args:
+        signature: (mtime, tamanho) da última leitura
+        inode: Inode do arquivo lido (outro inode = arquivo substituído)
+        offset: Bytes já processados (apenas linhas completas)
+        tail_length: Tamanho da última linha completa já processada (termina em `offset`)
+        tail_crc: CRC32 dessa linha
+        committed_times, committed_types: Sinais das linhas completas
+        times, types: Sinais das linhas completas e da linha final provisória
+    """
+    signature: Tuple[int, int]
+    inode: int = 0
+    offset: int = 0
+    tail_length: int = 0
+    tail_crc: int = 0
+    committed_times: np.ndarray = field(default_factory=lambda: _EMPTY_TIMES)
+    committed_types: np.ndarray = field(default_factory=lambda: _EMPTY_TYPES)
+    times: np.ndarray = field(default_factory=lambda: _EMPTY_TIMES)
+    types: np.ndarray = field(default_factory=lambda: _EMPTY_TYPES)
+
+
+@dataclass
+class _SymbolSignals:
+    """
+    Índice de uma série (tag + símbolo): sinais de todos os arquivos, ordenados por horário.
+
+    Args:
+        files: Arquivos do símbolo por data (AAAA-MM-DD)
+        times: Horários (epoch s) de todos os sinais, ordenados
+        types: Tipos dos sinais (ex: 'LIGA_COMPRA'), na mesma ordem de `times`
+        version: Identifica o conteúdo atual (muda quando algum arquivo muda)
+    """
+    files: Dict[str, _FileEntry] = field(default_factory=dict)
+    # Arrays não podem ser padrão de dataclass (Python 3.11+); os vazios são compartilhados
+    times: np.ndarray = field(default_factory=lambda: _EMPTY_TIMES)
+    types: np.ndarray = field(default_factory=lambda: _EMPTY_TYPES)
+    version: str = ""
+
+    def rebuild(self):
+        dates = sorted(self.files)
+        if not dates:
+            self.times, self.types, self.version = _EMPTY_TIMES, _EMPTY_TYPES, ""
+            return
+        times = np.concatenate([self.files[d].times for d in dates])
+        types = np.concatenate([self.files[d].types for d in dates])
+        # Ordenação estável: sinais no mesmo segundo mantêm a ordem do arquivo
+        order = np.argsort(times, kind='stable')
+        self.times, self.types = times[order], types[order]
+        self.version = ";".join(f"{d}:{self.files[d].signature[0]}:{self.files[d].signature[1]}" for d in dates)
+
+
+class SignalStore:
+    """
+    Índice em memória dos arquivos de sinais, atualizado por mtime.
+
+    Args:
+        data_dir: Diretório dos arquivos `{SÍMBOLO}_{TAG}_{AAAA-MM-DD}.csv`
+    """
+
+    def __init__(self, data_dir: str = FC_DATA_DIR):
+        self.data_dir = data_dir
+        # (tag, símbolo base) -> sinais
+        self._symbols: Dict[Tuple[str, str], _SymbolSignals] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> Set[Tuple[str, str]]:
+        """
+        Lê os trechos novos dos arquivos alterados e remove do índice os que sumiram.
+
+        Returns:
+            set: Séries (tag, símbolo base), ex: ('FC', 'WDO'), cujos sinais mudaram
+        """
+        found: Dict[Tuple[str, str], Dict[str, Tuple[str, Tuple[int, int], int]]] = {}
+        try:
+            with os.scandir(self.data_dir) as entries:
+                for entry in entries:
+                    match = SIGNAL_FILENAME_REGEX.match(entry.name)
+                    if match is None or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    found.setdefault((match['tag'], match['symbol']), {})[match['date']] = (
+                        entry.path, (stat.st_mtime_ns, stat.st_size), stat.st_ino)
+        except OSError as e:
+            logger.error(f"Erro ao listar o diretório de sinais {self.data_dir}: {e}")
+            return set()
+
+        changed = set()
+        with self._lock:
+            for key in list(self._symbols):
+                if key not in found:
+                    del self._symbols[key]
+                    changed.add(key)
+
+            for key, files in found.items():
+                signals = self._symbols.setdefault(key, _SymbolSignals())
+                symbol_changed = False
+                for date in list(signals.files):
+                    if date not in files:
+                        del signals.files[date]
+                        symbol_changed = True
+                for date, (path, signature, inode) in files.items():
+                    entry = signals.files.get(date)
+                    if entry is not None and entry.signature == signature and entry.inode == inode:
+                        continue
+                    if entry is None or signature[1] < entry.offset or inode != entry.inode:
+                        # Arquivo novo, truncado ou substituído: lê desde o início
+                        entry = _FileEntry(signature, inode)
+                    signals.files[date] = self._read(path, entry, signature)
+                    symbol_changed = True
+                if symbol_changed:
+                    signals.rebuild()
+                    changed.add(key)
+        return changed
+
+    @staticmethod
+    def _read(path: str, entry: _FileEntry, signature: Tuple[int, int]) -> _FileEntry:
+        """
+        Lê o arquivo a partir de `entry.offset`, acrescentando os novos sinais.
+
+        A última linha completa já processada é relida e conferida pelo CRC32:
+        se mudou (arquivo reescrito, mesmo sem diminuir), o arquivo é relido
+        desde o início. Com erro, o arquivo fica com os sinais já lidos até ser
+        alterado novamente.
+        """
+        filename = os.path.basename(path)
+        entry.signature = signature
+        try:
+            with open(path, 'rb') as f:
+                if entry.offset:
+                    f.seek(entry.offset - entry.tail_length)
+                    if zlib.crc32(f.read(entry.tail_length)) != entry.tail_crc:
+                        logger.info(f"Arquivo {filename} reescrito, relendo desde o início.")
+                        entry = _FileEntry(signature, entry.inode)
+                        f.seek(0)
+                chunk = f.read()
+            lines, fragment, consumed = _split_chunk(chunk)
+            times, types = parse_signal_lines(lines)
+            try:
+                pending_times, pending_types = parse_signal_lines([fragment] if fragment else [])
+            except ValueError:
+                # Linha final ainda sendo escrita: fica para a próxima leitura
+                pending_times, pending_types = _EMPTY_TIMES, _EMPTY_TYPES
+        except Exception as e:
+            logger.error(f"Erro ao processar o arquivo CSV {filename}: {e}")
+            return entry
+
+        if entry.offset == 0:
+            logger.info(f"Arquivo {filename} lido com sucesso, {len(times) + len(pending_times)} sinais encontrados.")
+        elif len(times) or len(pending_times):
+            logger.info(f"{len(times) + len(pending_times)} novo(s) sinal(is) no arquivo {filename}.")
+        if consumed:
+            # Última linha completa do trecho (termina no '\n' em consumed - 1)
+            tail_start = chunk.rfind(b'\n', 0, consumed - 1) + 1
+            entry.tail_length = consumed - tail_start
+            entry.tail_crc = zlib.crc32(chunk[tail_start:consumed])
+        entry.offset += consumed
+        entry.committed_times = np.concatenate([entry.committed_times, times])
+        entry.committed_types = np.concatenate([entry.committed_types, types])
+        entry.times = np.concatenate([entry.committed_times, pending_times])
+        entry.types = np.concatenate([entry.committed_types, pending_types])
+        return entry
+
+    def get_signals(self, symbol: str, start_ts: int, end_ts: int,
+                    tag: str = FC_TAG) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retorna os sinais do símbolo com horário em [start_ts, end_ts).
+
+        Args:
+            symbol (str): Símbolo do ativo (ex: 'WDO' ou 'WDO$N')
+            start_ts (int): Início do intervalo (epoch s)
+            end_ts (int): Fim do intervalo (epoch s, exclusivo)
+            tag (str): Tag dos arquivos (ex: 'FC' para o Fluxo Compra)
+
+        Returns:
+            tuple: (horários, tipos) ordenados por horário
+        """
+        with self._lock:
+            signals = self._symbols.get((tag, base_symbol(symbol)))
+            if signals is None:
+                return _EMPTY_TIMES, _EMPTY_TYPES
+            first = np.searchsorted(signals.times, start_ts, side='left')
+            last = np.searchsorted(signals.times, end_ts, side='left')
+            return signals.times[first:last], signals.types[first:last]
+
+    def version(self, symbol: str, tag: str = FC_TAG) -> Optional[str]:
+        """
+        Versão dos sinais do símbolo (datas, mtimes e tamanhos dos arquivos), para ETags.
+
+        Returns:
+            str ou None: None se não houver arquivos do símbolo com a tag
+        """
+        with self._lock:
+            signals = self._symbols.get((tag, base_symbol(symbol)))
+            return signals.version if signals is not None else None
+
+
+# Instância global do armazenamento de sinais
+signal_store = SignalStore()
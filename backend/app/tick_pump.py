@@ -0,0 +1,162 @@
+"""
+Bomba de ticks em tempo real por símbolo.
+
+Lê os ticks do MT5 de forma incremental com `copy_ticks_from`, a partir de
+um cursor no último tick já enviado (`time_msc`), e publica em cada ciclo
+um único lote com todos os ticks novos, em formato colunar compacto:
+
+    {"type": "ticks", "data": {"t": [...], "b": [...], "a": [...], "l": [...], "v": [...], "f": [...]}}
+
+onde `t` é o horário em milissegundos (epoch), `b`/`a`/`l` são bid, ask e
+último preço, `v` o volume e `f` as flags do tick no MT5.
+
+Como `copy_ticks_from` recebe o início em segundos, cada leitura recomeça no
+segundo do cursor e descarta os ticks já enviados, inclusive os que têm o
+mesmo `time_msc` do cursor. A quantidade pedida soma aos
+`MAX_TICKS_PER_READ` os ticks já vistos nesse segundo, para que um segundo
+com mais ticks que o limite não prenda o cursor sempre na mesma página.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from . import latency, mt5_connector
+from .log_config import RateLimitedLog
+
+logger = logging.getLogger(__name__)
+# Erros repetidos a cada ciclo (ex: MT5 fora do ar) são registrados no máximo a cada 30 s
+_errors = RateLimitedLog(logger, interval=30.0)
+
+# Máximo de ticks por leitura; se a leitura vier cheia, a próxima é feita sem espera
+MAX_TICKS_PER_READ = 10000
+
+
+class TickPump:
+    """
+    Lê os ticks novos de um símbolo e publica um lote por ciclo.
+
+    Args:
+        symbol: Símbolo do ativo (ex: 'WDOV25')
+        publish: Corrotina chamada com (mensagem, canal, chave de coalescência, seq)
+        channel: Canal de destino dos lotes
+        interval: Intervalo entre leituras do MT5, em segundos
+    """
+
+    def __init__(self, symbol: str, publish: Callable[[str, str, Optional[str], Optional[int]], Awaitable[None]],
+                 channel: str, interval: float = 0.1):
+        self.symbol = symbol
+        self.publish = publish
+        self.channel = channel
+        self.interval = interval
+        # Cursor: horário (ms) do último tick enviado e quantos ticks já foram enviados nesse ms
+        self._cursor_msc: Optional[int] = None
+        self._sent_at_cursor = 0
+        # Ticks do segundo do cursor até o cursor (inclusive), já vistos nas leituras
+        self._seen_in_second = 0
+        self._sampler = latency.LatencySampler()
+
+    def _seed_cursor(self, mt5) -> bool:
+        """
+        Posiciona o cursor no último tick conhecido, para transmitir apenas ticks novos.
+        """
+        tick = mt5.symbol_info_tick(self.symbol)
+        if tick is None:
+            return False
+        self._cursor_msc = int(tick.time_msc)
+        # Os ticks anteriores ao início da transmissão não são enviados
+        self._sent_at_cursor = 1 << 31
+        self._seen_in_second = 0
+        return True
+
+    def _read_count(self) -> int:
+        """Ticks pedidos por leitura: os já vistos no segundo do cursor mais um lote novo."""
+        return self._seen_in_second + MAX_TICKS_PER_READ
+
+    def _read(self, mt5, count: int) -> Optional[np.ndarray]:
+        """
+        Lê os ticks a partir do segundo do cursor (executado na thread do MT5).
+        """
+        date_from = datetime.fromtimestamp(self._cursor_msc // 1000, tz=timezone.utc)
+        return mt5.copy_ticks_from(self.symbol, date_from, count, mt5.COPY_TICKS_ALL)
+
+    def _new_ticks(self, ticks: np.ndarray) -> np.ndarray:
+        """
+        Descarta os ticks já enviados e avança o cursor.
+        """
+        times = ticks['time_msc']
+        after = ticks[times > self._cursor_msc]
+        same = ticks[times == self._cursor_msc]
+        if len(same) > self._sent_at_cursor:
+            # Ticks do mesmo milissegundo do cursor que chegaram depois da última leitura
+            new = np.concatenate([same[self._sent_at_cursor:], after])
+            self._sent_at_cursor = len(same)
+        else:
+            new = after
+
+        if len(after) > 0:
+            self._cursor_msc = int(after['time_msc'][-1])
+            self._sent_at_cursor = int(np.count_nonzero(after['time_msc'] == self._cursor_msc))
+        # A leitura começa no segundo do cursor, então conta todos os ticks dele até o cursor
+        second_start = self._cursor_msc - self._cursor_msc % 1000
+        self._seen_in_second = int(np.count_nonzero((times >= second_start) & (times <= self._cursor_msc)))
+        return new
+
+    @staticmethod
+    def to_message(ticks: np.ndarray) -> dict:
+        """Monta a mensagem `ticks` com as colunas do lote."""
+        data = {
+            "t": ticks['time_msc'].astype(np.int64).tolist(),
+            "b": ticks['bid'].tolist(),
+            "a": ticks['ask'].tolist(),
+            "l": ticks['last'].tolist(),
+            "v": ticks['volume'].astype(np.int64).tolist(),
+            "f": ticks['flags'].astype(np.int64).tolist(),
+        }
+        return {"type": "ticks", "data": data}
+
+    async def run(self):
+        """Laço principal: uma leitura incremental e no máximo um lote por ciclo."""
+        while True:
+            try:
+                mt5 = mt5_connector.get_mt5_instance()
+                if not mt5_connector.is_connected():
+                    await asyncio.sleep(5)
+                    continue
+
+                if self._cursor_msc is None:
+                    if not await mt5_connector.run_mt5(self._seed_cursor, mt5):
+                        await asyncio.sleep(1)
+                        continue
+
+                # Origem: início da leitura, no relógio local. O `time_msc` dos ticks é o
+                # horário do servidor da corretora (ou o histórico, em replay) e não é
+                # comparável com os demais horários das etapas
+                source_ms = latency.now_ms()
+                read_started = time.perf_counter()
+                count = self._read_count()
+                ticks = await mt5_connector.run_mt5(self._read, mt5, count)
+                latency.observe(latency.STAGE_SOURCE_READ, time.perf_counter() - read_started)
+                backlog = False
+                if ticks is not None and len(ticks) > 0:
+                    new = self._new_ticks(ticks)
+                    if len(new) > 0:
+                        message = self.to_message(new)
+                        seq = self._sampler.stamp(message, source_ms)
+                        await self.publish(latency.serialize(message), self.channel, None, seq)
+                    # Mesmo sem ticks novos, a próxima leitura pede mais (os vistos no segundo cresceram)
+                    backlog = len(ticks) >= count
+
+                # Se a leitura veio cheia, ainda há ticks acumulados: lê de novo em seguida
+                await asyncio.sleep(0 if backlog else self.interval)
+
+            except asyncio.CancelledError:
+                logger.info("Bomba de ticks para %s foi cancelada.", self.symbol)
+                break
+            except Exception as e:
+                _errors.error(f"{self.symbol}:{type(e).__name__}", "Erro na bomba de ticks para %s: %s", self.symbol, e)
+                await asyncio.sleep(10)
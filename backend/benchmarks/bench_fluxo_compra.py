@@ -0,0 +1,100 @@
+"""
+Micro-benchmark do alinhamento vetorizado do Fluxo Compra.
+
+Gera vários dias de candles M1 e milhares de sinais LIGA/DESLIGA aleatórios,
+confere o resultado contra a implementação anterior (laço em Python) em uma
+amostra menor e mede o tempo de `compute_signal_overlay`.
+
+Uso (a partir do diretório backend):
+    python benchmarks/bench_fluxo_compra.py --days 10 --signals 5000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.signal_overlay import compute_signal_overlay  # noqa: E402
+
+
+def make_data(days: int, n_signals: int, seed: int = 42):
+    """Gera candles M1 contínuos e sinais aleatórios (com repetições) no mesmo intervalo."""
+    rng = np.random.default_rng(seed)
+    start = 1_760_000_000 - 1_760_000_000 % 86400
+    candle_times = start + 60 * np.arange(days * 24 * 60, dtype=np.int64)
+    candle_closes = 5000 + np.cumsum(rng.normal(0, 1, len(candle_times)))
+    signal_times = rng.integers(candle_times[0] - 600, candle_times[-1] + 600, n_signals)
+    signal_is_on = rng.random(n_signals) < 0.5
+    return candle_times, candle_closes, signal_times, signal_is_on
+
+
+def reference_overlay(candle_times, candle_closes, signal_times, signal_is_on):
+    """Implementação anterior (laço por candle e por segmento), usada como referência."""
+    signals = sorted(zip(signal_times.tolist(), signal_is_on.tolist()), key=lambda s: s[0])
+    segments, is_active, start = [], False, None
+    times, closes = candle_times.tolist(), candle_closes.tolist()
+
+    def first_close(t):
+        for ct, c in zip(times, closes):
+            if ct >= t:
+                return c
+        return None
+
+    for t, on in signals:
+        if on and not is_active:
+            is_active, start = True, t
+        elif not on and is_active:
+            is_active = False
+            price = first_close(start)
+            if price is not None:
+                segments.append((start, t, price))
+    if is_active:
+        price = first_close(start)
+        if price is not None:
+            segments.append((start, times[-1], price))
+
+    values, active, held_price = [], [], None
+    for t, c in zip(times, closes):
+        value, in_segment = c, False
+        for s, e, p in segments:
+            if s <= t < e:
+                value, in_segment, held_price = p, True, p
+                break
+        if not in_segment and held_price is not None:
+            value, held_price = held_price, None
+        values.append(value)
+        active.append(in_segment)
+    return np.array(values), np.array(active)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=10, help="Dias de candles M1 (24h por dia)")
+    parser.add_argument("--signals", type=int, default=5000, help="Quantidade de sinais")
+    parser.add_argument("--repeat", type=int, default=50, help="Repetições da medição")
+    args = parser.parse_args()
+
+    # Sinais após o último candle são esperados nos dados aleatórios
+    logging.disable(logging.WARNING)
+
+    # Conferência de equivalência com a implementação anterior
+    sample = make_data(days=1, n_signals=200, seed=7)
+    expected_values, expected_active = reference_overlay(*sample)
+    values, active = compute_signal_overlay(*sample)
+    assert np.array_equal(active, expected_active), "Flags 'active' divergem da referência"
+    assert np.allclose(values, expected_values), "Valores divergem da referência"
+
+    data = make_data(args.days, args.signals)
+    timings = timeit.repeat(lambda: compute_signal_overlay(*data), number=1, repeat=args.repeat)
+    timings_ms = np.array(timings) * 1000
+
+    print(f"candles={len(data[0])} sinais={len(data[2])}")
+    print(f"min={timings_ms.min():.3f} ms  mediana={np.median(timings_ms):.3f} ms  max={timings_ms.max():.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
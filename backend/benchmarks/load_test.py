@@ -0,0 +1,431 @@
+"""
+Teste de carga de ponta a ponta do backend FastAPI.
+
+Inicia `app.main:app` com o Uvicorn em um processo separado, usando um
+provedor de dados sem MT5 (`synthetic` ou `replay`), e gera ao mesmo tempo:
+- N assinantes WebSocket distribuídos pelos canais `symbol-timeframe`
+  (e, opcionalmente, pelos canais de ticks);
+- requisições paralelas a `/api/history` (JSON e colunar);
+- envios periódicos para `/api/markers`.
+
+Os assinantes respondem às mensagens amostradas com `ack`, como o cliente
+web; a latência das mensagens é medida da origem (`ts.src`) até a recepção.
+
+Mede latências (p50/p99), mensagens por segundo e memória por conexão
+(RSS do servidor) e grava o resultado em JSON em `benchmarks/results`,
+para comparar entre commits com `--compare`.
+
+Dependências (além das do backend): `pip install -r benchmarks/requirements.txt`
+
+Uso (a partir do diretório backend):
+    python benchmarks/load_test.py --clients 200 --symbols 5 --duration 30
+    python benchmarks/load_test.py --provider replay --replay-ticks data/ticks/WDOV25_2025-10-16.npy --replay-speed 100
+    python benchmarks/load_test.py --compare benchmarks/results/load_20251016-120000_abc1234.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import httpx
+import numpy as np
+import websockets
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+TIMEFRAMES = ["M1", "M5", "M15", "H1", "D1"]
+COLUMNAR_MEDIA_TYPE = "application/x-ohlc-columnar"
+
+
+@dataclass
+class Stats:
+    """Contadores e latências (em ms) de um tipo de tráfego."""
+    latencies: List[float] = field(default_factory=list)
+    count: int = 0
+    errors: int = 0
+    bytes: int = 0
+
+    def summary(self, duration: float) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "per_sec": round(self.count / duration, 2),
+            "bytes_per_sec": round(self.bytes / duration, 1),
+            "latency_ms": percentiles(self.latencies),
+        }
+
+
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"p50": None, "p99": None, "max": None}
+    data = np.asarray(values)
+    return {
+        "p50": round(float(np.percentile(data, 50)), 3),
+        "p99": round(float(np.percentile(data, 99)), 3),
+        "max": round(float(data.max()), 3),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_kb(pid: int) -> Optional[int]:
+    """Memória residente do processo, em KiB (Linux via /proc; senão psutil, se instalado)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss // 1024
+    except Exception:
+        return None
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+# --- Servidor ---
+
+class Server:
+    """Processo do Uvicorn com o backend, isolado em um diretório temporário."""
+
+    def __init__(self, args):
+        self.args = args
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.ws_url = f"ws://127.0.0.1:{self.port}"
+        self.process: Optional[subprocess.Popen] = None
+        self._workdir = tempfile.TemporaryDirectory(prefix="load_test_")
+
+    def __enter__(self):
+        env = dict(os.environ)
+        env["MARKET_DATA_PROVIDER"] = self.args.provider
+        env["BARS_DIR"] = os.path.join(self._workdir.name, "bars")
+        if self.args.replay_ticks:
+            env["REPLAY_TICKS"] = os.path.abspath(self.args.replay_ticks)
+        env["REPLAY_SPEED"] = str(self.args.replay_speed)
+        env["STREAM_SAMPLE_EVERY"] = str(self.args.sample_every)
+
+        # Diretório de trabalho temporário: logs e armazenamento não sujam o repositório
+        self._log = open(os.path.join(self._workdir.name, "server.log"), "w")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", BACKEND_DIR,
+             "--host", "127.0.0.1", "--port", str(self.port), "--log-level", "warning"],
+            cwd=self._workdir.name, env=env, stdout=self._log, stderr=subprocess.STDOUT,
+        )
+        self._wait_ready()
+        return self
+
+    def _wait_ready(self, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"O servidor terminou ao iniciar (código {self.process.returncode}).")
+            try:
+                status = httpx.get(f"{self.base_url}/mt5-status", timeout=1.0).json()
+                if status.get("connected"):
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("O servidor não ficou pronto a tempo.")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+        self._workdir.cleanup()
+
+
+# --- Geradores de carga ---
+
+async def ws_subscriber(url: str, connect_stats: Stats, message_stats: Stats,
+                        connected: asyncio.Event, measuring: asyncio.Event, stop: asyncio.Event,
+                        pending: list):
+    def mark_done():
+        pending[0] -= 1
+        if pending[0] == 0:
+            connected.set()
+
+    started = time.perf_counter()
+    is_connected = False
+    try:
+        async with websockets.connect(url, max_size=None, open_timeout=30) as ws:
+            connect_stats.latencies.append((time.perf_counter() - started) * 1000)
+            connect_stats.count += 1
+            is_connected = True
+            mark_done()
+            while not stop.is_set():
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                if measuring.is_set():
+                    message_stats.count += 1
+                    message_stats.bytes += len(message)
+                    if b'"seq"' in message:
+                        await ack_sampled(ws, message, message_stats)
+    except Exception:
+        if is_connected:
+            message_stats.errors += 1
+        else:
+            connect_stats.errors += 1
+            mark_done()
+
+
+async def ack_sampled(ws, message: bytes, stats: Stats):
+    """Mede a latência origem -> cliente de uma mensagem amostrada e envia o `ack`, como o cliente web."""
+    recv = time.time() * 1000
+    data = json.loads(message)
+    if "ts" not in data:
+        return
+    stats.latencies.append(recv - data["ts"]["src"])
+    await ws.send(json.dumps({"type": "ack", "seq": data["seq"], "ts": data["ts"],
+                              "recv": recv, "render": time.time() * 1000}))
+
+
+async def history_worker(client: httpx.AsyncClient, symbols: List[str], stats: Stats,
+                         stop: asyncio.Event, rng: random.Random):
+    today = datetime.now()
+    while not stop.is_set():
+        symbol = rng.choice(symbols)
+        timeframe = rng.choice(TIMEFRAMES)
+        start = today - timedelta(days=rng.randint(1, 5), hours=rng.randint(0, 12))
+        params = {
+            "timeframe": timeframe,
+            "start": start.strftime("%Y-%m-%dT%H:%M:%S"),
+            "end": (start + timedelta(hours=rng.choice([1, 6, 24]))).strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        headers = {"Accept": COLUMNAR_MEDIA_TYPE if rng.random() < 0.5 else "application/json",
+                   "Accept-Encoding": "gzip"}
+        started = time.perf_counter()
+        try:
+            response = await client.get(f"/api/history/{symbol}", params=params, headers=headers)
+            response.raise_for_status()
+            stats.latencies.append((time.perf_counter() - started) * 1000)
+            stats.count += 1
+            stats.bytes += len(response.content)
+        except httpx.HTTPError:
+            stats.errors += 1
+
+
+async def markers_worker(client: httpx.AsyncClient, symbols: List[str], stats: Stats,
+                         stop: asyncio.Event, rate: float, rng: random.Random):
+    while not stop.is_set():
+        body = {
+            "symbol": rng.choice(symbols),
+            "markers": [{"Data": datetime.now().strftime("%Y-%m-%d"), "Hora": "10:00",
+                         "Preco": 5400.0 + i, "Tipo": "POC_COMPRA"} for i in range(5)],
+        }
+        started = time.perf_counter()
+        try:
+            response = await client.post("/api/markers", json=body)
+            response.raise_for_status()
+            stats.latencies.append((time.perf_counter() - started) * 1000)
+            stats.count += 1
+        except httpx.HTTPError:
+            stats.errors += 1
+        await asyncio.sleep(1.0 / rate)
+
+
+async def run_load(args, server: Server) -> dict:
+    rng = random.Random(args.seed)
+    symbols = [f"SYN{i}" for i in range(args.symbols)]
+    channels = [(symbol, tf) for symbol in symbols for tf in TIMEFRAMES]
+
+    urls = [
+        f"{server.ws_url}/ws/candles?symbol={symbol}&timeframe={tf}"
+        for symbol, tf in (channels[i % len(channels)] for i in range(args.clients))
+    ]
+    urls += [f"{server.ws_url}/ws/ticks?symbol={symbols[i % len(symbols)]}" for i in range(args.tick_clients)]
+
+    connect_stats, message_stats = Stats(), Stats()
+    history_stats, markers_stats = Stats(), Stats()
+    connected, measuring, stop = asyncio.Event(), asyncio.Event(), asyncio.Event()
+    pending = [len(urls)]
+
+    rss_baseline = rss_kb(server.process.pid)
+    subscribers = [
+        asyncio.create_task(ws_subscriber(url, connect_stats, message_stats, connected, measuring, stop, pending))
+        for url in urls
+    ]
+    if urls:
+        await connected.wait()
+    await asyncio.sleep(1.0)
+    rss_connected = rss_kb(server.process.pid)
+
+    limits = httpx.Limits(max_connections=args.history_workers + 2)
+    async with httpx.AsyncClient(base_url=server.base_url, timeout=60.0, limits=limits) as client:
+        measuring.set()
+        started = time.perf_counter()
+        workers = [asyncio.create_task(history_worker(client, symbols, history_stats, stop, rng))
+                   for _ in range(args.history_workers)]
+        if args.markers_rate > 0:
+            workers.append(asyncio.create_task(
+                markers_worker(client, symbols, markers_stats, stop, args.markers_rate, rng)))
+
+        await asyncio.sleep(args.duration)
+        stop.set()
+        duration = time.perf_counter() - started
+        await asyncio.gather(*workers, *subscribers, return_exceptions=True)
+
+    rss_end = rss_kb(server.process.pid)
+    ws_summary = message_stats.summary(duration)
+    return {
+        "websocket": {
+            "clients": len(urls),
+            "connected": connect_stats.count,
+            "connect_errors": connect_stats.errors,
+            "connect_ms": percentiles(connect_stats.latencies),
+            "messages": ws_summary,
+        },
+        "history": history_stats.summary(duration),
+        "markers": markers_stats.summary(duration),
+        "memory": {
+            "rss_baseline_kb": rss_baseline,
+            "rss_connected_kb": rss_connected,
+            "rss_end_kb": rss_end,
+            "per_connection_kb": (round((rss_connected - rss_baseline) / len(urls), 1)
+                                  if urls and rss_baseline and rss_connected else None),
+        },
+        "duration_s": round(duration, 2),
+    }
+
+
+# --- Comparação com execuções anteriores ---
+
+# (caminho no JSON, True se maior é melhor)
+_COMPARED = [
+    (("websocket", "messages", "per_sec"), True),
+    (("websocket", "messages", "latency_ms", "p99"), False),
+    (("websocket", "connect_ms", "p99"), False),
+    (("history", "per_sec"), True),
+    (("history", "latency_ms", "p50"), False),
+    (("history", "latency_ms", "p99"), False),
+    (("markers", "latency_ms", "p99"), False),
+    (("memory", "per_connection_kb"), False),
+]
+
+
+def _get(data: dict, path):
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> bool:
+    """
+    Imprime a variação de cada métrica em relação à execução de referência.
+
+    Returns:
+        bool: True se alguma métrica piorou mais que `tolerance` (fração)
+    """
+    regressed = False
+    print(f"\nComparação com {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    changed = sorted(k for k in current["config"] if current["config"][k] != baseline.get("config", {}).get(k))
+    if changed:
+        print(f"  Aviso: configuração diferente da referência ({', '.join(changed)})")
+    for path, higher_is_better in _COMPARED:
+        old, new = _get(baseline, path), _get(current, path)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = "  <-- REGRESSÃO" if worse > tolerance else ""
+        regressed |= bool(flag)
+        print(f"  {'.'.join(path):32s} {old:>12} -> {new:>12}  ({change:+.1%}){flag}")
+    return regressed
+
+
+def print_summary(result: dict):
+    ws, history, markers, memory = (result[k] for k in ("websocket", "history", "markers", "memory"))
+    print(f"WebSocket: {ws['connected']}/{ws['clients']} conectados, "
+          f"conexão p50={ws['connect_ms']['p50']} ms p99={ws['connect_ms']['p99']} ms, "
+          f"{ws['messages']['per_sec']} msg/s ({ws['messages']['bytes_per_sec']:.0f} B/s), "
+          f"latência p50={ws['messages']['latency_ms']['p50']} ms p99={ws['messages']['latency_ms']['p99']} ms")
+    print(f"Histórico: {history['per_sec']} req/s, p50={history['latency_ms']['p50']} ms "
+          f"p99={history['latency_ms']['p99']} ms, erros={history['errors']}")
+    print(f"Marcações: {markers['per_sec']} req/s, p50={markers['latency_ms']['p50']} ms "
+          f"p99={markers['latency_ms']['p99']} ms, erros={markers['errors']}")
+    print(f"Memória: base={memory['rss_baseline_kb']} KiB, conectado={memory['rss_connected_kb']} KiB, "
+          f"por conexão={memory['per_connection_kb']} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100, help="Assinantes de /ws/candles")
+    parser.add_argument("--tick-clients", type=int, default=10, help="Assinantes de /ws/ticks")
+    parser.add_argument("--symbols", type=int, default=5, help="Símbolos distintos (canais = símbolos x timeframes)")
+    parser.add_argument("--history-workers", type=int, default=4, help="Requisições paralelas a /api/history")
+    parser.add_argument("--markers-rate", type=float, default=2.0, help="Envios por segundo para /api/markers")
+    parser.add_argument("--duration", type=float, default=20.0, help="Duração da medição, em segundos")
+    parser.add_argument("--provider", choices=["synthetic", "replay"], default="synthetic")
+    parser.add_argument("--replay-ticks", help="Arquivo de ticks para o provedor replay")
+    parser.add_argument("--replay-speed", type=float, default=10.0, help="Velocidade do provedor replay")
+    parser.add_argument("--sample-every", type=int, default=1, help="Amostragem de latência do servidor (1 = todas)")
+    parser.add_argument("--seed", type=int, default=1, help="Semente das escolhas aleatórias")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: benchmarks/results/load_<data>_<commit>.json)")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Piora máxima aceita na comparação (fração)")
+    args = parser.parse_args()
+
+    if args.provider == "replay" and not args.replay_ticks:
+        parser.error("--provider replay requer --replay-ticks")
+
+    with Server(args) as server:
+        result = asyncio.run(run_load(args, server))
+
+    commit = git_commit()
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    result = {
+        "timestamp": timestamp,
+        "commit": commit,
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "tolerance")},
+        **result,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load_{timestamp}_{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print_summary(result)
+    print(f"Resultado gravado em {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Grava os ticks (e opcionalmente os candles M1) de um símbolo do MT5 em
+arquivo, para reprodução posterior pelo provedor `replay`.
+
+Os arquivos gerados (`.npy`) contêm os arrays estruturados retornados por
+`copy_ticks_range` e `copy_rates_range`. Para reproduzi-los:
+
+    MARKET_DATA_PROVIDER=replay REPLAY_TICKS=data/ticks/WDOV25_2025-10-16.npy REPLAY_SPEED=10 python run.py
+
+Uso (a partir do diretório backend, com o terminal MT5 aberto):
+    python tools/record_market_data.py WDOV25 2025-10-16T09:00 2025-10-16T18:00 data/ticks/WDOV25_2025-10-16.npy \
+        --bars data/ticks/WDOV25_2025-10-16_M1.npy
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+import MetaTrader5 as mt5
+import numpy as np
+import pytz
+
+
+def save(path: str, data: np.ndarray):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.save(path, data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("symbol", help="Símbolo do ativo (ex: WDOV25)")
+    parser.add_argument("start", help="Início no horário de São Paulo (YYYY-MM-DDTHH:MM)")
+    parser.add_argument("end", help="Fim no horário de São Paulo (YYYY-MM-DDTHH:MM)")
+    parser.add_argument("output", help="Arquivo .npy de saída dos ticks")
+    parser.add_argument("--bars", help="Arquivo .npy de saída dos candles M1 (opcional)")
+    args = parser.parse_args()
+
+    tz = pytz.timezone('America/Sao_Paulo')
+    start_utc = tz.localize(datetime.fromisoformat(args.start)).astimezone(pytz.utc)
+    end_utc = tz.localize(datetime.fromisoformat(args.end)).astimezone(pytz.utc)
+
+    if not mt5.initialize():
+        raise SystemExit(f"Falha ao conectar ao MT5. Código de erro: {mt5.last_error()}")
+    try:
+        ticks = mt5.copy_ticks_range(args.symbol, start_utc, end_utc, mt5.COPY_TICKS_ALL)
+        if ticks is None:
+            raise SystemExit(f"Falha ao buscar ticks no MT5. Erro: {mt5.last_error()}")
+        rates = None
+        if args.bars:
+            rates = mt5.copy_rates_range(args.symbol, mt5.TIMEFRAME_M1, start_utc, end_utc)
+            if rates is None:
+                raise SystemExit(f"Falha ao buscar candles no MT5. Erro: {mt5.last_error()}")
+    finally:
+        mt5.shutdown()
+
+    save(args.output, ticks)
+    print(f"{len(ticks)} ticks de {args.symbol} gravados em {args.output}")
+    if rates is not None:
+        save(args.bars, rates)
+        print(f"{len(rates)} candles M1 de {args.symbol} gravados em {args.bars}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Micro-benchmark do custo de pintura por quadro do CaptureDisplayWidget.
+
+Compara, para alguns tamanhos de widget, o caminho antigo (redimensionar com
+SmoothTransformation, criar um QPixmap novo e chamar setPixmap) com as
+políticas de redimensionamento atuais do widget ('fast', 'smooth' e 'auto').
+Cada quadro inclui redimensionamento, cópia para o buffer e a pintura
+síncrona (repaint).
+
+Uso:
+    python bench_capture_paint.py [--frames 300] [--width 300] [--height 60]
+
+Roda sem monitor (QT_QPA_PLATFORM=offscreen, se não definido).
+"""
+
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor, QImage, QPainter, QPixmap
+from PyQt6.QtWidgets import QApplication, QLabel
+
+try:
+    from capture_manager import CaptureRegion
+    from capture_window import CaptureDisplayWidget
+    from capture_worker import scale_image
+except ImportError:
+    from .capture_manager import CaptureRegion
+    from .capture_window import CaptureDisplayWidget
+    from .capture_worker import scale_image
+
+
+def _make_frames(width: int, height: int, count: int = 8):
+    """Gera quadros sintéticos (texto de preço sobre fundo escuro) para alternar entre si."""
+    frames = []
+    for _ in range(count):
+        image = QImage(width, height, QImage.Format.Format_RGB32)
+        image.fill(QColor(20, 20, 30))
+        painter = QPainter(image)
+        painter.setPen(QColor(230, 230, 230))
+        font = painter.font()
+        font.setPixelSize(int(height * 0.6))
+        painter.setFont(font)
+        painter.drawText(image.rect(), Qt.AlignmentFlag.AlignCenter, f"{random.uniform(5000, 6000):.1f}")
+        painter.end()
+        frames.append(image)
+    return frames
+
+
+def _bench_legacy(label: QLabel, frames, count: int) -> float:
+    started = time.perf_counter()
+    for index in range(count):
+        scaled = frames[index % len(frames)].scaled(
+            label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        label.setPixmap(QPixmap.fromImage(scaled))
+        label.repaint()
+    return (time.perf_counter() - started) / count
+
+
+def _bench_widget(widget: CaptureDisplayWidget, policy: str, frames, count: int) -> float:
+    widget.set_scaling_policy(policy)
+    smooth = policy == "smooth"
+    started = time.perf_counter()
+    for index in range(count):
+        source = frames[index % len(frames)]
+        # Na aplicação o redimensionamento roda na thread de captura; aqui entra no custo do quadro
+        widget.show_frame(source, scale_image(source, widget.width(), widget.height(), smooth))
+        widget.repaint()
+    return (time.perf_counter() - started) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300, help="Quadros por medição")
+    parser.add_argument("--width", type=int, default=300, help="Largura da região capturada")
+    parser.add_argument("--height", type=int, default=60, help="Altura da região capturada")
+    args = parser.parse_args()
+
+    app = QApplication([])
+    frames = _make_frames(args.width, args.height)
+    region = CaptureRegion("Bench", 1, 0, 0, args.width, args.height)
+
+    # Fator inteiro (2x), fator não inteiro e redução
+    sizes = [(args.width * 2, args.height * 2), (int(args.width * 1.5), int(args.height * 1.5)),
+             (args.width // 2, args.height // 2)]
+
+    print(f"Região {args.width}x{args.height}, {args.frames} quadros por medição (ms/quadro)")
+    print(f"{'widget':>12} {'antigo':>9} {'fast':>9} {'smooth':>9} {'auto':>9}")
+    for width, height in sizes:
+        label = QLabel()
+        label.setFixedSize(width, height)
+        label.show()
+        widget = CaptureDisplayWidget(region)
+        widget.setMinimumSize(1, 1)
+        widget.setFixedSize(width, height)
+        widget.show()
+        app.processEvents()
+
+        results = [_bench_legacy(label, frames, args.frames)]
+        results += [_bench_widget(widget, policy, frames, args.frames) for policy in ("fast", "smooth", "auto")]
+        print(f"{f'{width}x{height}':>12} " + " ".join(f"{seconds * 1000:9.3f}" for seconds in results))
+
+        label.close()
+        widget.close()
+
+
+if __name__ == "__main__":
+    main()
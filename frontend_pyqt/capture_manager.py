@@ -11,15 +11,17 @@ from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from pathlib import Path
 
-from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtCore import QObject, pyqtSignal
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtGui import QScreen
 
 try:
     from capture_window import CaptureWindow
+    from capture_worker import CaptureWorker, RegionSlot
     from overlay_window import OverlayWindow
 except ImportError:
     from .capture_window import CaptureWindow
+    from .capture_worker import CaptureWorker, RegionSlot
     from .overlay_window import OverlayWindow
 
 
@@ -59,9 +61,14 @@ class CaptureManager(QObject):
     - Criar e gerenciar janelas de captura
     - Controlar overlay de contornos
     - Coordenar atualizações em tempo real
+
+    A captura e o redimensionamento rodam em uma thread própria
+    (`CaptureWorker`); aqui só são exibidos os quadros prontos.
     """
     
     error_occurred = pyqtSignal(str)
+    # Emitido quando o conteúdo de uma região muda (CaptureRegion); quadros iguais não geram evento
+    region_changed = pyqtSignal(object)
     
     def __init__(self, csv_file_path: str = "config_capture_rect.csv"):
         super().__init__()
@@ -70,6 +77,7 @@ class CaptureManager(QObject):
         
         # Configurações padrão
         self.fps = 5
+        self.scaling_policy = "auto"  # Ver CaptureDisplayWidget.SCALING_POLICIES
         self.overlay_enabled = False
         self.overlay_color = "white"
         self.overlay_thickness = 2
@@ -78,10 +86,14 @@ class CaptureManager(QObject):
         self.regions: List[CaptureRegion] = []
         self.capture_windows: Dict[str, CaptureWindow] = {}
         self.overlay_window: Optional[OverlayWindow] = None
-        self.update_timer = QTimer()
+        self.worker: Optional[CaptureWorker] = None
+        # Chamados na thread de captura para cada região que mudou (ver add_frame_analyzer)
+        self.frame_analyzers: List = []
         
-        self._setup_timer()
         self._log_available_displays()
+        app = QApplication.instance()
+        if app is not None:
+            app.screenRemoved.connect(self._on_screen_removed)
 
     def _log_available_displays(self):
         """
@@ -143,11 +155,6 @@ class CaptureManager(QObject):
             self.logger.info(f"Display {i+1}: {screen.name()} - "
                            f"{geometry.width()}x{geometry.height()} @ ({geometry.x()},{geometry.y()})")
 
-    def _setup_timer(self):
-        """Configura o timer de atualização das capturas."""
-        self.update_timer.timeout.connect(self._update_captures)
-        self.update_timer.setInterval(1000 // self.fps)  # Converte FPS para milliseconds
-
     def load_config(self, csv_file_path: Optional[str] = None) -> bool:
         """
         Carrega configuração do arquivo CSV.
@@ -268,12 +275,12 @@ class CaptureManager(QObject):
             
         self._create_capture_windows()
         self._create_overlay_window()
-        self.update_timer.start()
+        self._start_worker()
         self.logger.info("Sistema de captura iniciado")
 
     def stop_capture(self):
         """Para o sistema de captura."""
-        self.update_timer.stop()
+        self._stop_worker()
         self._close_all_windows()
         self.logger.info("Sistema de captura parado")
 
@@ -289,6 +296,8 @@ class CaptureManager(QObject):
         # Cria uma janela para cada grupo
         for window_name, regions in windows_regions.items():
             window = CaptureWindow(window_name, regions, self)
+            for widget in window.display_widgets:
+                widget.set_scaling_policy(self.scaling_policy)
             self.capture_windows[window_name] = window
             window.show()
 
@@ -299,10 +308,42 @@ class CaptureManager(QObject):
             self.overlay_window.set_style(self.overlay_color, self.overlay_thickness)
             self.overlay_window.show()
 
-    def _update_captures(self):
-        """Atualiza todas as capturas de tela."""
+    def _start_worker(self):
+        """Inicia a thread de captura para as regiões das janelas abertas."""
+        screens = {index + 1: screen for index, screen in enumerate(QApplication.instance().screens())}
+        slots = []
         for window in self.capture_windows.values():
-            window.update_captures()
+            for region, widget in zip(window.regions, window.display_widgets):
+                slot = RegionSlot(region, widget)
+                widget.attach_slot(slot)
+                slots.append(slot)
+
+        self.worker = CaptureWorker(screens, slots, self.fps, self.frame_analyzers)
+        self.worker.frame_ready.connect(self._show_frame)
+        self.worker.start()
+
+    def _stop_worker(self):
+        """Encerra a thread de captura, se estiver rodando."""
+        if self.worker is None:
+            return
+        self.worker.stop()
+        self.logger.info(f"Captura encerrada ({self.worker.scheduler.frames_skipped} quadro(s) pulado(s) por atraso, "
+                         f"{self.worker.frames_unchanged} descartado(s) sem mudança)")
+        self.worker = None
+
+    def _on_screen_removed(self, screen: QScreen):
+        """Retira da captura um display desconectado, antes que sua QScreen seja destruída."""
+        if self.worker is None:
+            return
+        for display_id in self.worker.remove_screen(screen):
+            self.logger.warning(f"Display {display_id} desconectado: suas regiões deixam de ser capturadas")
+
+    def _show_frame(self, slot: RegionSlot):
+        """Exibe o quadro pendente da região (executado na thread da interface)."""
+        frame = slot.take()
+        if frame is not None:
+            slot.widget.show_frame(*frame)
+            self.region_changed.emit(slot.region)
 
     def _close_all_windows(self):
         """Fecha todas as janelas abertas."""
@@ -318,9 +359,28 @@ class CaptureManager(QObject):
     def set_fps(self, fps: int):
         """Define a taxa de atualização (FPS)."""
         self.fps = max(1, min(30, fps))  # Limita entre 1-30 FPS
-        self.update_timer.setInterval(1000 // self.fps)
+        if self.worker is not None:
+            self.worker.set_fps(self.fps)
         self.logger.info(f"FPS definido para: {self.fps}")
 
+    def add_frame_analyzer(self, analyzer):
+        """
+        Registra um analisador de quadros (ex: leitura de preços).
+
+        O analisador é chamado na thread de captura, só quando a região muda,
+        com (região, imagem, impressão digital, horário da captura em ms).
+        Vale a partir da próxima vez que a captura for iniciada.
+        """
+        self.frame_analyzers.append(analyzer)
+
+    def set_scaling_policy(self, policy: str):
+        """Define a política de redimensionamento das capturas ('auto', 'fast' ou 'smooth')."""
+        for window in self.capture_windows.values():
+            for widget in window.display_widgets:
+                widget.set_scaling_policy(policy)
+        self.scaling_policy = policy
+        self.logger.info(f"Redimensionamento definido para: {policy}")
+
     def set_overlay_enabled(self, enabled: bool):
         """Habilita/desabilita o overlay."""
         self.overlay_enabled = enabled
@@ -343,6 +403,7 @@ class CaptureManager(QObject):
         """Retorna configuração atual."""
         return {
             'fps': self.fps,
+            'scaling_policy': self.scaling_policy,
             'overlay_enabled': self.overlay_enabled,
             'overlay_color': self.overlay_color,
             'overlay_thickness': self.overlay_thickness,
@@ -357,7 +418,7 @@ class CaptureManager(QObject):
         Args:
             new_regions: Lista de novas regiões de captura
         """
-        was_running = self.update_timer.isActive()
+        was_running = self.worker is not None
         
         # Para o sistema se estiver rodando
         if was_running:
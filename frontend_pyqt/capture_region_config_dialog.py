@@ -138,6 +138,13 @@ class CaptureRegionConfigDialog(QDialog):
         self.fps_spinbox.setSuffix(" FPS")
         layout.addRow("Taxa de Atualização:", self.fps_spinbox)
         
+        # Redimensionamento das capturas
+        self.scaling_combo = QComboBox()
+        self.scaling_combo.addItem("Automático (rápido; suave quando parado)", "auto")
+        self.scaling_combo.addItem("Rápido (vizinho mais próximo)", "fast")
+        self.scaling_combo.addItem("Suave", "smooth")
+        layout.addRow("Redimensionamento:", self.scaling_combo)
+        
         # Sempre no topo (global)
         self.global_always_on_top = QCheckBox("Todas as janelas sempre no topo")
         layout.addRow(self.global_always_on_top)
@@ -198,6 +205,7 @@ class CaptureRegionConfigDialog(QDialog):
         
         # Sistema
         self.fps_spinbox.setValue(config['fps'])
+        self.scaling_combo.setCurrentIndex(max(0, self.scaling_combo.findData(config['scaling_policy'])))
         
         # Overlay
         self.overlay_enabled.setChecked(config['overlay_enabled'])
@@ -330,6 +338,7 @@ class CaptureRegionConfigDialog(QDialog):
         try:
             # Atualizar configurações do sistema
             self.manager.set_fps(self.fps_spinbox.value())
+            self.manager.set_scaling_policy(self.scaling_combo.currentData())
             self.manager.set_overlay_enabled(self.overlay_enabled.isChecked())
             self.manager.set_overlay_style(
                 self.overlay_color, 
@@ -10,15 +10,17 @@ from typing import List
 import csv
 from pathlib import Path
 
-from PyQt6.QtCore import Qt, QRect
-from PyQt6.QtGui import QPixmap, QPainter, QIcon
+from PyQt6.QtCore import Qt, QPointF, QRect, QSize, QTimer
+from PyQt6.QtGui import QImage, QPixmap, QPainter, QIcon
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                           QScrollArea, QPushButton, QApplication)
+                           QScrollArea, QPushButton)
 
 try:
     from capture_region_config_dialog import CaptureRegionConfigDialog
+    from capture_worker import scale_image
 except ImportError:
     from .capture_region_config_dialog import CaptureRegionConfigDialog
+    from .capture_worker import scale_image
 
 
 class CaptureDisplayWidget(QLabel):
@@ -26,43 +28,130 @@ class CaptureDisplayWidget(QLabel):
     Widget que exibe uma captura de tela específica.
     
     Mantém proporção original e permite redimensionamento.
+
+    A imagem é desenhada a partir de um buffer reaproveitado entre quadros,
+    realocado apenas quando o tamanho muda. A política de redimensionamento
+    (`SCALING_POLICIES`) define a filtragem:
+    - `fast`: vizinho mais próximo, com fator inteiro ao ampliar;
+    - `smooth`: filtragem suave em todo quadro;
+    - `auto` (padrão): `fast` enquanto chegam quadros e um único redesenho
+      suave quando o widget fica ocioso por `IDLE_SMOOTH_MS`.
     """
+
+    SCALING_POLICIES = ("auto", "fast", "smooth")
+    IDLE_SMOOTH_MS = 250
     
     def __init__(self, region, parent=None):
         super().__init__(parent)
         self.region = region
-        self.original_pixmap = None
+        self.original_image = None
+        # Entrega dos quadros da thread de captura (definido por CaptureManager)
+        self.slot = None
+        self.scaling_policy = "auto"
+        # Buffer de exibição, reaproveitado enquanto o tamanho não muda
+        self._buffer = None
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.setInterval(self.IDLE_SMOOTH_MS)
+        self._idle_timer.timeout.connect(self._render_smooth)
         self.setMinimumSize(100, 100)
         self.setStyleSheet("border: 1px solid gray;")
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)  # Atualizado em: 2024-12-28 — PyQt6 moveu constantes para AlignmentFlag
         self.setText(f"Região: {region.display_id}\n({region.x1},{region.y1})-({region.x2},{region.y2})")
 
-    def set_capture(self, pixmap: QPixmap):
+    def attach_slot(self, slot):
         """
-        Define a captura a ser exibida.
-        
+        Conecta o widget ao slot da thread de captura, informando tamanho e filtragem.
+
+        Args:
+            slot: RegionSlot da região exibida
+        """
+        self.slot = slot
+        slot.target_size = (self.width(), self.height())
+        slot.smooth = self.scaling_policy == "smooth"
+
+    def set_scaling_policy(self, policy: str):
+        """
+        Define a política de redimensionamento.
+
         Args:
-            pixmap: Imagem capturada
+            policy: 'auto', 'fast' ou 'smooth'
         """
-        self.original_pixmap = pixmap
+        if policy not in self.SCALING_POLICIES:
+            raise ValueError(f"Política de redimensionamento inválida: {policy}")
+        self.scaling_policy = policy
+        if self.slot is not None:
+            self.slot.smooth = policy == "smooth"
         self._update_display()
 
+    def show_frame(self, source: QImage, scaled: QImage):
+        """
+        Exibe um quadro já redimensionado pela thread de captura.
+
+        Args:
+            source: Imagem original (mantida para redimensionar em resizeEvent)
+            scaled: Imagem no tamanho atual do widget
+        """
+        self.original_image = source
+        self._render(scaled)
+
     def _update_display(self):
-        """Atualiza a exibição com o pixmap redimensionado."""
-        if not self.original_pixmap:
+        """Atualiza a exibição com a imagem redimensionada."""
+        if self.original_image is None:
             return
-            
-        # Redimensiona mantendo proporção
-        scaled_pixmap = self.original_pixmap.scaled(
-            self.size(), 
-            Qt.AspectRatioMode.KeepAspectRatio,  # Atualizado em: 2024-12-28 — PyQt6 moveu constantes para AspectRatioMode
-            Qt.TransformationMode.SmoothTransformation  # Atualizado em: 2024-12-28 — PyQt6 moveu constantes para TransformationMode
-        )
-        self.setPixmap(scaled_pixmap)
+        self._render(scale_image(self.original_image, self.width(), self.height(),
+                                 self.scaling_policy == "smooth"))
+
+    def _render(self, scaled: QImage, smooth: bool = False):
+        """
+        Desenha a imagem redimensionada, centralizada, no buffer de exibição e agenda a pintura.
+
+        O buffer tem o tamanho do widget: só é realocado quando o widget muda de tamanho.
+
+        Args:
+            scaled: Imagem já no tamanho de exibição
+            smooth: True se a imagem já tem a filtragem suave (não agenda o redesenho ocioso)
+        """
+        ratio = scaled.devicePixelRatio()
+        size = QSize(round(self.width() * ratio), round(self.height() * ratio))
+        if self._buffer is None:
+            self.clear()  # Remove o texto de espera
+        if self._buffer is None or self._buffer.size() != size or self._buffer.devicePixelRatio() != ratio:
+            self._buffer = QPixmap(size)
+            self._buffer.setDevicePixelRatio(ratio)
+
+        self._buffer.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(self._buffer)
+        image_size = scaled.deviceIndependentSize()
+        painter.drawImage(QPointF((self.width() - image_size.width()) / 2,
+                                  (self.height() - image_size.height()) / 2), scaled)
+        painter.end()
+        self.update()
+
+        if self.scaling_policy == "auto" and not smooth:
+            # Reinicia a contagem: o redesenho suave só acontece com o widget ocioso
+            self._idle_timer.start()
+
+    def _render_smooth(self):
+        """Redesenha o último quadro com filtragem suave (política 'auto', widget ocioso)."""
+        if self.original_image is not None:
+            self._render(scale_image(self.original_image, self.width(), self.height(), True), smooth=True)
+
+    def paintEvent(self, event):
+        """Desenha o buffer (ou o texto de espera, antes do primeiro quadro)."""
+        super().paintEvent(event)
+        if self._buffer is None:
+            return
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._buffer)
+        painter.end()
 
     def resizeEvent(self, event):
         """Redimensiona o conteúdo quando a janela é redimensionada."""
         super().resizeEvent(event)
+        if self.slot is not None:
+            # Os próximos quadros já chegam no novo tamanho
+            self.slot.target_size = (self.width(), self.height())
         self._update_display()
 
 
@@ -275,41 +364,6 @@ class CaptureWindow(QWidget):
         
         self.show()  # Necessário para aplicar mudanças de flags
 
-    def update_captures(self):
-        """
-        Atualiza todas as capturas de tela desta janela.
-        
-        Captura cada região configurada e atualiza os widgets correspondentes.
-        """
-        app = QApplication.instance()
-        screens = app.screens()
-        
-        for i, (region, widget) in enumerate(zip(self.regions, self.display_widgets)):
-            try:
-                # Captura a região específica
-                if region.display_id - 1 >= len(screens):
-                    self.logger.error(f"Display {region.display_id} não existe")
-                    continue
-                    
-                screen = screens[region.display_id - 1]  # 0-indexed
-                
-                # CORRIGIDO: Não precisa ajustar para coordenadas globais
-                # O grabWindow de um screen específico já espera coordenadas relativas àquele screen
-                # As coordenadas X1,Y1 do CSV já são relativas ao display específico
-                
-                # Captura a tela usando coordenadas RELATIVAS ao monitor
-                pixmap = screen.grabWindow(0, region.x1, region.y1, 
-                                         region.width, region.height)
-                
-                # Para depuração: registra as coordenadas e dimensões usadas
-                self.logger.debug(f"Captura em Display {region.display_id}: ({region.x1},{region.y1}) "
-                               f"tamanho {region.width}x{region.height}")
-                
-                widget.set_capture(pixmap)
-                
-            except Exception as e:
-                self.logger.error(f"Erro ao capturar região {i}: {e}")
-
     def closeEvent(self, event):
         """Trata o fechamento da janela."""
         self.logger.info(f"Fechando janela de captura: {self.window_name}")
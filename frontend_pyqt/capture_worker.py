@@ -0,0 +1,404 @@
+"""
+Captura de tela fora da thread da interface.
+
+Uma thread dedicada (`CaptureWorker`) captura, a cada quadro, o retângulo
+planejado de cada display, recorta as regiões (views sem cópia) e as
+redimensiona para o tamanho atual de cada widget. A thread da interface só
+recebe as imagens prontas e as exibe.
+
+O ritmo é dado por um `FrameScheduler`: se um quadro atrasa, os quadros
+perdidos são pulados em vez de acumulados. Na entrega vale o mesmo: cada
+região guarda apenas o quadro mais recente ainda não exibido (`RegionSlot`),
+então uma interface ocupada nunca enfileira quadros antigos.
+
+Detecção de mudança: cada região tem uma impressão digital (CRC32 dos seus
+pixels, `image_fingerprint`). Quadros iguais ao anterior são descartados
+antes do redimensionamento e da pintura. Uma região parada passa a ser
+verificada com intervalos cada vez maiores (até `MAX_IDLE_INTERVAL`) e volta
+à taxa cheia na primeira mudança; displays sem nenhuma região a verificar no
+quadro nem são capturados. Assim o custo acompanha a atividade da tela, não
+a taxa do timer.
+
+Analisadores de quadros (ex: `price_ocr.PriceExtractor`) recebem, na própria
+thread de captura, as regiões que mudaram.
+
+`QScreen.grabWindow` e `QPixmap` são usados fora da thread da interface. Isso
+supõe que a plataforma do Qt declara a capacidade `ThreadedPixmaps` (Windows,
+xcb, macOS e offscreen declaram); sem ela, pixmaps só podem ser criados na
+thread da interface. As `QScreen` pertencem à thread da interface: quando um
+display é desconectado, o gerenciador chama `CaptureWorker.remove_screen`
+antes que a `QScreen` seja destruída.
+"""
+
+import logging
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from PyQt6 import sip
+from PyQt6.QtCore import QThread, Qt, pyqtSignal
+from PyQt6.QtGui import QImage
+
+# Quadros seguidos sem mudança antes de uma região começar a ser verificada com menos frequência
+IDLE_FRAMES_BEFORE_BACKOFF = 10
+
+# Intervalo máximo (segundos) entre verificações de uma região parada
+MAX_IDLE_INTERVAL = 0.5
+
+
+@dataclass
+class DisplayFrame:
+    """
+    Quadro capturado de um display: o retângulo que envolve todas as regiões dele.
+
+    Args:
+        display_id: ID do monitor (1..N)
+        x, y: Canto superior esquerdo do retângulo capturado (coordenadas do display)
+        image: Pixels capturados
+        ratio: Pixels físicos por pixel lógico (devicePixelRatio da captura)
+        timestamp_ms: Horário da captura em milissegundos (epoch, UTC)
+    """
+    display_id: int
+    x: int
+    y: int
+    image: QImage
+    ratio: float = 1.0
+    timestamp_ms: int = 0
+
+    def region_view(self, region) -> QImage:
+        """
+        Retorna a região como uma QImage que aponta para o buffer do quadro, sem cópia.
+
+        A view guarda uma referência ao quadro, que continua válido enquanto
+        ela estiver em uso.
+        """
+        image = self.image
+        left = round((region.x1 - self.x) * self.ratio)
+        top = round((region.y1 - self.y) * self.ratio)
+        width = min(round(region.width * self.ratio), image.width() - left)
+        height = min(round(region.height * self.ratio), image.height() - top)
+
+        bytes_per_line = image.bytesPerLine()
+        address = int(image.constBits()) + top * bytes_per_line + left * (image.depth() // 8)
+        view = QImage(sip.voidptr(address), width, height, bytes_per_line, image.format())
+        view.setDevicePixelRatio(self.ratio)
+        view._frame = image  # Mantém o buffer vivo enquanto a view existir
+        return view
+
+
+def plan_display_frames(regions: List) -> Dict[int, Tuple[int, int, int, int]]:
+    """
+    Calcula, para cada display, o retângulo que envolve todas as suas regiões.
+
+    Args:
+        regions: Regiões de captura
+
+    Returns:
+        Dicionário display_id -> (x, y, largura, altura)
+    """
+    bounds: Dict[int, Tuple[int, int, int, int]] = {}
+    for region in regions:
+        x1, y1, x2, y2 = bounds.get(region.display_id, (region.x1, region.y1, region.x2, region.y2))
+        bounds[region.display_id] = (min(x1, region.x1), min(y1, region.y1),
+                                     max(x2, region.x2), max(y2, region.y2))
+    return {display_id: (x1, y1, x2 - x1, y2 - y1) for display_id, (x1, y1, x2, y2) in bounds.items()}
+
+
+def image_fingerprint(image: QImage) -> int:
+    """
+    CRC32 dos pixels da imagem, linha a linha.
+
+    Funciona também com views (`DisplayFrame.region_view`), cujas linhas não
+    são contíguas: só os bytes da região entram na conta. Qualquer pixel
+    alterado muda o resultado (um dígito de preço ocupa poucos pixels, então
+    amostragens reduzidas não serviriam).
+    """
+    height = image.height()
+    if height == 0:
+        return 0
+    bytes_per_line = image.bytesPerLine()
+    row_bytes = image.width() * (image.depth() // 8)
+    bits = image.constBits()
+    bits.setsize((height - 1) * bytes_per_line + row_bytes)
+    buffer = memoryview(bits)
+    crc = 0
+    for start in range(0, height * bytes_per_line, bytes_per_line):
+        crc = zlib.crc32(buffer[start:start + row_bytes], crc)
+    return crc
+
+
+def scale_image(image: QImage, width: int, height: int, smooth: bool) -> QImage:
+    """
+    Redimensiona a imagem para caber em width x height, mantendo a proporção.
+
+    Args:
+        smooth: True para filtragem suave; False para vizinho mais próximo, que
+            ao ampliar usa o maior fator inteiro que cabe (pixels nítidos e uniformes)
+
+    Returns:
+        Imagem redimensionada
+    """
+    if smooth:
+        return image.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                            Qt.TransformationMode.SmoothTransformation)
+    factor = min(width / max(1, image.width()), height / max(1, image.height()))
+    if factor >= 1:
+        factor = int(factor)
+        return image.scaled(image.width() * factor, image.height() * factor,
+                            Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.FastTransformation)
+    return image.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                        Qt.TransformationMode.FastTransformation)
+
+
+class RegionSlot:
+    """
+    Ponto de entrega dos quadros de uma região ao seu widget.
+
+    Guarda só o quadro mais recente ainda não exibido: um quadro novo
+    substitui o pendente em vez de entrar em fila. Também guarda o estado da
+    detecção de mudança da região (impressão digital e ritmo de verificação).
+
+    Args:
+        region: Região de captura
+        widget: CaptureDisplayWidget que exibe a região (acessado só na thread da interface)
+    """
+
+    def __init__(self, region, widget):
+        self.region = region
+        self.widget = widget
+        # Tamanho de exibição (largura, altura) e filtragem, definidos pelo widget (ver attach_slot)
+        self.target_size: Tuple[int, int] = (widget.width(), widget.height())
+        self.smooth = True
+        self._lock = threading.Lock()
+        self._pending: Optional[Tuple[QImage, QImage]] = None
+        # Detecção de mudança (usado só pela thread de captura)
+        self.fingerprint: Optional[int] = None
+        self.unchanged_frames = 0
+        self.stride = 1
+        self.next_frame = 0
+
+    def is_due(self, frame_index: int) -> bool:
+        """Indica se a região deve ser verificada neste quadro."""
+        return frame_index >= self.next_frame
+
+    def record_check(self, frame_index: int, changed: bool, max_stride: int):
+        """
+        Ajusta o ritmo de verificação após comparar um quadro.
+
+        Mudou: volta a verificar todo quadro. Sem mudança por
+        `IDLE_FRAMES_BEFORE_BACKOFF` quadros: dobra o intervalo a cada
+        verificação, até `max_stride`.
+        """
+        if changed:
+            self.unchanged_frames = 0
+            self.stride = 1
+        else:
+            self.unchanged_frames += 1
+            if self.unchanged_frames >= IDLE_FRAMES_BEFORE_BACKOFF:
+                self.stride = min(self.stride * 2, max_stride)
+        self.next_frame = frame_index + self.stride
+
+    def put(self, source: QImage, scaled: QImage) -> bool:
+        """
+        Deixa o quadro pronto para exibição.
+
+        Returns:
+            True se não havia quadro pendente (é preciso avisar a interface)
+        """
+        with self._lock:
+            was_empty = self._pending is None
+            self._pending = (source, scaled)
+        return was_empty
+
+    def take(self) -> Optional[Tuple[QImage, QImage]]:
+        """Retira o quadro pendente: (imagem original, imagem redimensionada)."""
+        with self._lock:
+            frame, self._pending = self._pending, None
+        return frame
+
+
+class FrameScheduler:
+    """
+    Marca o ritmo dos quadros, pulando os que já passaram quando há atraso.
+
+    Args:
+        fps: Quadros por segundo
+    """
+
+    def __init__(self, fps: int):
+        self.interval = 1.0 / fps
+        self.frames_skipped = 0
+        self._next: Optional[float] = None
+
+    def set_fps(self, fps: int):
+        self.interval = 1.0 / fps
+        self._next = None
+
+    def delay(self) -> float:
+        """Segundos até o próximo quadro (0 se já é hora)."""
+        now = time.monotonic()
+        if self._next is None:
+            self._next = now
+        return max(0.0, self._next - now)
+
+    def frame_done(self) -> int:
+        """
+        Agenda o próximo quadro após o atual.
+
+        Returns:
+            Quantidade de quadros pulados por atraso
+        """
+        self._next = (self._next or time.monotonic()) + self.interval
+        late = time.monotonic() - self._next
+        if late <= 0:
+            return 0
+        skipped = int(late // self.interval) + 1
+        self._next += skipped * self.interval
+        self.frames_skipped += skipped
+        return skipped
+
+
+class CaptureWorker(QThread):
+    """
+    Thread que captura e redimensiona os quadros de todas as regiões.
+
+    Sinais:
+        frame_ready(RegionSlot): A região mudou e há um quadro pendente no slot
+            (entregue na thread da interface)
+
+    Args:
+        screens: Displays por ID (1..N), obtidos na thread da interface
+        slots: Regiões e seus widgets
+        fps: Quadros por segundo
+        analyzers: Funções chamadas com (região, imagem, impressão digital, horário em ms)
+            para cada região que mudou, nesta thread
+    """
+
+    frame_ready = pyqtSignal(object)
+
+    def __init__(self, screens: Dict[int, object], slots: List[RegionSlot], fps: int,
+                 analyzers: Optional[List] = None, parent=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+        self.screens = screens
+        self.slots = slots
+        self.analyzers = list(analyzers or [])
+        self.frame_plan = plan_display_frames([slot.region for slot in slots])
+        self.scheduler = FrameScheduler(fps)
+        self.frame_index = 0
+        self.frames_unchanged = 0
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def set_fps(self, fps: int):
+        """Altera a taxa de quadros (pode ser chamado de qualquer thread)."""
+        self.scheduler.set_fps(fps)
+        self._wake.set()
+
+    def stop(self):
+        """Encerra a thread e aguarda o fim do quadro em andamento."""
+        self._stop.set()
+        self._wake.set()
+        self.wait()
+
+    def remove_screen(self, screen) -> List[int]:
+        """
+        Deixa de capturar um display desconectado (chamado na thread da interface, em `screenRemoved`).
+
+        A thread pode estar usando a `QScreen`, que é destruída logo após o
+        sinal: ela é parada antes da remoção e reiniciada em seguida. As regiões
+        do display ficam sem quadros novos.
+
+        Returns:
+            IDs dos displays removidos
+        """
+        removed = [display_id for display_id, candidate in self.screens.items() if candidate is screen]
+        if not removed:
+            return []
+        running = self.isRunning()
+        self.stop()
+        for display_id in removed:
+            del self.screens[display_id]
+        if running:
+            self._stop.clear()
+            self.start()
+        return removed
+
+    def run(self):
+        while not self._stop.is_set():
+            delay = self.scheduler.delay()
+            if delay > 0:
+                # Acorda antes do prazo se a taxa mudar ou a thread for encerrada
+                self._wake.wait(delay)
+                self._wake.clear()
+                continue
+
+            self._capture_frame()
+            skipped = self.scheduler.frame_done()
+            if skipped:
+                self.logger.debug(f"Captura atrasada: {skipped} quadro(s) pulado(s)")
+
+    def _capture_frame(self):
+        """Captura os displays uma vez e entrega as regiões que mudaram, redimensionadas."""
+        frame_index = self.frame_index
+        self.frame_index += 1
+        due = [slot for slot in self.slots if slot.is_due(frame_index)]
+        if not due:
+            return
+        max_stride = max(1, round(MAX_IDLE_INTERVAL / self.scheduler.interval))
+
+        frames = self._grab_display_frames({slot.region.display_id for slot in due})
+        for slot in due:
+            frame = frames.get(slot.region.display_id)
+            if frame is None:
+                continue
+            try:
+                source = frame.region_view(slot.region)
+                fingerprint = image_fingerprint(source)
+                changed = fingerprint != slot.fingerprint
+                slot.fingerprint = fingerprint
+                slot.record_check(frame_index, changed, max_stride)
+                if not changed:
+                    self.frames_unchanged += 1
+                    continue
+
+                for analyzer in self.analyzers:
+                    try:
+                        analyzer(slot.region, source, fingerprint, frame.timestamp_ms)
+                    except Exception as e:
+                        self.logger.error(f"Erro no analisador da região {slot.region.window_name}: {e}")
+
+                width, height = slot.target_size
+                scaled = scale_image(source, width, height, slot.smooth)
+                if slot.put(source, scaled):
+                    self.frame_ready.emit(slot)
+            except Exception as e:
+                self.logger.error(f"Erro ao processar região {slot.region.window_name}: {e}")
+
+    def _grab_display_frames(self, display_ids) -> Dict[int, DisplayFrame]:
+        """
+        Captura o retângulo planejado de cada display pedido.
+
+        Args:
+            display_ids: Displays com alguma região a verificar neste quadro
+
+        Returns:
+            Dicionário display_id -> quadro capturado
+        """
+        frames = {}
+        for display_id in display_ids:
+            x, y, width, height = self.frame_plan[display_id]
+            screen = self.screens.get(display_id)
+            if screen is None:
+                continue
+            try:
+                # Coordenadas relativas ao display, como no CSV (requer ThreadedPixmaps, ver o módulo)
+                timestamp_ms = int(time.time() * 1000)
+                pixmap = screen.grabWindow(0, x, y, width, height)
+                frames[display_id] = DisplayFrame(display_id, x, y, pixmap.toImage(), pixmap.devicePixelRatio(),
+                                                  timestamp_ms)
+            except Exception as e:
+                self.logger.error(f"Erro ao capturar display {display_id}: {e}")
+        return frames
@@ -17,9 +17,11 @@ from marker_table_window import MarkerTableWindow
 # Import absoluto para capture_manager - funciona quando executado diretamente
 try:
     from capture_manager import CaptureManager
+    from price_ocr import PriceExtractor
 except ImportError:
     # Fallback para import relativo se estiver sendo importado como módulo
     from .capture_manager import CaptureManager
+    from .price_ocr import PriceExtractor
 
 class MainDashboard(QMainWindow):
     def __init__(self):
@@ -27,6 +29,7 @@ class MainDashboard(QMainWindow):
         self.server_process = None
         self.marker_table_window = None # Para manter a referência
         self.capture_manager = None
+        self.price_extractor = None
 
         self.init_ui()
         self.setup_status_timer()
@@ -195,6 +198,10 @@ class MainDashboard(QMainWindow):
             if not self.capture_manager:
                 self.capture_manager = CaptureManager()
                 self.capture_manager.error_occurred.connect(self._show_capture_error)
+                # Leitura dos preços nas regiões capturadas, se houver glifos aprendidos
+                self.price_extractor = PriceExtractor.from_config()
+                if self.price_extractor:
+                    self.capture_manager.add_frame_analyzer(self.price_extractor)
 
             # Tenta carregar configuração padrão
             if self.capture_manager.load_config():
@@ -221,6 +228,8 @@ class MainDashboard(QMainWindow):
         # Para sistema de captura se estiver rodando
         if self.capture_manager:
             self.capture_manager.stop_capture()
+        if self.price_extractor:
+            self.price_extractor.close()
 
         # Garante que o servidor FastAPI seja encerrado ao fechar a janela
         self.stop_server()
@@ -0,0 +1,518 @@
+"""
+Leitura de números (preços e fluxos) nas regiões capturadas.
+
+Reconhecimento por comparação com glifos aprendidos, sem serviço de OCR
+externo. Cada quadro da região passa por:
+
+1. Tons de cinza normalizados pelo contraste (1 = texto, 0 = fundo; o texto
+   é a classe minoritária, então funciona com texto claro ou escuro);
+2. Segmentação em glifos pelas colunas vazias da linha de texto;
+3. Amostragem de cada glifo em uma célula de `GLYPH_WIDTH` x `GLYPH_HEIGHT`
+   pela média das áreas. A célula é proporcional à altura dos dígitos,
+   ancorada verticalmente na linha dos dígitos (assim a posição distingue
+   '.', ',' e '-') e centrada no centroide dos tons do glifo, com precisão
+   abaixo do pixel. Os tons intermediários do anti-aliasing são mantidos:
+   em fontes pequenas, os traços finos que distinguem '3' de '8' somem numa
+   binarização;
+4. Comparação com todos os modelos de uma vez (similaridade de Ruzicka,
+   Σmin / Σmax dos tons) e escolha do melhor acima de `MIN_MATCH_SCORE`.
+   A leitura inteira é descartada se algum glifo ficar a menos de
+   `MIN_MATCH_MARGIN` do melhor modelo de outro caractere: um preço errado
+   enviado ao backend é pior que um quadro sem leitura.
+
+Os glifos são aprendidos de exemplos rotulados da própria tela e gravados em
+`config_ocr_glyphs.json`; cada exemplo é lido de volta antes de ser aceito
+(ver `GlyphSet.learn`), e `check` confere se os glifos se distinguem:
+
+    python price_ocr.py learn PrecoCompra "5.432,5"
+    python price_ocr.py check
+
+A leitura roda na thread de captura e só para quadros que mudaram (ver
+`capture_worker`). O `PriceExtractor` publica cada valor novo no backend
+pelo socket local de leituras (ver `readings_client`).
+"""
+
+import argparse
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PyQt6.QtGui import QImage
+
+try:
+    from readings_client import ReadingsClient
+except ImportError:
+    from .readings_client import ReadingsClient
+
+# Tamanho da célula de cada glifo
+GLYPH_WIDTH = 12
+GLYPH_HEIGHT = 20
+
+# Célula em alturas de dígito: largura e folga acima/abaixo da linha dos dígitos
+CELL_WIDTH = 0.9
+CELL_ABOVE = 0.3
+CELL_BELOW = 0.3
+
+# Similaridade mínima (Σmin / Σmax dos tons) para aceitar um glifo
+MIN_MATCH_SCORE = 0.6
+
+# Vantagem mínima do caractere escolhido sobre o melhor modelo de outro caractere
+MIN_MATCH_MARGIN = 0.05
+
+# Diferença mínima entre o pixel mais claro e o mais escuro para haver texto
+MIN_CONTRAST = 40
+
+# Tom (0 a 1) a partir do qual um pixel conta como texto na segmentação
+TEXT_LEVEL = 0.5
+
+# Número inteiro com separador de milhar (ex: '128.500', '-1.234.567')
+_THOUSANDS_REGEX = re.compile(r"^-?[1-9]\d{0,2}(\.\d{3})+$")
+
+# Arquivo padrão dos glifos aprendidos
+GLYPHS_FILE = "config_ocr_glyphs.json"
+
+# Regiões lidas por padrão (NOME_JANELA em config_capture_rect.csv)
+DEFAULT_REGIONS = ("PrecoCompra", "PrecoVenda", "FluxoCompra", "FluxoVenda")
+
+
+def image_to_gray(image: QImage) -> np.ndarray:
+    """
+    Converte a imagem para tons de cinza (uint8, altura x largura).
+
+    A conversão é feita pelo Qt; o array resultante é uma cópia compacta.
+    """
+    gray = image.convertToFormat(QImage.Format.Format_Grayscale8)
+    height, width = gray.height(), gray.width()
+    bits = gray.constBits()
+    bits.setsize(gray.sizeInBytes())
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(height, gray.bytesPerLine())
+    return rows[:, :width].copy()
+
+
+def text_levels(gray: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Normaliza os tons pelo contraste da imagem.
+
+    Returns:
+        float32 (1 = texto, 0 = fundo), ou None se a imagem não tiver contraste
+    """
+    low, high = int(gray.min()), int(gray.max())
+    if high - low < MIN_CONTRAST:
+        return None
+    levels = (gray.astype(np.float32) - low) / (high - low)
+    # O texto ocupa menos pixels que o fundo
+    return 1.0 - levels if (levels >= TEXT_LEVEL).mean() > 0.5 else levels
+
+
+def _cell_weights(size_in: int, start: float, length: float, size_out: int) -> np.ndarray:
+    """
+    Pesos (size_out x size_in) da média das áreas de `size_out` faixas iguais de [start, start + length).
+
+    As faixas podem começar no meio de um pixel ou sair da imagem (fora dela, o tom é o do fundo).
+    """
+    edges = start + np.arange(size_out + 1) * (length / size_out)
+    pixel = np.arange(size_in)
+    # Sobreposição entre [edges[i], edges[i+1]) e [pixel, pixel + 1)
+    overlap = np.minimum(edges[1:, None], pixel[None, :] + 1) - np.maximum(edges[:-1, None], pixel[None, :])
+    return (overlap.clip(0) / (length / size_out)).astype(np.float32)
+
+
+def segment_glyphs(levels: np.ndarray) -> np.ndarray:
+    """
+    Divide a linha de texto (saída de `text_levels`) em glifos.
+
+    A altura de referência é a dos glifos mais altos da linha (os dígitos);
+    cada glifo é amostrado em uma célula proporcional a ela, ancorada na
+    linha dos dígitos e centrada no centroide horizontal do glifo.
+
+    Returns:
+        Tons das células, N x (GLYPH_HEIGHT * GLYPH_WIDTH)
+    """
+    mask = levels >= TEXT_LEVEL
+    # Início e fim de cada sequência de colunas com texto
+    filled = np.r_[False, mask.any(axis=0), False].astype(np.int8)
+    edges = np.diff(filled)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return np.empty((0, GLYPH_HEIGHT * GLYPH_WIDTH), dtype=np.float32)
+
+    tops, bottoms = [], []
+    for start, end in zip(starts, ends):
+        rows = np.flatnonzero(mask[:, start:end].any(axis=1))
+        tops.append(rows[0])
+        bottoms.append(rows[-1] + 1)
+    tops, bottoms = np.array(tops), np.array(bottoms)
+    heights = bottoms - tops
+    # Referência: glifos com pelo menos 60% da altura máxima (os dígitos)
+    tall = heights >= 0.6 * heights.max()
+    ref_top = float(np.median(tops[tall]))
+    digit_height = max(1.0, float(np.median(bottoms[tall])) - ref_top)
+
+    # Faixas verticais (as mesmas para todos os glifos da linha)
+    height, width = levels.shape
+    row_weights = _cell_weights(height, ref_top - CELL_ABOVE * digit_height,
+                                (1 + CELL_ABOVE + CELL_BELOW) * digit_height, GLYPH_HEIGHT)
+    bands = row_weights @ levels
+
+    glyphs = []
+    for start, end in zip(starts, ends):
+        # Inclui as colunas vazias vizinhas: o anti-aliasing abaixo de TEXT_LEVEL também conta
+        lo, hi = max(0, start - 1), min(width, end + 1)
+        mass = levels[:, lo:hi].sum(axis=0)
+        center = lo + float((mass * (np.arange(hi - lo) + 0.5)).sum() / mass.sum())
+        column_weights = _cell_weights(width, center - CELL_WIDTH * digit_height / 2,
+                                       CELL_WIDTH * digit_height, GLYPH_WIDTH)[:, lo:hi]
+        glyphs.append((bands[:, lo:hi] @ column_weights.T).ravel())
+    return np.array(glyphs, dtype=np.float32)
+
+
+def parse_number(text: str) -> Optional[float]:
+    """
+    Converte o texto lido em número, no formato brasileiro ou não.
+
+    Com vírgula, ela é o separador decimal e os pontos são de milhar
+    ('5.432,5'). Sem vírgula, pontos seguidos de exatamente três dígitos
+    também são de milhar, como nos preços e fluxos inteiros da B3
+    ('128.500', '1.234'); nos demais casos o ponto é o decimal ('5432.5').
+    """
+    if "," in text or _THOUSANDS_REGEX.match(text):
+        text = text.replace(".", "").replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+class GlyphSet:
+    """
+    Conjunto de glifos aprendidos (vários exemplos por caractere).
+
+    Args:
+        path: Arquivo JSON dos glifos
+    """
+
+    def __init__(self, path: str = GLYPHS_FILE):
+        self.path = path
+        self.chars: List[str] = []
+        self.templates = np.empty((0, GLYPH_HEIGHT * GLYPH_WIDTH), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.chars)
+
+    def _add(self, char: str, glyph: np.ndarray):
+        self.chars.append(char)
+        self.templates = np.vstack([self.templates, glyph.reshape(1, -1).astype(np.float32)])
+
+    def learn(self, image: QImage, text: str) -> int:
+        """
+        Aprende os glifos de um exemplo rotulado.
+
+        Depois de aprender, o exemplo é lido de volta; se a leitura não der o
+        texto informado (glifos de caracteres diferentes parecidos demais), o
+        aprendizado é desfeito.
+
+        Args:
+            image: Imagem da região
+            text: Texto exibido na imagem (espaços são ignorados)
+
+        Returns:
+            Quantidade de glifos novos (os já reconhecidos com folga não são guardados)
+
+        Raises:
+            ValueError: Se a quantidade de glifos encontrados não bater com o texto,
+                ou se o exemplo não puder ser lido sem ambiguidade
+        """
+        chars = [char for char in text if not char.isspace()]
+        levels = text_levels(image_to_gray(image))
+        if levels is None:
+            raise ValueError("Imagem sem contraste: nenhum glifo encontrado")
+        glyphs = segment_glyphs(levels)
+        if len(glyphs) != len(chars):
+            raise ValueError(f"Encontrados {len(glyphs)} glifos na imagem, mas o texto tem {len(chars)} caracteres")
+
+        saved = (list(self.chars), self.templates)
+        added = 0
+        for char, glyph in zip(chars, glyphs):
+            matched, score, margin = self.match(glyph[None, :])
+            if matched == char and score >= 0.95 and margin >= MIN_MATCH_MARGIN:
+                continue  # Já conhecido
+            self._add(char, glyph)
+            added += 1
+
+        text, score, margin = self.match(glyphs)
+        if text != "".join(chars) or margin < MIN_MATCH_MARGIN:
+            self.chars, self.templates = saved
+            raise ValueError(f"O exemplo '{''.join(chars)}' é lido como '{text}' (margem {margin:.3f}): "
+                             f"glifos de caracteres diferentes parecidos demais; aprendizado desfeito")
+        return added
+
+    def _char_scores(self, glyphs: np.ndarray) -> Tuple[List[str], np.ndarray]:
+        """
+        Melhor similaridade de cada glifo com cada caractere conhecido.
+
+        Returns:
+            (caracteres, similaridades N x caracteres)
+        """
+        # Similaridade de Ruzicka entre cada glifo e cada modelo
+        pairs = glyphs[:, None, :], self.templates[None, :, :]
+        scores = np.minimum(*pairs).sum(axis=2) / np.maximum(np.maximum(*pairs).sum(axis=2), 1e-6)
+        chars = sorted(set(self.chars))
+        owner = np.array([chars.index(char) for char in self.chars])
+        per_char = np.full((len(glyphs), len(chars)), -np.inf)
+        for index in range(len(chars)):
+            per_char[:, index] = scores[:, owner == index].max(axis=1)
+        return chars, per_char
+
+    def match(self, glyphs: np.ndarray) -> Tuple[str, float, float]:
+        """
+        Reconhece uma sequência de glifos (saída de `segment_glyphs`).
+
+        Returns:
+            (texto, pior similaridade entre os glifos, menor vantagem sobre o segundo caractere)
+        """
+        if len(glyphs) == 0 or len(self.chars) == 0:
+            return "", 0.0, 0.0
+        chars, per_char = self._char_scores(glyphs)
+        best = per_char.argmax(axis=1)
+        best_scores = per_char[np.arange(len(glyphs)), best]
+        if len(chars) > 1:
+            # Segundo melhor caractere (o melhor fica de fora)
+            runner_up = np.partition(per_char, -2, axis=1)[:, -2]
+            margin = float((best_scores - runner_up).min())
+        else:
+            margin = 1.0
+        text = "".join(chars[index] for index in best)
+        return text, float(best_scores.min()), margin
+
+    def check(self) -> List[Tuple[str, str, float]]:
+        """
+        Autoverificação: lê cada glifo aprendido contra os modelos dos outros caracteres.
+
+        Returns:
+            (caractere, caractere confundido, margem) dos glifos a menos de
+            MIN_MATCH_MARGIN de outro caractere, do mais ambíguo ao menos
+        """
+        if len(set(self.chars)) < 2:
+            return []
+        chars, per_char = self._char_scores(self.templates)
+        problems = []
+        for index, char in enumerate(self.chars):
+            own = chars.index(char)
+            others = per_char[index].copy()
+            others[own] = -np.inf
+            rival = int(others.argmax())
+            # O próprio modelo tem similaridade 1: a margem é a distância até o rival
+            margin = float(per_char[index, own] - others[rival])
+            if margin < MIN_MATCH_MARGIN:
+                problems.append((char, chars[rival], margin))
+        return sorted(problems, key=lambda problem: problem[2])
+
+    def read(self, image: QImage) -> Optional[Tuple[str, float]]:
+        """
+        Lê o número exibido na imagem.
+
+        Returns:
+            (texto, valor), ou None se não houver texto, algum glifo não for
+            reconhecido ou algum glifo for ambíguo entre dois caracteres
+        """
+        levels = text_levels(image_to_gray(image))
+        if levels is None:
+            return None
+        text, score, margin = self.match(segment_glyphs(levels))
+        if not text or score < MIN_MATCH_SCORE or margin < MIN_MATCH_MARGIN:
+            return None
+        value = parse_number(text)
+        return (text, value) if value is not None else None
+
+    @classmethod
+    def load(cls, path: str = GLYPHS_FILE) -> "GlyphSet":
+        """
+        Carrega os glifos do arquivo.
+
+        Returns:
+            GlyphSet vazio se o arquivo não existir ou tiver outro tamanho de célula
+        """
+        glyph_set = cls(path)
+        file_path = Path(path)
+        if not file_path.exists():
+            return glyph_set
+        with open(file_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        glyphs = data.get("glyphs") or []
+        if (data.get("width"), data.get("height")) != (GLYPH_WIDTH, GLYPH_HEIGHT) or any("levels" not in entry for entry in glyphs):
+            logging.getLogger(__name__).warning(f"Glifos de {path} em outro formato: é preciso aprendê-los novamente")
+            return glyph_set
+        for entry in glyphs:
+            glyph_set._add(entry["char"], np.frombuffer(bytes.fromhex(entry["levels"]), dtype=np.uint8) / np.float32(255))
+        return glyph_set
+
+    def save(self):
+        """Grava os glifos no arquivo."""
+        data = {
+            "width": GLYPH_WIDTH,
+            "height": GLYPH_HEIGHT,
+            "glyphs": [
+                # Tons da célula em 0-255, em hexadecimal
+                {"char": char, "levels": np.round(template * 255).astype(np.uint8).tobytes().hex()}
+                for char, template in zip(self.chars, self.templates)
+            ],
+        }
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False, indent=1)
+
+
+class PriceExtractor:
+    """
+    Analisador de quadros que transforma regiões em séries numéricas.
+
+    Registrado em `CaptureManager.add_frame_analyzer`, é chamado na thread de
+    captura apenas quando a região muda. Quadros já vistos (mesma impressão
+    digital) reaproveitam a leitura anterior, e só valores diferentes do
+    último são enviados ao backend.
+
+    Args:
+        glyphs: Glifos aprendidos
+        client: Cliente do socket de leituras do backend
+        regions: Nomes das regiões lidas
+    """
+
+    CACHE_SIZE = 256
+
+    def __init__(self, glyphs: GlyphSet, client: ReadingsClient, regions=DEFAULT_REGIONS):
+        self.logger = logging.getLogger(__name__)
+        self.glyphs = glyphs
+        self.client = client
+        self.regions = set(regions)
+        self._cache: "OrderedDict[Tuple[str, int], Optional[Tuple[str, float]]]" = OrderedDict()
+        self._last: Dict[str, float] = {}
+
+    @classmethod
+    def from_config(cls, path: str = GLYPHS_FILE) -> Optional["PriceExtractor"]:
+        """
+        Cria o extrator com os glifos gravados e inicia o cliente de leituras.
+
+        Returns:
+            PriceExtractor, ou None se ainda não houver glifos aprendidos
+        """
+        logger = logging.getLogger(__name__)
+        glyphs = GlyphSet.load(path)
+        if len(glyphs) == 0:
+            logger.info(f"Leitura de preços desativada: nenhum glifo em {path}")
+            return None
+        for char, rival, margin in glyphs.check():
+            logger.warning(f"Glifo '{char}' em {path} quase igual a '{rival}' (margem {margin:.3f}): "
+                           f"leituras com ele serão descartadas; aprenda novos exemplos")
+        client = ReadingsClient()
+        client.start()
+        return cls(glyphs, client)
+
+    def __call__(self, region, image: QImage, fingerprint: int, timestamp_ms: int):
+        name = region.window_name
+        if name not in self.regions:
+            return
+
+        key = (name, fingerprint)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            reading = self._cache[key]
+        else:
+            reading = self.glyphs.read(image)
+            self._cache[key] = reading
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+        if reading is None:
+            return
+        text, value = reading
+        if self._last.get(name) == value:
+            return
+        self._last[name] = value
+        self.client.send(name, value, timestamp_ms)
+
+    def close(self):
+        """Encerra o cliente de leituras."""
+        self.client.stop()
+
+
+def _learn_command(args):
+    """Captura a região na tela e aprende os glifos do texto informado."""
+    from PyQt6.QtWidgets import QApplication
+
+    try:
+        from capture_manager import CaptureManager
+    except ImportError:
+        from .capture_manager import CaptureManager
+
+    app = QApplication([])
+    manager = CaptureManager(args.config)
+    if not manager.load_config():
+        raise SystemExit(f"Não foi possível carregar {args.config}")
+    region = next((r for r in manager.regions if r.window_name == args.region), None)
+    if region is None:
+        raise SystemExit(f"Região {args.region} não encontrada em {args.config}")
+
+    screen = app.screens()[region.display_id - 1]
+    image = screen.grabWindow(0, region.x1, region.y1, region.width, region.height).toImage()
+    glyphs = GlyphSet.load(args.glyphs)
+    try:
+        added = glyphs.learn(image, args.text)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    glyphs.save()
+    print(f"{added} glifo(s) novo(s); {len(glyphs)} no total em {args.glyphs}")
+
+
+def _check_command(args):
+    """Lista os glifos aprendidos ambíguos (a menos de MIN_MATCH_MARGIN de outro caractere)."""
+    glyphs = GlyphSet.load(args.glyphs)
+    problems = glyphs.check()
+    for char, rival, margin in problems:
+        print(f"'{char}' quase igual a '{rival}' (margem {margin:.3f})")
+    print(f"{len(glyphs)} glifo(s), {len(problems)} ambíguo(s)")
+    if problems:
+        raise SystemExit(1)
+
+
+def _read_command(args):
+    """Lê uma imagem salva com os glifos aprendidos (útil para conferir o aprendizado)."""
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication([])
+    glyphs = GlyphSet.load(args.glyphs)
+    image = QImage(args.image)
+    started = time.perf_counter()
+    reading = glyphs.read(image)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"{reading} ({elapsed_ms:.2f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Glifos da leitura de preços nas regiões capturadas")
+    parser.add_argument("--glyphs", default=GLYPHS_FILE, help="Arquivo dos glifos")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    learn = commands.add_parser("learn", help="Aprende os glifos de uma região da tela")
+    learn.add_argument("region", help="NOME_JANELA da região (ex: PrecoCompra)")
+    learn.add_argument("text", help="Texto exibido agora na região (ex: 5.432,5)")
+    learn.add_argument("--config", default="config_capture_rect.csv", help="CSV das regiões")
+    learn.set_defaults(func=_learn_command)
+
+    read = commands.add_parser("read", help="Lê uma imagem com os glifos aprendidos")
+    read.add_argument("image", help="Arquivo de imagem (PNG, BMP...)")
+    read.set_defaults(func=_read_command)
+
+    check = commands.add_parser("check", help="Confere se os glifos aprendidos se distinguem entre si")
+    check.set_defaults(func=_check_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
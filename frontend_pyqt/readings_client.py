@@ -0,0 +1,116 @@
+"""
+Cliente do socket local de leituras do backend.
+
+Envia leituras numéricas das regiões capturadas (ver `price_ocr`) como
+NDJSON sobre TCP, uma por linha:
+
+    {"name": "PrecoCompra", "value": 5432.5, "ts": 1760630400123}
+
+`ts` é o horário da captura em milissegundos (epoch, UTC). O envio roda em
+uma thread própria: quem chama `send` nunca bloqueia. Sem conexão, as
+leituras ficam em uma fila limitada (as mais antigas são descartadas quando
+ela enche) e a conexão é refeita periodicamente.
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+from typing import Optional
+
+# Endereço do servidor de leituras do backend (ver backend/app/readings.py)
+READINGS_HOST = os.getenv("READINGS_HOST", "127.0.0.1")
+READINGS_PORT = int(os.getenv("READINGS_PORT", 8765))
+
+
+class ReadingsClient:
+    """
+    Envia leituras ao backend em segundo plano.
+
+    Args:
+        host, port: Endereço do servidor de leituras
+        max_pending: Leituras guardadas enquanto não há conexão
+        retry_interval: Segundos entre tentativas de conexão
+    """
+
+    def __init__(self, host: str = READINGS_HOST, port: int = READINGS_PORT,
+                 max_pending: int = 1000, retry_interval: float = 2.0):
+        self.logger = logging.getLogger(__name__)
+        self.host = host
+        self.port = port
+        self.retry_interval = retry_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Inicia a thread de envio."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="readings-client", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Encerra a thread de envio (leituras pendentes são descartadas)."""
+        self._stop.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def send(self, name: str, value: float, timestamp_ms: int):
+        """
+        Enfileira uma leitura para envio (não bloqueia).
+
+        Args:
+            name: Nome da série (NOME_JANELA da região)
+            value: Valor lido
+            timestamp_ms: Horário da captura em milissegundos (epoch, UTC)
+        """
+        line = json.dumps({"name": name, "value": value, "ts": timestamp_ms}, separators=(",", ":")).encode() + b"\n"
+        while True:
+            try:
+                self._queue.put_nowait(line)
+                return
+            except queue.Full:
+                # Descarta a leitura mais antiga: a mais nova vale mais
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _run(self):
+        connection: Optional[socket.socket] = None
+        pending: Optional[bytes] = None
+        while not self._stop.is_set():
+            if connection is None:
+                try:
+                    connection = socket.create_connection((self.host, self.port), timeout=self.retry_interval)
+                    connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    self.logger.info(f"Conectado ao servidor de leituras em {self.host}:{self.port}")
+                except OSError as e:
+                    self.logger.debug(f"Servidor de leituras indisponível ({e}); nova tentativa em {self.retry_interval}s")
+                    self._stop.wait(self.retry_interval)
+                    continue
+
+            if pending is None:
+                pending = self._queue.get()
+                if pending is None:
+                    break
+            try:
+                connection.sendall(pending)
+                pending = None
+            except OSError as e:
+                # A leitura é reenviada após reconectar
+                self.logger.warning(f"Conexão com o servidor de leituras perdida: {e}")
+                connection.close()
+                connection = None
+
+        if connection is not None:
+            connection.close()
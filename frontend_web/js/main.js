@@ -9,13 +9,21 @@ document.addEventListener('DOMContentLoaded', () => {
     const SYMBOL = 'WDO$N'; //Este é o contrato continuo do MT5 que não tem o valor do ativo alterado pelos ajustes das séreies históricas. O WDO$ tem o contrato contínuo com os valores das séreies anterioes ajustados
     const API_BASE_URL = 'http://127.0.0.1:8000';
     const WS_BASE_URL = 'ws://127.0.0.1:8000';
+    const COLUMNAR_MEDIA_TYPE = 'application/x-ohlc-columnar';
+    const wsTextDecoder = new TextDecoder(); // O servidor envia o JSON em frames binários (UTF-8)
+    const nowMs = () => performance.timeOrigin + performance.now(); // Epoch ms com fração, para medir latência
 
     let websocket;
+    let reconnectTimer = null;
+    let reconnectDelay = 1000; // Backoff da reconexão automática (ms)
+    let lastBarTime = null; // Horário (epoch s) do último candle no gráfico, usado no gap-fill
     let candlestickSeries;
     let activeMarkers = []; // Array para rastrear os retângulos no gráfico
     let activeFiborange = null; //Rastrear o fiborange ativo
     let activeVTC = null; // Rastrear o VTC ativo
     let fluxoCompraSeries = null; // Rastrear a série do Fluxo de Compra
+    let fluxoCompraPoints = []; // Pontos atuais da linha (atualizados pelo WebSocket)
+    let fluxoVendaSeries = null; // Rastrear a série do Fluxo de Venda
 
     // Armazena os dados das jabulanis
     const jabulani = {
@@ -357,29 +365,142 @@ document.addEventListener('DOMContentLoaded', () => {
     Função auxiliar para criar a linha do Fluxo de Compra
     ---------------------------------------------------------------------------*/
     function createFluxoCompra(data) {
-        if (fluxoCompraSeries) {
-            chart.removeSeries(fluxoCompraSeries);
-            fluxoCompraSeries = null;
+        fluxoCompraPoints = data ? [...data] : [];
+        fluxoCompraSeries = replaceSignalLine(fluxoCompraSeries, data, 'red');
+    }
+
+    /*----------------------------------------------------------------------------
+    Função auxiliar para criar a linha do Fluxo de Venda
+    ---------------------------------------------------------------------------*/
+    function createFluxoVenda(data) {
+        fluxoVendaSeries = replaceSignalLine(fluxoVendaSeries, data, 'lime');
+    }
+
+    /**
+     * Substitui uma linha de sinais (pontos {time, value, active}) no gráfico.
+     * A linha só aparece nos trechos ativos, na cor informada.
+     * @returns A nova série, ou null se não houver pontos
+     */
+    function replaceSignalLine(series, data, activeColor) {
+        if (series) {
+            chart.removeSeries(series);
         }
+        if (!data || data.length === 0) {
+            return null;
+        }
+        const newSeries = chart.addSeries(LightweightCharts.LineSeries, {
+            // A cor será definida por ponto, então a cor base pode ser transparente
+            color: 'transparent',
+            lineWidth: 2,
+            priceLineVisible: false,
+            lastValueVisible: false,
+            crosshairMarkerVisible: false,
+        });
+        newSeries.setData(data.map(point => toSignalLinePoint(point, activeColor)));
+        return newSeries;
+    }
 
-        if (data && data.length > 0) {
-            fluxoCompraSeries = chart.addSeries(LightweightCharts.LineSeries, {
-                // A cor será definida por ponto, então a cor base pode ser transparente
-                color: 'transparent',
-                lineWidth: 2,
-                priceLineVisible: false,
-                lastValueVisible: false,
-                crosshairMarkerVisible: false,
-            });
+    function toSignalLinePoint(point, activeColor) {
+        return {
+            time: point.time,
+            value: point.value,
+            color: point.active ? activeColor : 'transparent',
+        };
+    }
 
-            const coloredData = data.map(point => ({
-                time: point.time,
-                value: point.value,
-                color: point.active ? 'red' : 'transparent',
-            }));
+    /*----------------------------------------------------------------------------
+    Aplica os pontos alterados da linha do Fluxo de Compra (mensagem fluxo_compra do
+    WebSocket). Os pontos vêm ordenados e substituem os existentes a partir do primeiro.
+    ---------------------------------------------------------------------------*/
+    function applyFluxoCompraUpdate(points) {
+        if (!points || points.length === 0) {
+            return;
+        }
+        const lastTime = fluxoCompraPoints.length > 0 ? fluxoCompraPoints[fluxoCompraPoints.length - 1].time : null;
+        if (!fluxoCompraSeries || lastTime === null || points[0].time < lastTime) {
+            // Pontos anteriores mudaram (ex: sinal atrasado): redesenha a linha inteira
+            const kept = fluxoCompraPoints.filter(point => point.time < points[0].time);
+            createFluxoCompra(kept.concat(points));
+            return;
+        }
+        // Caso comum: só o ponto do candle atual (ou um novo) mudou
+        points.forEach(point => {
+            if (point.time === fluxoCompraPoints[fluxoCompraPoints.length - 1].time) {
+                fluxoCompraPoints[fluxoCompraPoints.length - 1] = point;
+            } else {
+                fluxoCompraPoints.push(point);
+            }
+            fluxoCompraSeries.update(toSignalLinePoint(point, 'red'));
+        });
+    }
 
-            fluxoCompraSeries.setData(coloredData);
+    /*----------------------------------------------------------------------------
+    Decodifica o formato colunar binário de /api/history (ver backend/app/encoding.py).
+    Cabeçalho de 16 bytes (magic "OHLC", versão, colunas, quantidade) seguido das
+    colunas time (int64) e open/high/low/close (float64), little-endian.
+    No modo streaming (stream=true) o corpo traz um bloco desses por janela,
+    concatenados; os blocos são unidos em um único conjunto de colunas.
+    ---------------------------------------------------------------------------*/
+    /**
+     * @param {ArrayBuffer} buffer Corpo da resposta
+     * @returns {{time: Float64Array, open: Float64Array, high: Float64Array, low: Float64Array, close: Float64Array}}
+     */
+    function decodeColumnarOhlc(buffer) {
+        const view = new DataView(buffer);
+        const HEADER_SIZE = 16;
+
+        // Primeira passada: valida os cabeçalhos e soma a quantidade de candles
+        const blocks = [];
+        let total = 0;
+        for (let offset = 0; offset < buffer.byteLength;) {
+            const magic = String.fromCharCode(...new Uint8Array(buffer, offset, 4));
+            if (magic !== 'OHLC' || view.getUint16(offset + 4, true) !== 1) {
+                throw new Error('Formato colunar desconhecido');
+            }
+            const count = view.getUint32(offset + 8, true);
+            blocks.push({ offset, count });
+            total += count;
+            offset += HEADER_SIZE + 5 * count * 8;
+        }
+
+        const columns = {
+            time: new Float64Array(total), open: new Float64Array(total), high: new Float64Array(total),
+            low: new Float64Array(total), close: new Float64Array(total),
+        };
+        let position = 0;
+        for (const { offset, count } of blocks) {
+            const bytesPerColumn = count * 8;
+            const base = offset + HEADER_SIZE;
+            // Epoch seconds cabem com folga em um float64, então o int64 é convertido uma vez
+            const rawTime = new BigInt64Array(buffer, base, count);
+            for (let i = 0; i < count; i++) {
+                columns.time[position + i] = Number(rawTime[i]);
+            }
+            ['open', 'high', 'low', 'close'].forEach((name, index) => {
+                columns[name].set(new Float64Array(buffer, base + (index + 1) * bytesPerColumn, count), position);
+            });
+            position += count;
+        }
+        return columns;
+    }
+
+    /**
+     * Converte as colunas decodificadas nos objetos esperados por candlestickSeries.setData.
+     * @param {ReturnType<typeof decodeColumnarOhlc>} columns
+     * @returns {Array<{time: number, open: number, high: number, low: number, close: number}>}
+     */
+    function columnsToCandles(columns) {
+        const candles = new Array(columns.time.length);
+        for (let i = 0; i < candles.length; i++) {
+            candles[i] = {
+                time: columns.time[i],
+                open: columns.open[i],
+                high: columns.high[i],
+                low: columns.low[i],
+                close: columns.close[i],
+            };
         }
+        return candles;
     }
 
     // --- Data Fetching and WebSocket ---
@@ -398,12 +519,18 @@ document.addEventListener('DOMContentLoaded', () => {
 
         try {
             console.log(`Fetching: ${url}`);
-            const response = await fetch(url);
+            // Prefere o formato colunar binário; o JSON continua aceito como alternativa
+            const response = await fetch(url, {
+                headers: { 'Accept': `${COLUMNAR_MEDIA_TYPE}, application/json;q=0.9` },
+            });
             if (!response.ok) {
                 const errorData = await response.json();
                 throw new Error(`Erro ao buscar dados: ${errorData.detail || response.statusText}`);
             }
-            const data = await response.json();
+            const contentType = response.headers.get('Content-Type') || '';
+            const data = contentType.startsWith(COLUMNAR_MEDIA_TYPE)
+                ? columnsToCandles(decodeColumnarOhlc(await response.arrayBuffer()))
+                : await response.json();
             console.log(`Received ${data.length} data points.`);
 
             //Manter este código comentado porque é usado para debugar os dados recebidos do servidor
@@ -423,18 +550,19 @@ document.addEventListener('DOMContentLoaded', () => {
             });*/
             candlestickSeries.setData(data);
             chart.timeScale().fitContent();
-
-            // Fetch Fluxo Compra data
-            const date = start.split('T')[0];
-            const fluxoCompraUrl = `${API_BASE_URL}/api/history/fluxo_compra/${SYMBOL}/${date}/${timeframe}`;
-            console.log(`Fetching Fluxo Compra: ${fluxoCompraUrl}`);
-            const fluxoCompraResponse = await fetch(fluxoCompraUrl);
-            if (fluxoCompraResponse.ok) {
-                const fluxoCompraData = await fluxoCompraResponse.json();
-                console.log(`Received ${fluxoCompraData.length} Fluxo Compra data points.`);
-                createFluxoCompra(fluxoCompraData);
+            lastBarTime = data.length > 0 ? data[data.length - 1].time : null;
+
+            // Linhas de sinais (Fluxo Compra e Fluxo Venda) em uma única requisição
+            const overlaysUrl = `${API_BASE_URL}/api/overlays/${SYMBOL}?timeframe=${encodeURIComponent(timeframe)}&start=${start}:00Z&end=${end}:00`;
+            console.log(`Fetching overlays: ${overlaysUrl}`);
+            const overlaysResponse = await fetch(overlaysUrl);
+            if (overlaysResponse.ok) {
+                const overlays = await overlaysResponse.json();
+                console.log(`Received ${overlays.fluxo_compra.length} Fluxo Compra and ${overlays.fluxo_venda.length} Fluxo Venda data points.`);
+                createFluxoCompra(overlays.fluxo_compra);
+                createFluxoVenda(overlays.fluxo_venda);
             } else {
-                console.error('Erro ao buscar dados de Fluxo de Compra');
+                console.error('Erro ao buscar as linhas de Fluxo de Compra/Venda');
             }
 
         } catch (error) {
@@ -443,28 +571,68 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    function setupWebSocket() {
-        // Fecha conexão antiga se existir
+    /**
+     * Aplica um candle recebido pelo WebSocket, ignorando candles anteriores ao último
+     * do gráfico (o Lightweight Charts não aceita update de dados mais antigos).
+     * @param {{time: number, open: number, high: number, low: number, close: number}} bar
+     */
+    function applyStreamedBar(bar) {
+        if (lastBarTime !== null && bar.time < lastBarTime) {
+            return;
+        }
+        candlestickSeries.update(bar);
+        lastBarTime = bar.time;
+    }
+
+    /**
+     * Abre o WebSocket de candles.
+     * @param {boolean} isReconnect Em reconexões automáticas, pede ao servidor os
+     *     candles perdidos desde `lastBarTime` (mensagem gap_fill).
+     */
+    function setupWebSocket(isReconnect = false) {
+        // Fecha conexão antiga se existir (sem disparar a reconexão automática)
+        clearTimeout(reconnectTimer);
         if (websocket) {
+            websocket.onclose = null;
             websocket.close();
         }
+        if (!isReconnect) {
+            reconnectDelay = 1000;
+        }
 
         const timeframe = timeframeSelect.value;
-        const wsUrl = `${WS_BASE_URL}/ws/candles?symbol=${SYMBOL}&timeframe=${timeframe}`;
+        let wsUrl = `${WS_BASE_URL}/ws/candles?symbol=${SYMBOL}&timeframe=${encodeURIComponent(timeframe)}`;
+        if (isReconnect && lastBarTime !== null) {
+            wsUrl += `&since=${lastBarTime}`;
+        }
         console.log(`Connecting to WebSocket: ${wsUrl}`);
 
         websocket = new WebSocket(wsUrl);
+        websocket.binaryType = 'arraybuffer';
 
         websocket.onopen = () => {
             console.log('WebSocket connected.');
             wsStatus.textContent = 'Conectado';
             wsStatus.className = 'text-green-500';
+            reconnectDelay = 1000;
         };
 
         websocket.onmessage = (event) => {
-            const message = JSON.parse(event.data);
-            if (message.type === 'candle') {
-                candlestickSeries.update(message.data);
+            const recv = nowMs();
+            const text = typeof event.data === 'string' ? event.data : wsTextDecoder.decode(event.data);
+            const message = JSON.parse(text);
+            if (message.type === 'candle' || message.type === 'bar_closed') {
+                // bar_closed traz os valores finais do candle que acabou de fechar
+                applyStreamedBar(message.data);
+                if (message.seq !== undefined) {
+                    // Mensagem amostrada: devolve os horários para as métricas de latência do backend
+                    websocket.send(JSON.stringify({ type: 'ack', seq: message.seq, ts: message.ts, recv, render: nowMs() }));
+                }
+            } else if (message.type === 'fluxo_compra') {
+                applyFluxoCompraUpdate(message.data);
+            } else if (message.type === 'gap_fill') {
+                console.log(`Gap-fill received: ${message.data.length} candles`);
+                message.data.forEach(applyStreamedBar);
             } else if (message.type === 'markers') {
                 console.log('Marker data received:', message.data.length, 'markers');
 
@@ -620,9 +788,11 @@ document.addEventListener('DOMContentLoaded', () => {
         };
 
         websocket.onclose = () => {
-            console.log('WebSocket disconnected.');
+            console.log(`WebSocket disconnected. Reconnecting in ${reconnectDelay} ms...`);
             wsStatus.textContent = 'Desconectado';
             wsStatus.className = 'text-gray-500';
+            reconnectTimer = setTimeout(() => setupWebSocket(true), reconnectDelay);
+            reconnectDelay = Math.min(reconnectDelay * 2, 30000);
         };
 
         websocket.onerror = (error) => {